@@ -19,7 +19,8 @@ setup(
     keywords='xbrl, Financial, Accounting, file formats',
     packages=['xbrl'],
     install_requires=['pytest', 'pep8', 'marshmallow',
-    'beautifulsoup4', 'ordereddict', 'lxml', 'six'],
+    'beautifulsoup4', 'ordereddict', 'lxml', 'six',
+    'futures; python_version < "3"'],
     classifiers=[
         'Intended Audience :: Developers',
         'Natural Language :: English',
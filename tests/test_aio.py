@@ -0,0 +1,104 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import sys
+import pytest
+
+from xbrl import XBRLParser, GAAPSerializer, DEISerializer
+from xbrl.model import XBRL
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 5),
+                                reason="needs async/await")
+
+
+def run(coroutine):
+    import asyncio
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def expected(path, doc_date):
+    xbrl_parser = XBRLParser()
+    xbrl = xbrl_parser.parse(path)
+    return (GAAPSerializer().dump(xbrl_parser.parseGAAP(xbrl,
+                                                        doc_date)).data,
+            DEISerializer().dump(xbrl_parser.parseDEI(xbrl)).data)
+
+
+def test_parse_async_sources():
+    import asyncio
+    from xbrl.aio import AsyncXBRLParser
+
+    path = "tests/sam-20130629.xml"
+    with open(path, "rb") as fh:
+        data = fh.read()
+
+    async def chunks():
+        for i in range(0, len(data), 4096):
+            yield data[i:i + 4096]
+
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+
+        async with AsyncXBRLParser(executor="thread",
+                                   max_concurrency=2) as parser:
+            results = []
+            for source in (path, data, open(path, "rb"), reader, chunks()):
+                xbrl = await parser.parse_async(source)
+                gaap_obj, dei_obj = await asyncio.gather(
+                    parser.parseGAAP(xbrl, "20130629"),
+                    parser.parseDEI(xbrl))
+                results.append((GAAPSerializer().dump(gaap_obj).data,
+                                DEISerializer().dump(dei_obj).data))
+            return results
+
+    results = run(main())
+    assert results == [expected(path, "20130629")] * 5
+
+
+def test_parse_async_concurrency():
+    import asyncio
+    from xbrl.aio import AsyncXBRLParser
+
+    paths = [("tests/sam-20130629.xml", "20130629"),
+             ("tests/aaoi-20140630.xml", "20140630"),
+             ("tests/aaww-20140630.xml", "20140630")]
+
+    async def main():
+        parser = AsyncXBRLParser(max_concurrency=2)
+
+        async def parse(path, doc_date):
+            xbrl = await parser.parse_async(path)
+            return GAAPSerializer().dump(
+                await parser.parseGAAP(xbrl, doc_date)).data
+
+        return await asyncio.gather(*[parse(*args) for args in paths])
+
+    results = run(main())
+    assert results == [expected(*args)[0] for args in paths]
+
+
+def test_parse_async_process_pool():
+    from xbrl.aio import AsyncXBRLParser
+
+    async def main():
+        async with AsyncXBRLParser(executor="process", max_concurrency=1,
+                                   engine="iterparse") as parser:
+            xbrl = await parser.parse_async("tests/sam-20130629.xml")
+            assert isinstance(xbrl, XBRL)
+            # one job for both calls, the document is sent once
+            gaap_obj, dei_obj = await parser.run_many(
+                xbrl, ("parseGAAP", ("20130629",)), "parseDEI")
+            single = await parser.parseGAAP(xbrl, doc_date="20130629")
+            serializer = GAAPSerializer()
+            assert serializer.dump(gaap_obj).data == \
+                serializer.dump(single).data
+            return (serializer.dump(gaap_obj).data,
+                    DEISerializer().dump(dei_obj).data)
+
+    assert run(main()) == expected("tests/sam-20130629.xml", "20130629")
@@ -0,0 +1,161 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import io
+import bz2
+import gzip
+import zipfile
+import pytest
+
+import xbrl.archive
+from xbrl import XBRLParser, GAAPSerializer
+from xbrl.archive import open_instance
+
+
+def read(path):
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+def gaap(source, engine="iterparse", member=None):
+    xbrl_parser = XBRLParser(engine=engine, member=member)
+    xbrl = xbrl_parser.parse(source)
+    return GAAPSerializer().dump(
+        xbrl_parser.parseGAAP(xbrl, "20130629")).data
+
+
+def submission(documents):
+    parts = [b"<SEC-DOCUMENT>0000000000-13-000001.txt : 20130801\n",
+             b"<SEC-HEADER>0000000000-13-000001.hdr.sgml : 20130801\n",
+             b"</SEC-HEADER>\n"]
+    for doc_type, filename, text in documents:
+        parts.append(b"<DOCUMENT>\n<TYPE>" + doc_type + b"\n<SEQUENCE>1\n"
+                     b"<FILENAME>" + filename + b"\n<TEXT>\n" + text +
+                     b"\n</TEXT>\n</DOCUMENT>\n")
+    parts.append(b"</SEC-DOCUMENT>\n")
+    return b"".join(parts)
+
+
+class Unseekable(object):
+    def __init__(self, data):
+        self.fh = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self.fh.read(size)
+
+    def close(self):
+        self.fh.close()
+
+
+SAM = "tests/sam-20130629.xml"
+
+
+@pytest.fixture
+def expected():
+    return gaap(SAM)
+
+
+def test_zip(tmpdir, expected):
+    path = str(tmpdir.join("filing.zip"))
+    archive = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+    archive.writestr("FilingSummary.xml", b"<FilingSummary/>")
+    archive.writestr("sam-20130629_cal.xml", b"<linkbase/>")
+    archive.writestr("sam-20130629.xsd", b"<schema/>")
+    archive.write(SAM, "sam-20130629.xml")
+    archive.writestr("other.xml", b"<xbrl/>")
+    archive.close()
+
+    assert gaap(path) == expected
+    assert gaap(path, engine="soup") == expected
+    assert gaap(io.BytesIO(read(path))) == expected
+    assert gaap(Unseekable(read(path))) == expected
+    with pytest.raises(Exception):
+        gaap(path, member="other.xml")
+
+
+@pytest.mark.parametrize("chunk_size", [xbrl.archive.CHUNK_SIZE, 7])
+def test_submission(tmpdir, monkeypatch, expected, chunk_size):
+    monkeypatch.setattr(xbrl.archive, "CHUNK_SIZE", chunk_size)
+    data = submission([
+        (b"10-Q", b"sam-10q.htm", b"<html><body>10-Q</body></html>"),
+        (b"EX-101.SCH", b"sam-20130629.xsd", b"<XBRL>\n<schema/>\n</XBRL>"),
+        (b"EX-101.INS", b"sam-20130629.xml",
+         b"<XBRL>\n" + read(SAM) + b"\n</XBRL>"),
+        (b"EX-101.CAL", b"sam-20130629_cal.xml", b"<XBRL><linkbase/></XBRL>"),
+    ])
+    path = str(tmpdir.join("submission.txt"))
+    with open(path, "wb") as fh:
+        fh.write(data)
+
+    assert gaap(path) == expected
+    assert gaap(path, engine="soup") == expected
+    assert gaap(Unseekable(data)) == expected
+    assert gaap(path, member="sam-20130629.xml") == expected
+
+    instance = open_instance(io.BytesIO(data), member="EX-101.SCH")
+    assert instance.read() == b"<schema/>"
+
+
+def test_compressed(tmpdir, expected):
+    gz_path = str(tmpdir.join("sam-20130629.xml.gz"))
+    with gzip.open(gz_path, "wb") as fh:
+        fh.write(read(SAM))
+    assert gaap(gz_path) == expected
+    assert gaap(gz_path, engine="soup") == expected
+
+    bz2_path = str(tmpdir.join("sam-20130629.xml.bz2"))
+    with open(bz2_path, "wb") as fh:
+        fh.write(bz2.compress(read(SAM)))
+    assert gaap(bz2_path) == expected
+
+    # a compressed submission
+    txt_path = str(tmpdir.join("submission.txt.gz"))
+    with gzip.open(txt_path, "wb") as fh:
+        fh.write(submission([(b"EX-101.INS", b"sam-20130629.xml",
+                              b"<XBRL>" + read(SAM) + b"</XBRL>")]))
+    assert gaap(txt_path) == expected
+
+
+def test_compressed_streams(tmpdir, monkeypatch, expected):
+    document = read(SAM)
+    first = bz2.compress(document[:len(document) // 2])
+    second = bz2.compress(document[len(document) // 2:])
+    path = str(tmpdir.join("sam-20130629.xml.bz2"))
+    with open(path, "wb") as fh:
+        fh.write(first + second)
+
+    # the first stream ends right at the end of a read
+    monkeypatch.setattr(xbrl.archive, "CHUNK_SIZE", len(first))
+    assert gaap(path) == expected
+    monkeypatch.setattr(xbrl.archive, "CHUNK_SIZE", 1000)
+    assert gaap(path) == expected
+
+
+def test_ixbrl_archives(tmpdir):
+    document = read("tests/abc-20131231.htm")
+    path = str(tmpdir.join("filing.zip"))
+    archive = zipfile.ZipFile(path, "w")
+    archive.writestr("ex-21.htm", b"<html><body>Subsidiaries</body></html>")
+    archive.writestr("abc-20131231.htm", document)
+    archive.close()
+
+    txt_path = str(tmpdir.join("submission.txt"))
+    with open(txt_path, "wb") as fh:
+        fh.write(submission([
+            (b"EX-21", b"ex-21.htm", b"<html><body>Subsidiaries</body></html>"),
+            (b"10-K", b"abc-20131231.htm", b"<XBRL>\n" + document +
+             b"\n</XBRL>")]))
+
+    for source in (path, txt_path):
+        xbrl_parser = XBRLParser(engine="ixbrl")
+        xbrl = xbrl_parser.parse(source)
+        assert xbrl_parser.parseGAAP(xbrl, "20131231", "year").revenues == \
+            1234.0
+
+
+def test_plain_files():
+    fh = open(SAM, "rb")
+    assert open_instance(fh) is fh
+    fh.close()
+    text = io.StringIO(u"<xbrl/>")
+    assert open_instance(text) is text
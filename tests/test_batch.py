@@ -0,0 +1,63 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+from xbrl import XBRLParser, GAAPSerializer
+from xbrl.batch import EXTENSIONS, find_filings, parse_batch
+from xbrl.__main__ import main
+
+
+def test_find_filings():
+    filings = list(find_filings(["tests", "tests/sam-20130629.xml"]))
+    assert "tests/sam-20130629.xml" in filings
+    assert "tests/test_batch.py" not in filings
+    assert filings.count("tests/sam-20130629.xml") == 2
+    assert "tests/taxonomy/abc-20131231_cal.xml" not in filings
+
+
+def test_find_instances(tmpdir):
+    for name in ("abc-20131231.xml", "abc-20131231_cal.xml",
+                 "abc-20131231_def.xml", "abc-20131231_lab.xml",
+                 "abc-20131231_pre.xml", "abc-20131231.xsd",
+                 "FilingSummary.xml"):
+        tmpdir.join(name).write("")
+    linkbase = str(tmpdir.join("abc-20131231_cal.xml"))
+    assert list(find_filings([str(tmpdir), linkbase])) == \
+        [str(tmpdir.join("abc-20131231.xml")), linkbase]
+    assert len(list(find_filings([str(tmpdir)], instances=False))) == 6
+
+
+def test_find_submissions(tmpdir):
+    tmpdir.join("README.txt").write("Filings for 2013\n")
+    tmpdir.join("0000000000-13-000001.txt").write(
+        "<SEC-DOCUMENT>0000000000-13-000001.txt : 20130801\n")
+    readme = str(tmpdir.join("README.txt"))
+    assert list(find_filings([str(tmpdir), readme],
+                             EXTENSIONS["iterparse"])) == \
+        [str(tmpdir.join("0000000000-13-000001.txt")), readme]
+
+
+def test_parse_batch():
+    files_to_parse = ["tests/sam-20130629.xml", "tests/nothing.xml",
+                      "tests/aaoi-20140630.xml"]
+    results = list(parse_batch(files_to_parse, workers=2, chunk_size=2,
+                               engine="iterparse"))
+
+    assert sorted(result["path"] for result in results) == \
+        sorted(files_to_parse)
+    by_path = dict((result["path"], result) for result in results)
+    assert "empty" in by_path["tests/nothing.xml"]["error"]
+
+    result = by_path["tests/sam-20130629.xml"]
+    assert result["doc_date"] == "2013-06-29"
+    assert result["dei"]["trading_symbol"] == "SAM"
+
+    xbrl_parser = XBRLParser()
+    xbrl = xbrl_parser.parse("tests/sam-20130629.xml")
+    gaap_obj = xbrl_parser.parseGAAP(xbrl, "20130629", "current")
+    assert result["gaap"] == GAAPSerializer().dump(gaap_obj).data
+
+
+def test_main(capsys):
+    assert main(["tests/sam-20130629.xml", "-w", "1"]) == 0
+    assert '"trading_symbol": "SAM"' in capsys.readouterr()[0]
+    assert main(["tests/nothing.xml", "-w", "1"]) == 1
@@ -0,0 +1,68 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import json
+import copy
+
+from xbrl.benchmark import benchmark, compare, main
+
+
+def test_benchmark():
+    results = benchmark(["tests/sam-20130629.xml", "tests/nothing.xml"],
+                        repeat=1)
+    json.dumps(results)
+
+    assert list(results["filings"]) == ["sam-20130629.xml"]
+    stages = results["filings"]["sam-20130629.xml"]
+    assert list(stages) == ["preprocess", "tree", "facts", "contexts",
+                            "context_filter", "gaap", "dei", "custom",
+                            "serialize"]
+    assert stages["tree"]["time"] > 0
+    assert stages["tree"]["memory"] > 0
+    assert results["total"]["tree"] == stages["tree"]
+
+    results = benchmark(["tests/sam-20130629.xml"], repeat=1, memory=False,
+                        engine="iterparse")
+    stages = results["filings"]["sam-20130629.xml"]
+    assert "preprocess" not in stages
+    assert "memory" not in stages["tree"]
+
+    results = benchmark(["tests"], repeat=1, memory=False, engine="ixbrl")
+    assert list(results["filings"]) == ["abc-20131231.htm"]
+    assert "context_filter" in results["filings"]["abc-20131231.htm"]
+
+
+def test_compare():
+    baseline = {"filings": {"a.xml": {"tree": {"time": 1.0,
+                                               "memory": 1000},
+                                      "gaap": {"time": 0.001}}},
+                "total": {"tree": {"time": 1.0, "memory": 1000}}}
+    assert compare(baseline, baseline) == []
+
+    results = copy.deepcopy(baseline)
+    results["filings"]["a.xml"]["tree"]["time"] = 2.0
+    results["filings"]["a.xml"]["gaap"]["time"] = 0.005
+    results["total"]["tree"]["memory"] = 1100
+    assert compare(results, baseline) == [("a.xml", "tree", "time",
+                                           1.0, 2.0)]
+    assert compare(results, baseline, tolerance=0.05) == [
+        ("a.xml", "tree", "time", 1.0, 2.0),
+        ("total", "tree", "memory", 1000, 1100)]
+
+
+def test_main(tmpdir, capsys):
+    output = str(tmpdir.join("results.json"))
+    args = ["tests/sam-20130629.xml", "-r", "1", "--no-memory"]
+    assert main(args + ["-o", output]) == 0
+    assert "tree" in capsys.readouterr()[0]
+
+    with open(output) as fh:
+        results = json.load(fh)
+    # a baseline far slower than any run, for the filing and the totals
+    for stages in (results["filings"]["sam-20130629.xml"],
+                   results["total"]):
+        for stage in stages.values():
+            stage["time"] *= 100
+    with open(output, "w") as fh:
+        json.dump(results, fh)
+    assert main(args + ["-b", output]) == 0
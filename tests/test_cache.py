@@ -0,0 +1,132 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import time
+
+from xbrl import XBRLParser, GAAPSerializer
+from xbrl.cache import ParseCache, Memo
+from xbrl.gaap import GAAP_CONCEPTS
+import xbrl.cache
+
+
+def test_parse_cache(tmpdir):
+    file_to_parse = "tests/sam-20130629.xml"
+    cache = ParseCache(str(tmpdir))
+
+    xbrl_parser = XBRLParser(cache=cache)
+    first = xbrl_parser.parseGAAP(xbrl_parser.parse(file_to_parse),
+                                  "20130629")
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert len(cache.entries()) == 1
+
+    xbrl_parser = XBRLParser(cache=cache)
+    second = xbrl_parser.parseGAAP(xbrl_parser.parse(open(file_to_parse,
+                                                          "rb")),
+                                   "20130629")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    serializer = GAAPSerializer()
+    assert serializer.dump(first).data == serializer.dump(second).data
+
+    # the engine is part of the key
+    XBRLParser(engine="iterparse", cache=cache).parse(file_to_parse)
+    assert len(cache.entries()) == 2
+
+
+def test_parse_cache_eviction(tmpdir):
+    cache = ParseCache(str(tmpdir))
+    xbrl_parser = XBRLParser(cache=cache)
+    xbrl_parser.parse("tests/sam-20130629.xml")
+
+    # make the first entry the least recently used one
+    old = time.time() - 60
+    for _, _, path in cache.entries():
+        os.utime(path, (old, old))
+
+    xbrl_parser.parse("tests/aaoi-20140630.xml")
+    entries = cache.entries()
+    assert len(entries) == 2
+
+    cache.max_size = entries[-1][1]
+    cache.evict()
+    assert cache.entries() == entries[1:]
+    assert cache.get(cache.key(open("tests/aaoi-20140630.xml",
+                                    "rb").read())) is not None
+
+
+def test_parse_cache_total(tmpdir, monkeypatch):
+    cache = ParseCache(str(tmpdir), max_size=1000)
+    listings = []
+    entries = cache.entries
+    monkeypatch.setattr(cache, "entries",
+                        lambda: listings.append(1) or entries())
+
+    for index in range(5):
+        cache.set("key%d" % index, b"x" * 100)
+    cache.set("key4", b"x" * 200)
+    # the directory is listed once, for the first write
+    assert len(listings) == 1
+    assert cache.total == cache.size()
+
+    cache.set("key5", b"x" * 600)
+    assert cache.total == cache.size() <= 1000
+    assert cache.get("key0") is None
+    assert cache.get("key5") is not None
+
+
+def test_parse_cache_version(tmpdir, monkeypatch):
+    XBRLParser(cache=str(tmpdir)).parse("tests/sam-20130629.xml")
+    assert len(os.listdir(str(tmpdir))) == 1
+
+    monkeypatch.setattr(xbrl.cache, "CACHE_VERSION",
+                        xbrl.cache.CACHE_VERSION + 1)
+    cache = ParseCache(str(tmpdir))
+    assert cache.entries() == []
+
+
+def test_memo():
+    memo = Memo(max_size=2)
+    assert memo.get("a") is None
+    memo.set("a", ())
+    memo.set("b", False)
+    assert memo.get("a") == ()
+    assert memo.get("b") is False
+    memo.set("c", 1)
+    assert memo.get("a") is None
+    assert memo.info() == {"hits": 2, "misses": 2, "evictions": 1,
+                           "size": 2, "max_size": 2}
+    memo.clear()
+    assert len(memo) == 0 and memo.hits == 0
+
+
+def test_concept_memo():
+    concepts = GAAP_CONCEPTS.copy()
+    xbrl_parser = XBRLParser(concepts=concepts)
+    xbrl = xbrl_parser.parse("tests/sam-20130629.xml", compact=True)
+    xbrl_parser.parseGAAP(xbrl, "20130629")
+    names = len(xbrl.fact_index.elements)
+    assert concepts.info()["misses"] == names
+    assert concepts.info()["hits"] == 0
+
+    # the names are only matched against the patterns once per process
+    xbrl_parser.parseGAAPPeriods(xbrl)
+    assert concepts.info()["misses"] == names
+    assert concepts.info()["hits"] == names
+
+
+def test_parse_cache_mmap(tmpdir):
+    cache = ParseCache(str(tmpdir))
+    XBRLParser(cache=cache).parse("tests/sam-20130629.xml")
+    xbrl = XBRLParser(cache=cache, mmap=True).parse("tests/sam-20130629.xml")
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(xbrl.fact_index)
+
+
+def test_parse_cache_select(tmpdir):
+    cache = ParseCache(str(tmpdir))
+    XBRLParser(cache=cache).parse("tests/sam-20130629.xml")
+    xbrl = XBRLParser(cache=cache, select=["^dei:"]).parse(
+        "tests/sam-20130629.xml")
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert not xbrl.fact_index.find("^us-gaap:")
@@ -0,0 +1,92 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import pickle
+import pytest
+from io import BytesIO
+
+from xbrl import XBRLParser, XBRLParserException, DEISerializer
+from xbrl.ixbrl import ix_number, ix_text
+from xbrl.batch import parse_batch
+
+
+def test_ix_number():
+    assert ix_number("1,234", "ixt:numdotdecimal", "6") == "1234000000"
+    assert ix_number("(56.5)", None, "6", "-") == "-56500000"
+    assert ix_number("1.234,5", "ixt:num-comma-decimal", "3") == "1234500"
+    assert ix_number(u"—", "ixt:fixed-zero") == "0"
+    assert ix_number("-", "ixt:numdotdecimal", "3", "-") == "0"
+    assert ix_number("twenty five", "ixt-sec:numwordsen") == "25"
+    assert ix_number("5 dollars and 25 cents", "ixt:numunitdecimal") == \
+        "5.25"
+    assert ix_number("5.5", None, "-2") == "0.055"
+    assert ix_number("n/a") is None
+
+
+def test_ix_text():
+    assert ix_text("December 31, 2013", "ixt:datemonthdayyearen") == \
+        "2013-12-31"
+    assert ix_text("31 Dec 13", "ixt:date-day-monthname-year-en") == \
+        "2013-12-31"
+    assert ix_text("12/31/2013", "ixt:datemonthdayyear") == "2013-12-31"
+    assert ix_text("sometime", "ixt:datemonthdayyearen") == "sometime"
+    assert ix_text("No", "ixt:booleanfalse") == "false"
+    assert ix_text("ABC") == "ABC"
+
+
+def test_parse_ixbrl():
+    xbrl_parser = XBRLParser(engine="ixbrl")
+    xbrl = xbrl_parser.parse("tests/abc-20131231.htm")
+    fact_index = xbrl_parser.fact_index(xbrl)
+
+    revenues = fact_index.find("^us-gaap:revenues$")
+    assert [fact.text for fact in revenues] == ["1234000000", "800000000"]
+    assert revenues[0].attrs == {"contextref": "FY2013", "unitref": "usd",
+                                 "decimals": "-6"}
+    assert fact_index.value(revenues[0]).number == 1234000000.0
+    assert fact_index.first("^us-gaap:earningspersharebasic$").text == \
+        "-0.25"
+    assert fact_index.first("^us-gaap:longtermdebtnoncurrent$").text == "0"
+    assert fact_index.first("textblock").text == \
+        "Basis of presentation. Use of estimates. Revenue recognition."
+    assert fact_index.first("^dei:entitycentralindexkey$").text == \
+        "0000000001"
+    assert len(xbrl_parser.context_table(xbrl)) == 3
+    assert list(xbrl.units) == ["usd", "usdPerShare"]
+
+    gaap_obj = xbrl_parser.parseGAAP(xbrl, "20131231", "year")
+    assert gaap_obj.revenues == 1234.0
+    assert gaap_obj.assets == 9876543.0
+    assert gaap_obj.non_current_assets == 5876543.0
+    assert DEISerializer().dump(xbrl_parser.parseDEI(xbrl)).data[
+        "trading_symbol"] == "ABC"
+    assert xbrl_parser.get_tag(xbrl, "^dei:documentperiodenddate$",
+                               tag_type="String") == "2013-12-31"
+    assert xbrl_parser.parseDimensions(
+        xbrl, "revenues", "us-gaap:StatementBusinessSegmentsAxis",
+        "20131231", "year") == {"abc:widgetsmember": 800.0}
+
+    assert pickle.loads(pickle.dumps(xbrl)).fact_index.first(
+        "^us-gaap:assets$").text == "9876543000"
+
+
+def test_parse_ixbrl_select():
+    xbrl_parser = XBRLParser(engine="ixbrl", select=["^us-gaap:assets"])
+    xbrl = xbrl_parser.parse("tests/abc-20131231.htm")
+    fact_index = xbrl_parser.fact_index(xbrl)
+    assert fact_index.find("^(us-gaap|dei):") == \
+        fact_index.find("^us-gaap:assets")
+    assert xbrl_parser.parseGAAP(xbrl, "20131231").assets == 9876543.0
+
+
+def test_parse_ixbrl_empty():
+    with pytest.raises(XBRLParserException):
+        XBRLParser(engine="ixbrl").parse(BytesIO(b"<html><body/></html>"))
+
+
+def test_parse_batch_ixbrl():
+    results = list(parse_batch(["tests"], workers=1, engine="ixbrl"))
+    assert [result["path"] for result in results] == \
+        ["tests/abc-20131231.htm"]
+    assert results[0]["doc_date"] == "2013-12-31"
+    assert results[0]["dei"]["trading_symbol"] == "ABC"
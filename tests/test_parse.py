@@ -2,10 +2,20 @@
 # encoding: utf-8
 
 from xbrl import XBRLParser, XBRLParserException, GAAPSerializer, DEISerializer
+from xbrl.model import XBRL, XBRLPreprocessedFile, Period, GAAP, DEI, \
+    MappedFile, decode_value
+from xbrl.stats import ParseStats
+from xbrl.gaap import GAAP_CONCEPTS, ConceptMap, DerivationRules, \
+    GAAP_RULES, GAAP_CALCULATIONS
+from xbrl.taxonomy import load_taxonomy
 import pytest
+import re
+import datetime
+import pickle
 import sys
 import os
 import six
+from decimal import Decimal
 
 try:
     import __pypy__
@@ -17,6 +27,8 @@ try:
 except ImportError:
     from io import StringIO
 
+from io import BytesIO
+
 sys.path.insert(0, os.path.abspath('python-xbrl'))
 
 
@@ -817,3 +829,549 @@ def test_parse_Custom10Q_RRDonnelley():
         assert result[10] == ('provisionforreductionofdoubtfulaccounts', '-28000')
         assert result[11] == ('receiptofgovernmentgrantsforfacilitiesexpansion', '770000')
         assert result[12] == ('netincomelossallocatedtoequityinstrumentsotherthanoptionnonvested', '-143000')
+
+
+def test_fact_index_matches_soup():
+
+    xbrl_parser = XBRLParser()
+    file_to_parse = "tests/sam-20130629.xml"
+    xbrl = xbrl_parser.parse(file_to_parse)
+    fact_index = xbrl_parser.fact_index(xbrl)
+
+    assert fact_index is xbrl.fact_index
+    assert fact_index.get("us-gaap:assetscurrent") == \
+        xbrl.find_all("us-gaap:assetscurrent")
+
+    pattern = "(us-gaap:)[^s]*(liabilities)"
+    assert fact_index.find(pattern) == \
+        xbrl.find_all(name=re.compile(pattern, re.IGNORECASE))
+
+    context_ids = ["eol_PE3179----1310-Q0007_STD_0_20130629_0"]
+    elements = fact_index.find(pattern, context_ids)
+    assert len(elements) > 0
+    for element in elements:
+        assert element.attrs['contextref'] in context_ids
+
+
+def test_parse_empty_file_iterparse():
+    xbrl_parser = XBRLParser(engine="iterparse")
+    file_to_parse = "tests/nothing.xml"
+    with pytest.raises(XBRLParserException):
+        xbrl_parser.parse(file_to_parse)
+
+
+def test_invalid_engine():
+    with pytest.raises(XBRLParserException):
+        XBRLParser(engine="dom")
+
+
+@pytest.mark.parametrize("file_to_parse,doc_date", [
+    ("tests/sam-20130629.xml", "20130629"),
+    ("tests/goog-20131231.xml", "20131231"),
+    ("tests/aaww-20140630.xml", "20140630"),
+])
+def test_iterparse_matches_soup(file_to_parse, doc_date):
+
+    results = []
+    for engine in ("soup", "iterparse"):
+        xbrl_parser = XBRLParser(engine=engine)
+        xbrl = xbrl_parser.parse(file_to_parse)
+        gaap_obj = xbrl_parser.parseGAAP(xbrl, doc_date, "current")
+        dei_obj = xbrl_parser.parseDEI(xbrl)
+        custom_obj = xbrl_parser.parseCustom(xbrl)
+        results.append((GAAPSerializer().dump(gaap_obj).data,
+                        DEISerializer().dump(dei_obj).data,
+                        sorted(custom_obj())))
+
+    assert results[0] == results[1]
+
+
+def test_preprocessing_skips_well_formed_file():
+    file_handle = open("tests/sam-20130629.xml", "rb")
+    xbrl_file = XBRLPreprocessedFile(file_handle)
+    assert xbrl_file.fh is file_handle
+    assert xbrl_file.fh.read(5) == b"<?xml"
+    file_handle.close()
+
+
+def test_preprocessing_closes_unclosed_tags():
+    broken = b"<DOC><TYPE>10-K\n<SEQUENCE>1\n<XBRL>x</XBRL></DOC>"
+    xbrl_file = XBRLPreprocessedFile(BytesIO(broken))
+    assert xbrl_file.fh.read() == \
+        b"<DOC><TYPE>10-K\n</TYPE><SEQUENCE>1\n</SEQUENCE><XBRL>x</XBRL></DOC>"
+
+
+def test_context_table():
+
+    xbrl_parser = XBRLParser()
+    file_to_parse = "tests/sam-20131228.xml"
+    xbrl = xbrl_parser.parse(file_to_parse)
+    context_table = xbrl_parser.context_table(xbrl)
+
+    assert context_table is xbrl.context_table
+    doc_date = datetime.date(2013, 12, 28).toordinal()
+    instant_ids = context_table.select(doc_date)
+    year_ids = context_table.select(doc_date, range(360, 369))
+
+    assert len(instant_ids) > 0
+    assert set(instant_ids) < set(year_ids)
+    for context_id in instant_ids:
+        context = context_table[context_id]
+        assert context.instant == doc_date
+        assert not context.segment
+
+    gaap_obj = xbrl_parser.parseGAAP(xbrl, "20131228", "instant")
+    assert gaap_obj.assets == 444075.0
+    assert gaap_obj.net_income_loss == 0.0
+
+
+def test_parse_GAAP_periods():
+
+    xbrl_parser = XBRLParser()
+    file_to_parse = "tests/sam-20131228.xml"
+    xbrl = xbrl_parser.parse(file_to_parse)
+    periods = xbrl_parser.parseGAAPPeriods(xbrl)
+
+    year = Period(datetime.date(2012, 12, 30), datetime.date(2013, 12, 28))
+    instant = Period(None, datetime.date(2013, 12, 28))
+    assert year in periods
+    assert instant in periods
+    assert instant.instant and not year.instant
+
+    serializer = GAAPSerializer()
+    assert serializer.dump(periods[year]).data == \
+        serializer.dump(xbrl_parser.parseGAAP(xbrl, "20131228", "year")).data
+    assert serializer.dump(periods[instant]).data == \
+        serializer.dump(xbrl_parser.parseGAAP(xbrl, "20131228",
+                                              "instant")).data
+
+
+def test_parse_compact_pickle():
+
+    file_to_parse = "tests/sam-20130629.xml"
+    xbrl_parser = XBRLParser()
+    soup = xbrl_parser.parse(file_to_parse)
+    xbrl = xbrl_parser.parse(file_to_parse, compact=True)
+
+    assert isinstance(xbrl, XBRL)
+    assert xbrl.units["iso4217_USD"].numerator == ("iso4217:USD",)
+
+    # a fresh parser can use a document unpickled in another process
+    xbrl = pickle.loads(pickle.dumps(xbrl, 2))
+    other_parser = XBRLParser()
+
+    serializer = GAAPSerializer()
+    assert serializer.dump(other_parser.parseGAAP(xbrl, "20130629")).data == \
+        serializer.dump(xbrl_parser.parseGAAP(soup, "20130629")).data
+    assert DEISerializer().dump(other_parser.parseDEI(xbrl)).data == \
+        DEISerializer().dump(xbrl_parser.parseDEI(soup)).data
+    assert sorted(other_parser.parseCustom(xbrl)()) == \
+        sorted(xbrl_parser.parseCustom(soup)())
+    assert other_parser.get_tag(xbrl, "(dei:tradingsymbol)",
+                                tag_type="String", no_context=True) == "SAM"
+
+
+def test_parse_stats():
+    records = []
+    stats = ParseStats(callback=lambda *record: records.append(record))
+    xbrl_parser = XBRLParser(stats=stats)
+    xbrl = xbrl_parser.parse("tests/sam-20130629.xml")
+    gaap_obj = xbrl_parser.parseGAAP(xbrl, "20130629")
+    xbrl_parser.parseDEI(xbrl)
+
+    assert list(stats.stages) == ["preprocess", "tree", "facts", "contexts",
+                                  "context_filter", "gaap", "dei"]
+    assert stats.stages["facts"].items == len(xbrl_parser.fact_index(xbrl))
+    assert stats.stages["contexts"].items == \
+        len(xbrl_parser.context_table(xbrl))
+    assert stats.lookups["assets"].calls == 1
+    assert stats.lookups["assets"].items == 1
+    assert stats.errors == {}
+    assert records[-1][:2] == ("stage", "dei")
+    assert len(records) == len(stats.stages) + \
+        sum(timing.calls for timing in stats.lookups.values())
+
+    # the stats don't change the results
+    assert GAAPSerializer().dump(gaap_obj).data == GAAPSerializer().dump(
+        XBRLParser().parseGAAP(xbrl, "20130629")).data
+
+    stats.error(ValueError())
+    assert stats.as_dict()["errors"] == {"ValueError": 1}
+    stats.reset()
+    assert stats.as_dict()["stages"] == {}
+
+
+def test_concept_map():
+    concepts = ConceptMap([("cost", ["us-gaap:costofrevenue$",
+                                     "us-gaap:costofgoodssold$"])])
+    concepts.add("cost", "us-gaap:costofservices$", priority=0)
+    concepts.add("tax", "(us-gaap:incometaxexpensebenefit)")
+    assert concepts["cost"] == ["us-gaap:costofservices$",
+                                "us-gaap:costofrevenue$",
+                                "us-gaap:costofgoodssold$"]
+    assert concepts.match("us-gaap:costofgoodssold") == (("cost", 2),)
+    assert concepts.match("dei:tradingsymbol") == ()
+    assert concepts.resolve(["us-gaap:costofgoodssold",
+                             "us-gaap:costofservices",
+                             "dei:tradingsymbol"]) == \
+        {"cost": [["us-gaap:costofservices"], [],
+                  ["us-gaap:costofgoodssold"]]}
+
+    # user fields are read like the built in ones
+    concepts = GAAP_CONCEPTS.copy()
+    concepts.add("research_and_development",
+                 "^us-gaap:researchanddevelopmentexpense$")
+    assert "research_and_development" not in GAAP_CONCEPTS
+
+    xbrl_parser = XBRLParser(concepts=concepts)
+    xbrl = xbrl_parser.parse("tests/goog-20131231.xml", compact=True)
+    gaap_obj = xbrl_parser.parseGAAP(xbrl, "20131231", context="year")
+    assert gaap_obj.research_and_development == 7952.0
+    assert GAAPSerializer().dump(gaap_obj).data == GAAPSerializer().dump(
+        XBRLParser().parseGAAP(xbrl, "20131231", context="year")).data
+
+
+def test_derivation_rules():
+    rules = DerivationRules()
+    rules.add_calculation("gross_profit", [("revenues", 1),
+                                           ("cost_of_revenue", -1)])
+    rules.add("margin", [("gross_profit", 1), ("other_income", 1)])
+    assert len(rules) == 4
+    # the rules deriving gross_profit come before the one using it, the
+    # cycle between them as added
+    assert [field for field, terms, partial in rules.order()] == \
+        ["gross_profit", "revenues", "cost_of_revenue", "margin"]
+
+    found = GAAP(revenues=100.0, cost_of_revenue=60.0)
+    missing = GAAP(revenues=100.0, gross_profit=30.0)
+    exact = GAAP(revenues=Decimal("100.5"), cost_of_revenue=Decimal("0.5"))
+    exact.other_income = Decimal(1)
+    derived = rules.derive([found, missing, exact],
+                           [{"revenues", "cost_of_revenue"},
+                            {"revenues", "gross_profit"},
+                            {"revenues", "cost_of_revenue", "other_income"}])
+    assert derived == [("gross_profit",), ("cost_of_revenue",),
+                       ("gross_profit", "margin")]
+    assert found.gross_profit == 40.0
+    assert missing.cost_of_revenue == 70.0
+    assert exact.margin == Decimal("101")
+    # a field not found and not derived is never used
+    assert not hasattr(found, "margin")
+    assert exact.derived == ("gross_profit", "margin")
+    assert pickle.loads(pickle.dumps(exact)).derived == exact.derived
+    assert GAAP().derived == ()
+
+    # a partial rule takes missing fields as 0
+    gaap_obj = GAAP(assets=10.0)
+    GAAP_RULES.derive([gaap_obj], [{"assets"}])
+    assert (gaap_obj.non_current_assets, gaap_obj.derived) == \
+        (10.0, ("non_current_assets",))
+    gaap_obj = GAAP(assets=10.0)
+    GAAP_CALCULATIONS.derive([gaap_obj], [{"assets", "non_current_assets"}])
+    assert (gaap_obj.current_assets, gaap_obj.derived) == \
+        (10.0, ("current_assets",))
+
+    with pytest.raises(ValueError):
+        rules.add("assets", [("assets", 1)])
+
+
+def test_derivation_rules_priority():
+    rules = DerivationRules([("x", [("b", 1)]), ("x", [("a", 1)]),
+                             ("b", [("x", 1)]), ("y", [("c", 1)]),
+                             ("c", [("d", 1)])])
+    assert [(field, terms[0][0]) for field, terms, partial in
+            rules.order()] == \
+        [("x", "b"), ("x", "a"), ("b", "x"), ("c", "d"), ("y", "c")]
+
+    # the first rule added for x is used when both can be
+    gaap_obj = GAAP()
+    gaap_obj.a, gaap_obj.b, gaap_obj.d = 1.0, 2.0, 3.0
+    rules.derive([gaap_obj], [{"a", "b", "d"}])
+    assert (gaap_obj.x, gaap_obj.y) == (2.0, 3.0)
+
+
+def test_parse_derived():
+    taxonomy = load_taxonomy(["tests/taxonomy/us-gaap",
+                              "tests/taxonomy/abc-20131231_cal.xml"])
+    rules = GAAP_RULES.copy()
+    rules.add_taxonomy(taxonomy)
+    assert ("gross_profit", (("revenues", 1.0), ("cost_of_revenue", -1.0)),
+            False) in list(rules)
+    assert ("current_assets", (("assets", 1.0),
+                               ("non_current_assets", -1.0)),
+            False) in list(rules)
+
+    xbrl_parser = XBRLParser(engine="ixbrl", rules=rules)
+    xbrl = xbrl_parser.parse("tests/abc-20131231.htm")
+    gaap_obj = xbrl_parser.parseGAAP(xbrl, "20131231", "year")
+    assert gaap_obj.non_current_assets == 5876543.0
+    assert gaap_obj.derived == ("non_current_assets",)
+    periods = xbrl_parser.parseGAAPPeriods(xbrl)
+    assert [gaap_obj.derived for gaap_obj in periods.values()] == \
+        [("non_current_assets",), ("non_current_assets",)]
+
+    xbrl_parser = XBRLParser()
+    gaap_obj = xbrl_parser.parseGAAP(
+        xbrl_parser.parse("tests/sam-20130629.xml"), "20130629")
+    assert gaap_obj.derived == ()
+
+
+@pytest.mark.parametrize("engine", ["soup", "iterparse"])
+def test_parse_derived_reported(engine):
+    document = b"""<?xml version="1.0"?>
+<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance"
+    xmlns:us-gaap="http://fasb.org/us-gaap/2013-01-31">
+  <xbrli:context id="I2013">
+    <xbrli:entity>
+      <xbrli:identifier scheme="http://www.sec.gov/CIK">1</xbrli:identifier>
+    </xbrli:entity>
+    <xbrli:period><xbrli:instant>2013-12-31</xbrli:instant></xbrli:period>
+  </xbrli:context>
+  <xbrli:context id="I2012">
+    <xbrli:entity>
+      <xbrli:identifier scheme="http://www.sec.gov/CIK">1</xbrli:identifier>
+    </xbrli:entity>
+    <xbrli:period><xbrli:instant>2012-12-31</xbrli:instant></xbrli:period>
+  </xbrli:context>
+  <us-gaap:Assets contextRef="I2013" unitRef="usd"
+      decimals="-3">1200000</us-gaap:Assets>
+  <us-gaap:AssetsCurrent contextRef="I2013" unitRef="usd"
+      decimals="-3">500000</us-gaap:AssetsCurrent>
+  <us-gaap:OtherAssetsNoncurrent contextRef="I2012" unitRef="usd"
+      decimals="-3">300000</us-gaap:OtherAssetsNoncurrent>
+</xbrli:xbrl>"""
+    # the document reports non_current_assets, for another period only
+    xbrl_parser = XBRLParser(engine=engine)
+    xbrl = xbrl_parser.parse(BytesIO(document))
+    gaap_obj = xbrl_parser.parseGAAP(xbrl, "20131231", "instant")
+    assert (gaap_obj.assets, gaap_obj.non_current_assets) == (1200.0, 0)
+    assert gaap_obj.derived == ()
+    assert [gaap_obj.derived for gaap_obj in
+            xbrl_parser.parseGAAPPeriods(xbrl).values()] == [(), ()]
+
+    xbrl = xbrl_parser.parse(BytesIO(document.replace(
+        b"OtherAssetsNoncurrent", b"OtherAssets")))
+    gaap_obj = xbrl_parser.parseGAAP(xbrl, "20131231", "instant")
+    assert gaap_obj.non_current_assets == 700.0
+    assert gaap_obj.derived == ("non_current_assets",)
+
+
+@pytest.mark.parametrize("engine", ["soup", "iterparse"])
+def test_parse_facts(engine):
+    xbrl_parser = XBRLParser(engine=engine)
+    xbrl = xbrl_parser.parse("tests/sam-20130629.xml")
+    table = xbrl_parser.parseFacts(xbrl)
+
+    assert len(table) == len(table["concept"]) == len(table["dimensional"])
+    rows = list(table.rows())
+    assert ("us-gaap:assets", "eol_PE3179----1310-Q0007_STD_0_20130629_0", 0,
+            20130629, "iso4217_USD", -3.0, 376766000.0, 0) in rows
+    # facts without a unit are not numeric
+    assert "dei:tradingsymbol" not in table.concepts
+    assert "dei:entitycommonstocksharesoutstanding" in table.concepts
+
+    table = pickle.loads(pickle.dumps(table, 2))
+    assert list(table.rows()) == rows
+
+
+def test_parse_facts_numpy():
+    numpy = pytest.importorskip("numpy")
+    xbrl_parser = XBRLParser()
+    table = xbrl_parser.parseFacts(
+        xbrl_parser.parse("tests/sam-20130629.xml"))
+    array = table.to_numpy()
+    assert array.dtype.names == tuple(table.COLUMNS)
+    assert array["value"].sum() == sum(table["value"])
+    assert numpy.array_equal(array["concept"], table["concept"])
+
+
+def test_gaap_model():
+    from array import array
+
+    xbrl_parser = XBRLParser()
+    xbrl = xbrl_parser.parse("tests/sam-20130629.xml", compact=True)
+    gaap_obj = xbrl_parser.parseGAAP(xbrl, "20130629")
+
+    # every field parseGAAP sets has a slot
+    assert not hasattr(gaap_obj, "__dict__") or vars(gaap_obj) == {}
+    assert gaap_obj.noncurrentLiabilities == gaap_obj.noncurrent_liabilities
+
+    values = gaap_obj.to_tuple()
+    assert len(values) == len(GAAP.FIELDS)
+    assert GAAP.from_tuple(values).to_tuple() == values
+
+    rows = array('d')
+    rows.extend(GAAP(assets=1.0).to_array())
+    rows.extend(gaap_obj.to_array())
+    assert GAAP.from_buffer(rows, 0).assets == 1.0
+    for buffer in (rows, BytesIO(rows.tobytes() if hasattr(rows, "tobytes")
+                                 else rows.tostring()).getvalue()):
+        other = GAAP.from_buffer(buffer, 1)
+        assert other.to_tuple() == values
+        assert GAAPSerializer().dump(other).data == \
+            GAAPSerializer().dump(gaap_obj).data
+    with pytest.raises(IndexError):
+        GAAP.from_buffer(rows.tobytes() if hasattr(rows, "tobytes")
+                         else rows.tostring(), 2)
+
+    gaap_obj.extra = 1
+    other = pickle.loads(pickle.dumps(gaap_obj, 2))
+    assert other.to_tuple() == values and other.extra == 1
+
+    dei_obj = xbrl_parser.parseDEI(xbrl)
+    assert DEI.from_tuple(dei_obj.to_tuple()).to_tuple() == \
+        dei_obj.to_tuple()
+    assert dei_obj.to_tuple()[0] == "SAM"
+    assert pickle.loads(pickle.dumps(dei_obj)).to_tuple() == \
+        dei_obj.to_tuple()
+
+
+@pytest.mark.parametrize("engine", ["soup", "iterparse"])
+def test_parse_mmap(engine):
+    path = "tests/aaoi-20140630.xml"
+    xbrl_parser = XBRLParser(engine=engine, mmap=True)
+    gaap_obj = xbrl_parser.parseGAAP(xbrl_parser.parse(path), "20140630")
+
+    other_parser = XBRLParser(engine=engine)
+    other = other_parser.parseGAAP(other_parser.parse(path), "20140630")
+    assert GAAPSerializer().dump(gaap_obj).data == \
+        GAAPSerializer().dump(other).data
+
+    with pytest.raises(XBRLParserException):
+        xbrl_parser.parse("tests/nothing.xml")
+
+
+def test_preprocessing_repairs_mmap(tmpdir):
+    broken = b"<xbrl><a>1<b>2</b><c>3</xbrl>" * 2
+    path = tmpdir.join("broken.xml")
+    path.write(broken, mode="wb")
+
+    fh = MappedFile(str(path))
+    assert fh.read(6) == b"<xbrl>"
+    fh.seek(0)
+    xbrl_file = XBRLPreprocessedFile(fh)
+    assert xbrl_file.repaired
+    assert xbrl_file.fh.read() == \
+        XBRLPreprocessedFile(BytesIO(broken)).fh.read()
+    fh.close()
+
+
+@pytest.mark.parametrize("engine", ["soup", "iterparse"])
+def test_parse_select(engine):
+    path = "tests/aaww-20131231.xml"
+    select = ["^dei:"] + GAAP_CONCEPTS["assets"] + \
+        GAAP_CONCEPTS["current_assets"]
+    xbrl_parser = XBRLParser(engine=engine, select=select)
+    xbrl = xbrl_parser.parse(path)
+    fact_index = xbrl_parser.fact_index(xbrl)
+
+    full_parser = XBRLParser(engine=engine)
+    full = full_parser.parse(path)
+    full_index = full_parser.fact_index(full)
+
+    names = [name for name in full_index.elements
+             if re.search("^dei:|textblock|^aaww:", name)]
+    assert names
+    for name in names:
+        assert (name in fact_index) == \
+            (name.startswith("dei:") and "textblock" not in name)
+    assert len(fact_index.find("^us-gaap:")) == \
+        len(full_index.find("^us-gaap:assets(current)?$"))
+    assert len(xbrl_parser.context_table(xbrl)) == \
+        len(full_parser.context_table(full))
+
+    gaap_obj = xbrl_parser.parseGAAP(xbrl, "20131231")
+    full_gaap = full_parser.parseGAAP(full, "20131231")
+    assert gaap_obj.assets == full_gaap.assets != 0
+    assert gaap_obj.current_assets == full_gaap.current_assets
+    assert gaap_obj.liabilities == 0
+    assert DEISerializer().dump(xbrl_parser.parseDEI(xbrl)).data == \
+        DEISerializer().dump(full_parser.parseDEI(full)).data
+
+
+def test_decode_value():
+    value = decode_value(u"-12345", {"decimals": "-3", "scale": "3"})
+    assert value.number == -12345000.0
+    assert value.decimals == -3 and value.precision is None
+    assert value.value == XBRLParser.trim_decimals(u"-12345", -3) == -12.0
+    assert value.error is None
+
+    value = decode_value(u"12.5", {"decimals": "INF"}, decimal=True)
+    assert value.number == Decimal("12.5") and value.value == Decimal("12.5")
+    assert value.decimals == float("inf")
+
+    value = decode_value(u"n/a", {"decimals": "0"})
+    assert value.number is None and value.value == 0
+    assert decode_value(u"12", {"sign": "-"}).number == -12.0
+
+    # no decimals is an error for data_processing
+    assert isinstance(decode_value(u"12", {}).error, KeyError)
+
+
+def test_parse_decimal():
+    xbrl_parser = XBRLParser(decimal=True)
+    xbrl = xbrl_parser.parse("tests/sam-20130629.xml")
+    fact_index = xbrl_parser.fact_index(xbrl)
+    element = fact_index.find("^us-gaap:assets$")[0]
+    assert fact_index.value(element) is fact_index.value(element)
+
+    gaap_obj = xbrl_parser.parseGAAP(xbrl, "20130629")
+    float_gaap = XBRLParser().parseGAAP(xbrl, "20130629")
+    assert isinstance(gaap_obj.assets, Decimal)
+    assert gaap_obj.assets == Decimal(float_gaap.assets)
+
+
+@pytest.mark.parametrize("engine", ["soup", "iterparse"])
+def test_parse_dimensions(engine):
+    xbrl_parser = XBRLParser(engine=engine)
+    xbrl = xbrl_parser.parse("tests/goog-20131231.xml")
+    context_table = xbrl_parser.context_table(xbrl)
+
+    contexts = context_table.dimension("dei:LegalEntityAxis",
+                                       "goog:GoogleIncorporatedMember")
+    assert contexts and all(context.segment for context in contexts)
+    assert ("dei:legalentityaxis", "goog:googleincorporatedmember") in \
+        contexts[0].dimensions
+    assert set(contexts) <= set(context_table.dimension("dei:legalentityaxis"))
+    assert pickle.loads(pickle.dumps(contexts[0])).dimensions == \
+        contexts[0].dimensions
+
+    revenues = xbrl_parser.parseDimensions(
+        xbrl, "^us-gaap:revenues$", "us-gaap:StatementGeographicalAxis",
+        "20131231", "year")
+    assert revenues["country:us"] == 26768.0
+    assert revenues["country:gb"] == 5638.0
+    assert xbrl_parser.parseDimensions(xbrl, "revenues",
+                                       "dei:LegalEntityAxis", "20131231",
+                                       "year") == \
+        {"goog:motorolamobilityholdingsincmember": 4306.0}
+
+
+@pytest.mark.parametrize("engine", ["soup", "iterparse"])
+def test_parse_typed_dimensions(engine):
+    document = b"""<?xml version="1.0"?>
+<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance"
+    xmlns:xbrldi="http://xbrl.org/2006/xbrldi"
+    xmlns:us-gaap="http://fasb.org/us-gaap/2013-01-31"
+    xmlns:abc="http://abc.com/20131231">
+  <xbrli:context id="D2013_Lease">
+    <xbrli:entity>
+      <xbrli:identifier scheme="http://www.sec.gov/CIK">1</xbrli:identifier>
+      <xbrli:segment>
+        <xbrldi:typedMember dimension="abc:LeaseAxis">
+          <abc:LeaseDomain>Lease 7A</abc:LeaseDomain>
+        </xbrldi:typedMember>
+      </xbrli:segment>
+    </xbrli:entity>
+    <xbrli:period><xbrli:instant>2013-12-31</xbrli:instant></xbrli:period>
+  </xbrli:context>
+  <us-gaap:Assets contextRef="D2013_Lease" unitRef="usd"
+      decimals="0">1200</us-gaap:Assets>
+</xbrli:xbrl>"""
+    xbrl_parser = XBRLParser(engine=engine)
+    xbrl = xbrl_parser.parse(BytesIO(document))
+    context = xbrl_parser.context_table(xbrl)["D2013_Lease"]
+    assert context.dimensions == (("abc:leaseaxis", "Lease 7A"),)
+    assert xbrl_parser.parseDimensions(xbrl, "assets", "abc:LeaseAxis",
+                                       "20131231", "instant") == \
+        {"Lease 7A": 1200.0}
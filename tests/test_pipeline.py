@@ -0,0 +1,106 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import json
+import shutil
+
+import pytest
+
+from xbrl.parser import XBRLParserException
+from xbrl.pipeline import Pipeline
+from xbrl.__main__ import main
+
+
+def copy_filings(tmpdir, *names):
+    filings = tmpdir.mkdir("filings")
+    for name in names:
+        shutil.copy(os.path.join("tests", name), str(filings))
+    return str(filings)
+
+
+def test_pipeline_resume(tmpdir):
+    filings = copy_filings(tmpdir, "sam-20130629.xml", "aaoi-20140630.xml",
+                           "nothing.xml")
+    output = str(tmpdir.join("results.jsonl"))
+
+    pipeline = Pipeline(output, workers=1, flush_size=2)
+    assert pipeline.run([filings]) == \
+        {"processed": 3, "skipped": 0, "failed": 1}
+    results = dict((result["path"], result)
+                   for result in pipeline.results())
+    sam = os.path.join(filings, "sam-20130629.xml")
+    assert results[sam]["dei"]["trading_symbol"] == "SAM"
+    assert "error" in results[os.path.join(filings, "nothing.xml")]
+
+    # nothing changed
+    pipeline = Pipeline(output, workers=1)
+    assert pipeline.run([filings]) == \
+        {"processed": 0, "skipped": 3, "failed": 0}
+    assert Pipeline(output, workers=1, retry_errors=True) \
+        .run([filings])["processed"] == 1
+
+    # a changed filing
+    with open(sam, "ab") as fh:
+        fh.write(b"\n")
+    pipeline = Pipeline(output, workers=1)
+    assert pipeline.run([filings]) == \
+        {"processed": 1, "skipped": 2, "failed": 0}
+    assert len(list(pipeline.results())) == 3
+
+    # another parser version
+    assert Pipeline(output, workers=1, version="next") \
+        .run([filings])["processed"] == 3
+
+
+def test_pipeline_crash(tmpdir):
+    filings = copy_filings(tmpdir, "sam-20130629.xml")
+    output = str(tmpdir.join("results.jsonl"))
+    Pipeline(output, workers=1).run([filings])
+    size = os.path.getsize(output)
+
+    # a crash while writing the next chunk
+    with open(output, "ab") as fh:
+        fh.write(b'{"path": "half')
+    with open(output + ".manifest", "ab") as fh:
+        fh.write(b'{"path": "ha')
+
+    pipeline = Pipeline(output, workers=1)
+    assert os.path.getsize(output) == size
+    assert pipeline.run([filings])["skipped"] == 1
+    assert [result["doc_date"] for result in pipeline.results()] == \
+        ["2013-06-29"]
+
+
+def test_main_output(tmpdir, capsys):
+    filings = copy_filings(tmpdir, "sam-20130629.xml")
+    output = str(tmpdir.join("results.jsonl"))
+    assert main([filings, "-w", "1", "--output", output]) == 0
+    assert main([filings, "-w", "1", "--output", output]) == 0
+    stats = [json.loads(line) for line in
+             capsys.readouterr()[0].splitlines()]
+    assert [s["skipped"] for s in stats] == [0, 1]
+
+
+def test_pipeline_foreign_output(tmpdir):
+    filings = copy_filings(tmpdir, "sam-20130629.xml")
+    output = tmpdir.join("results.jsonl")
+    output.write(b"not ours\n", mode="wb")
+
+    with pytest.raises(XBRLParserException):
+        Pipeline(str(output), workers=1)
+    with pytest.raises(SystemExit):
+        main([filings, "-w", "1", "--output", str(output)])
+    assert output.read() == "not ours\n"
+    assert not os.path.exists(str(output) + ".manifest")
+
+    pipeline = Pipeline(str(output), workers=1, overwrite=True)
+    assert pipeline.run([filings])["processed"] == 1
+    assert "not ours" not in output.read()
+
+    # a crash before the first record was written to the manifest
+    with open(str(output) + ".manifest", "wb"):
+        pass
+    pipeline = Pipeline(str(output), workers=1)
+    assert os.path.getsize(str(output)) == 0
+    assert pipeline.run([filings])["processed"] == 1
@@ -0,0 +1,67 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import csv
+import json
+
+from six import StringIO
+
+from xbrl import XBRLParser, GAAPSerializer, DEISerializer
+from xbrl.model import GAAP
+from xbrl.serializers import BulkSerializer
+
+
+def test_bulk_serializer():
+    xbrl_parser = XBRLParser()
+    xbrl = xbrl_parser.parse("tests/goog-20131231.xml", compact=True)
+    gaap_objs = list(xbrl_parser.parseGAAPPeriods(xbrl).values())
+
+    serializer = GAAPSerializer()
+    rows = list(BulkSerializer(GAAPSerializer).rows(gaap_objs))
+    assert rows == [serializer.dump(gaap_obj).data for gaap_obj in gaap_objs]
+    assert [list(row) for row in rows] == \
+        [list(serializer.dump(gaap_obj).data) for gaap_obj in gaap_objs]
+
+    dei_obj = xbrl_parser.parseDEI(xbrl)
+    assert BulkSerializer(DEISerializer()).dump(dei_obj) == \
+        DEISerializer().dump(dei_obj).data
+
+
+def test_bulk_serializer_fallback():
+    bulk = BulkSerializer()
+    serializer = GAAPSerializer()
+
+    gaap_obj = GAAP()
+    gaap_obj.assets = "12"
+    gaap_obj.equity = None
+    assert bulk.dump(gaap_obj) == serializer.dump(gaap_obj).data
+
+    # not a number and missing attributes go through marshmallow
+    gaap_obj.assets = "n/a"
+    del gaap_obj.liabilities
+    assert bulk.dump(gaap_obj) == serializer.dump(gaap_obj).data
+    assert "assets" not in bulk.dump(gaap_obj)
+
+    data = serializer.dump(GAAP()).data
+    assert bulk.dump(data) == serializer.dump(data).data
+
+
+def test_bulk_serializer_output():
+    bulk = BulkSerializer(DEISerializer)
+    xbrl_parser = XBRLParser()
+    dei_obj = xbrl_parser.parseDEI(
+        xbrl_parser.parse("tests/sam-20130629.xml"))
+
+    fh = StringIO()
+    bulk.to_ndjson([dei_obj, dei_obj], fh, sort_keys=True)
+    lines = fh.getvalue().splitlines()
+    assert lines == [json.dumps(DEISerializer().dump(dei_obj).data,
+                                sort_keys=True)] * 2
+
+    fh = StringIO()
+    bulk.to_csv([dei_obj], fh)
+    fh.seek(0)
+    rows = list(csv.reader(fh))
+    assert rows[0] == ["trading_symbol", "company_name",
+                       "shares_outstanding", "public_float"]
+    assert rows[1][0] == "SAM"
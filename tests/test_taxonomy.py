@@ -0,0 +1,91 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import pickle
+import shutil
+
+from xbrl.cache import ParseCache
+from xbrl.taxonomy import Taxonomy, load_taxonomy, filing_taxonomy_files
+
+TAXONOMY = ["tests/taxonomy/us-gaap", "tests/taxonomy/abc-20131231.xsd",
+            "tests/taxonomy/abc-20131231_cal.xml",
+            "tests/taxonomy/abc-20131231_pre.xml"]
+
+BALANCE_SHEET = "http://www.abc.com/role/BalanceSheet"
+
+
+def test_load_taxonomy():
+    taxonomy = load_taxonomy(TAXONOMY)
+
+    assert len(taxonomy) == 9
+    assert "us-gaap:Assets" in taxonomy
+    assert "NotAConcept" not in taxonomy
+    assert taxonomy.balance("us-gaap:Revenues") == "credit"
+    assert taxonomy.period_type("us-gaap:assets") == "instant"
+    assert taxonomy.balance("us-gaap:Nothing") is None
+    concept = taxonomy.concept("abc:WidgetsMember")
+    assert concept.name == "abc:WidgetsMember"
+    assert concept.abstract
+    assert taxonomy.concept("abc:OtherAssetsNoncurrentNet").balance == \
+        "debit"
+
+    assert taxonomy.label("us-gaap:Assets") == "Assets"
+    assert taxonomy.label("us-gaap:Assets",
+                          "http://www.xbrl.org/2003/role/totalLabel") == \
+        "Assets, Total"
+    assert load_taxonomy(TAXONOMY, lang="de").label("us-gaap:Assets") == \
+        u"Vermögenswerte"
+
+    # arcs in order, the prohibited one dropped
+    assert taxonomy.summations("us-gaap:Assets") == \
+        [("us-gaap:assetscurrent", 1.0), ("us-gaap:assetsnoncurrent", 1.0)]
+    assert taxonomy.summations("us-gaap:GrossProfit") == \
+        [("us-gaap:revenues", 1.0), ("us-gaap:costofrevenue", -1.0)]
+    assert taxonomy.summations("us-gaap:GrossProfit", BALANCE_SHEET) == []
+    assert taxonomy.presentation[BALANCE_SHEET]["us-gaap:assets"] == \
+        ["us-gaap:assetscurrent", "us-gaap:assetsnoncurrent"]
+
+
+def test_taxonomy_pickle():
+    taxonomy = load_taxonomy(TAXONOMY)
+    loaded = pickle.loads(pickle.dumps(taxonomy))
+    assert isinstance(loaded, Taxonomy)
+    assert loaded.concepts.keys() == taxonomy.concepts.keys()
+    assert loaded.calculations == taxonomy.calculations
+    assert loaded.balance("us-gaap:Assets") == "debit"
+    loaded.load("tests/taxonomy/abc-20131231_pre.xml")
+
+
+def test_taxonomy_cache(tmpdir):
+    cache = ParseCache(str(tmpdir.join("cache")))
+    first = load_taxonomy(TAXONOMY, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    second = load_taxonomy(TAXONOMY, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.calculations == first.calculations
+    assert second.labels == first.labels
+
+    # a given version is trusted without looking at the files
+    load_taxonomy(TAXONOMY, cache=cache, version="us-gaap-2013")
+    assert load_taxonomy(["missing"], cache=cache,
+                         version="us-gaap-2013") is not None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    # changed files are read again
+    directory = tmpdir.join("taxonomy")
+    shutil.copytree("tests/taxonomy", str(directory))
+    load_taxonomy([str(directory)], cache=str(tmpdir.join("cache")))
+    with open(str(directory.join("abc-20131231_pre.xml")), "ab") as fh:
+        fh.write(b"\n")
+    load_taxonomy([str(directory)], cache=cache)
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_filing_taxonomy_files(tmpdir):
+    for name in ("abc-20131231.xml", "abc-20131231.xsd",
+                 "abc-20131231_cal.xml", "abc-20131231_def.xml"):
+        tmpdir.join(name).write("")
+    assert [os.path.basename(path) for path in filing_taxonomy_files(
+        str(tmpdir.join("abc-20131231.xml")))] == \
+        ["abc-20131231.xsd", "abc-20131231_cal.xml"]
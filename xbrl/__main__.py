@@ -0,0 +1,79 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+from __future__ import print_function
+
+import sys
+import json
+import argparse
+
+from xbrl.batch import parse_batch
+from xbrl.parser import XBRLParserException
+from xbrl.pipeline import Pipeline
+
+
+def main(argv=None):
+    """
+    Parse filings or directories of filings in parallel and print one JSON
+    result per filing in completion order, or append them to --output
+    skipping the filings it already holds.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m xbrl",
+        description="Parse GAAP and DEI data from XBRL filings.")
+    parser.add_argument("paths", nargs="+",
+                        help="filings or directories of filings")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=1,
+                        help="filings handed to a worker at a time")
+    parser.add_argument("-e", "--engine", default="soup",
+                        choices=("soup", "iterparse", "ixbrl"))
+    parser.add_argument("-d", "--doc-date", default=None,
+                        help="document date, read from the DEI by default")
+    parser.add_argument("--context", default="current",
+                        help="current, year, instant or a number of days")
+    parser.add_argument("--ignore-errors", type=int, default=0,
+                        choices=(0, 1, 2))
+    parser.add_argument("--mmap", action="store_true",
+                        help="memory map the filings instead of reading them")
+    parser.add_argument("-o", "--output", default=None,
+                        help="append the results to this file, resuming "
+                             "from its manifest")
+    parser.add_argument("--retry-errors", action="store_true",
+                        help="with --output, reprocess failed filings")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="with --output, discard the existing output "
+                             "and manifest")
+    args = parser.parse_args(argv)
+
+    options = dict(workers=args.workers,
+                   chunk_size=args.chunk_size,
+                   engine=args.engine,
+                   doc_date=args.doc_date,
+                   context=args.context,
+                   ignore_errors=args.ignore_errors,
+                   mmap=args.mmap)
+
+    if args.output:
+        try:
+            pipeline = Pipeline(args.output, retry_errors=args.retry_errors,
+                                overwrite=args.overwrite, **options)
+        except XBRLParserException as e:
+            parser.error(str(e))
+        stats = pipeline.run(args.paths)
+        print(json.dumps(stats))
+        return 1 if stats["failed"] else 0
+
+    failed = 0
+    for result in parse_batch(args.paths, **options):
+        if "error" in result:
+            failed += 1
+        print(json.dumps(result, sort_keys=True))
+        sys.stdout.flush()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
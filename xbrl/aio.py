@@ -0,0 +1,178 @@
+#! /usr/bin/env python
+# encoding: utf-8
+"""
+asyncio API for XBRLParser, needs python 3.5 or later.
+
+    parser = AsyncXBRLParser(engine="iterparse", max_concurrency=4)
+    xbrl = await parser.parse_async(reader)
+    gaap_obj = await parser.parseGAAP(xbrl, doc_date="20131228")
+"""
+
+import io
+import copy
+import asyncio
+import functools
+from concurrent import futures
+
+from xbrl.model import CHUNK_SIZE
+from xbrl.parser import XBRLParser
+
+# get_event_loop() is deprecated in coroutines, 3.5 and 3.6 only have it
+get_running_loop = getattr(asyncio, "get_running_loop",
+                           asyncio.get_event_loop)
+
+
+def call_parser(parser, method, *args, **kwargs):
+    """ Runs a parser method in an executor """
+    return getattr(parser, method)(*args, **kwargs)
+
+
+def call_parser_many(parser, xbrl, calls):
+    """ Runs several parser methods on one document in an executor """
+    results = []
+    for call in calls:
+        if isinstance(call, str):
+            call = (call,)
+        method = call[0]
+        args = call[1] if len(call) > 1 else ()
+        kwargs = call[2] if len(call) > 2 else {}
+        results.append(getattr(parser, method)(xbrl, *args, **kwargs))
+    return results
+
+
+class AsyncXBRLParser(object):
+    """
+    Runs the parse methods of an XBRLParser in an executor, so the event
+    loop is not blocked while a document is parsed.
+
+    :param parser: The XBRLParser to use, one is made from parser_options
+        when not given.
+    :param executor: 'thread' or 'process' for a pool of max_concurrency
+        workers owned by this object, an Executor, or None for the loop's
+        default executor. Results cross a process pool pickled, so parse
+        results are then compact XBRL objects, and a ParseStats on the
+        parser only sees what happens in this process. Every call after
+        parsing pickles the XBRL object to a worker again, run_many() does
+        several of them for the cost of one.
+    :param max_concurrency: How many calls may be in flight at once,
+        counting the reading of their input. Further calls wait for one to
+        finish, which holds back whoever feeds the parser.
+    """
+
+    def __init__(self, parser=None, executor=None, max_concurrency=4,
+                 **parser_options):
+        self.parser = parser if parser is not None \
+            else XBRLParser(**parser_options)
+        self.max_concurrency = max_concurrency
+        self.owns_executor = executor in ("thread", "process")
+        if executor == "thread":
+            executor = futures.ThreadPoolExecutor(max_concurrency)
+        elif executor == "process":
+            executor = futures.ProcessPoolExecutor(max_concurrency)
+        self.executor = executor
+        self.processes = isinstance(executor, futures.ProcessPoolExecutor)
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        # made on first use so it belongs to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, method, *args, **kwargs):
+        """
+        Runs an XBRLParser method in the executor and returns its result.
+        """
+        async with self.semaphore:
+            return await self._run(self.parser, method, *args, **kwargs)
+
+    async def _run(self, parser, method, *args, **kwargs):
+        loop = get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            functools.partial(call_parser, parser, method, *args, **kwargs))
+
+    async def parse_async(self, source, compact=False):
+        """
+        Parse a document like XBRLParser.parse.
+
+        :param source: A path, the document as bytes, a file object, an
+            asyncio stream or anything else with a read() coroutine, or an
+            async iterable of bytes. Async sources are read here in chunks
+            as they arrive, paths and files are read in the executor.
+        """
+        async with self.semaphore:
+            if hasattr(source, "__aiter__"):
+                source = await self.read_chunks(source)
+            elif asyncio.iscoroutinefunction(getattr(source, "read", None)):
+                source = await self.read_stream(source)
+
+            if isinstance(source, bytes):
+                source = io.BytesIO(source)
+            elif self.processes and not isinstance(source, str):
+                # file objects can't be sent to another process
+                loop = get_running_loop()
+                source = io.BytesIO(
+                    await loop.run_in_executor(None, source.read))
+
+            # parse() keeps per document state on the parser
+            parser = copy.copy(self.parser)
+            return await self._run(parser, "parse", source,
+                                   compact=compact or self.processes)
+
+    async def read_stream(self, stream):
+        chunks = []
+        while True:
+            chunk = await stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def read_chunks(self, chunks):
+        data = []
+        async for chunk in chunks:
+            data.append(chunk)
+        return b"".join(data)
+
+    async def run_many(self, xbrl, *calls):
+        """
+        Runs several XBRLParser methods on a document in one executor job
+        and returns their results in order.
+
+        :param calls: Method names, or (method, args, kwargs) tuples with
+            the arguments that follow the document, e.g.
+            ("parseGAAP", ("20131228",)), "parseDEI".
+        """
+        async with self.semaphore:
+            loop = get_running_loop()
+            return await loop.run_in_executor(
+                self.executor,
+                functools.partial(call_parser_many, self.parser, xbrl, calls))
+
+    async def parseGAAP(self, xbrl, *args, **kwargs):
+        return await self.run("parseGAAP", xbrl, *args, **kwargs)
+
+    async def parseGAAPPeriods(self, xbrl, *args, **kwargs):
+        return await self.run("parseGAAPPeriods", xbrl, *args, **kwargs)
+
+    async def parseDEI(self, xbrl, *args, **kwargs):
+        return await self.run("parseDEI", xbrl, *args, **kwargs)
+
+    async def parseCustom(self, xbrl, *args, **kwargs):
+        return await self.run("parseCustom", xbrl, *args, **kwargs)
+
+    async def parseFacts(self, xbrl, *args, **kwargs):
+        return await self.run("parseFacts", xbrl, *args, **kwargs)
+
+    def close(self, wait=True):
+        """ Shuts down the executor if this object made it """
+        if self.owns_executor:
+            self.executor.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,314 @@
+#! /usr/bin/env python
+# encoding: utf-8
+"""
+Reads the instance document of a filing straight out of an EDGAR zip
+bundle, a full submission .txt, or a gzip or bz2 compressed file, without
+unpacking it to disk.
+
+    xbrl = XBRLParser().parse("0001193125-14-000000.zip")
+"""
+
+import io
+import re
+import bz2
+import zlib
+import zipfile
+
+from xbrl.model import ChunkedFile, CHUNK_SIZE
+
+ZIP_MAGIC = b"PK\x03\x04"
+GZIP_MAGIC = b"\x1f\x8b"
+BZ2_MAGIC = b"BZh"
+SUBMISSION_MAGIC = (b"<SEC-DOCUMENT>", b"<SEC-HEADER>", b"<SUBMISSION>",
+                    b"<DOCUMENT>",
+                    b"-----BEGIN PRIVACY-ENHANCED MESSAGE-----")
+
+# how much of a document is looked at to tell what it is
+HEAD_SIZE = 8192
+
+# the instance of an xml filing, e.g. goog-20131231.xml or goog-10k_htm.xml,
+# rather than its schema, linkbases or FilingSummary.xml
+INSTANCE_RE = re.compile(r"(?<!_cal|_def|_lab|_pre|_ref)\.xml$", re.I)
+DATED_INSTANCE_RE = re.compile(r"(-\d{8}|_htm)\.xml$", re.I)
+INLINE_MARKER = b"inlineXBRL"
+INSTANCE_TYPES = (b"EX-101.INS",)
+
+
+class ArchiveFile(ChunkedFile):
+    """
+    A ChunkedFile that closes the files it reads from when it is closed.
+    """
+
+    def __init__(self, chunks, *files):
+        super(ArchiveFile, self).__init__(chunks)
+        self.files = files
+
+    def read(self, size=-1):
+        data = super(ArchiveFile, self).read(size)
+        # ChunkedFile gives a str once it runs dry
+        return data or b""
+
+    def close(self):
+        super(ArchiveFile, self).close()
+        for fh in self.files:
+            fh.close()
+
+
+def peek(fh, size=HEAD_SIZE):
+    """
+    Returns the first bytes of a file and a file to read it from the
+    start, which is fh itself when it can seek.
+    """
+    seekable = getattr(fh, "seekable", None)
+    if seekable is not None and seekable():
+        start = fh.tell()
+        head = fh.read(size)
+        fh.seek(start)
+        return head, fh
+    head = fh.read(size)
+    rest = iter(lambda: fh.read(CHUNK_SIZE), fh.read(0))
+    return head, ArchiveFile(_chain(head, rest), fh)
+
+
+def _chain(head, rest):
+    yield head
+    for chunk in rest:
+        yield chunk
+
+
+def is_instance(name):
+    """
+    Whether a .xml file name is that of an instance document, telling them
+    from the linkbases and FilingSummary.xml of a filing.
+    """
+    return bool(INSTANCE_RE.search(name)) and \
+        name.rpartition("/")[2].lower() != "filingsummary.xml"
+
+
+def is_submission(path):
+    """
+    Whether a file is a full EDGAR submission, telling them from other
+    .txt files.
+    """
+    with open(path, "rb") as fh:
+        return fh.read(HEAD_SIZE).lstrip().startswith(SUBMISSION_MAGIC)
+
+
+def decompress_chunks(fh, make_decompressor):
+    """
+    Yields the decompressed chunks of a gzip or bz2 file, which may hold
+    several streams one after another.
+    """
+    decompressor = make_decompressor()
+    data = fh.read(CHUNK_SIZE)
+    while data:
+        chunk = decompressor.decompress(data)
+        if chunk:
+            yield chunk
+        if decompressor.unused_data or getattr(decompressor, "eof", False):
+            # the next stream starts after this one, or in the next read
+            data = decompressor.unused_data or fh.read(CHUNK_SIZE)
+            decompressor = make_decompressor()
+        else:
+            data = fh.read(CHUNK_SIZE)
+    flush = getattr(decompressor, "flush", None)
+    if flush is not None:
+        chunk = flush()
+        if chunk:
+            yield chunk
+
+
+def gzip_decompressor():
+    return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+class Scanner(object):
+    """ Reads a file of bytes up to markers, a chunk at a time """
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.buffer = b""
+        self.eof = False
+
+    def until(self, marker):
+        """
+        Yields the data up to the next marker and moves past it. found
+        tells whether the marker was there or the file ran out.
+        """
+        self.found = False
+        keep = len(marker) - 1
+        while True:
+            index = self.buffer.find(marker)
+            if index >= 0:
+                data = self.buffer[:index]
+                self.buffer = self.buffer[index + len(marker):]
+                self.found = True
+                if data:
+                    yield data
+                return
+            if len(self.buffer) > keep:
+                data = self.buffer[:len(self.buffer) - keep]
+                self.buffer = self.buffer[len(self.buffer) - keep:]
+                yield data
+            chunk = self.fh.read(CHUNK_SIZE)
+            if not chunk:
+                self.eof = True
+                data, self.buffer = self.buffer, b""
+                if data:
+                    yield data
+                return
+            self.buffer += chunk
+
+    def skip(self, marker):
+        for _ in self.until(marker):
+            pass
+        return self.found
+
+
+def header_field(header, name):
+    """ Returns a <TYPE> or <FILENAME> line of a document header """
+    match = re.search(b"<" + name + b">([^\r\n<]*)", header)
+    return match.group(1).strip().upper() if match else b""
+
+
+def strip_wrapper(chunks, size=64):
+    """
+    Yields the text of a submission document without the <XBRL> tags EDGAR
+    wraps XBRL documents in.
+    """
+    head = b""
+    chunks = iter(chunks)
+    for chunk in chunks:
+        head += chunk
+        if len(head.lstrip()) >= size:
+            break
+    head = head.lstrip()
+    if head[:6].upper() == b"<XBRL>":
+        # nothing may come before an xml declaration
+        head = head[6:].lstrip()
+
+    tail = head
+    for chunk in chunks:
+        tail += chunk
+        if len(tail) > size:
+            yield tail[:-size]
+            tail = tail[-size:]
+    tail = tail.rstrip()
+    if tail[-7:].upper() == b"</XBRL>":
+        tail = tail[:-7].rstrip()
+    if tail:
+        yield tail
+
+
+def submission_chunks(fh, member=None, engine="soup"):
+    """
+    Yields the text of the instance document of a full submission .txt,
+    skipping every other document.
+
+    :param member: The <TYPE> or <FILENAME> of the document to read. By
+        default the EX-101.INS instance, or the extracted *_htm.xml one,
+        and with the ixbrl engine the first inline XBRL document.
+    """
+    if member is not None:
+        member = member.encode("ascii") if not isinstance(member, bytes) \
+            else member
+        member = member.upper()
+    scanner = Scanner(fh)
+    while scanner.skip(b"<DOCUMENT>"):
+        header = b"".join(scanner.until(b"<TEXT>"))
+        if not scanner.found:
+            return
+        doc_type = header_field(header, b"TYPE")
+        filename = header_field(header, b"FILENAME")
+        text = scanner.until(b"</TEXT>")
+
+        if member is not None:
+            selected = member in (doc_type, filename)
+        elif engine == "ixbrl":
+            head = b""
+            for chunk in text:
+                head += chunk
+                if len(head) >= HEAD_SIZE:
+                    break
+            selected = INLINE_MARKER in head and \
+                not doc_type.startswith(b"EX-101")
+            text = _chain(head, text)
+        else:
+            filename = filename.decode("ascii", "ignore")
+            selected = doc_type in INSTANCE_TYPES or \
+                bool(DATED_INSTANCE_RE.search(filename))
+        if selected:
+            for chunk in strip_wrapper(text):
+                yield chunk
+            return
+        for _ in text:
+            pass
+
+
+def zip_member(archive, member=None, engine="soup"):
+    """
+    Returns the name of the instance document in a ZipFile, or None.
+
+    :param member: The name of the member to read, or its file name.
+    """
+    names = [info.filename for info in archive.infolist()
+             if not info.filename.endswith("/")]
+    if member is not None:
+        for name in names:
+            if name == member or name.rpartition("/")[2] == member:
+                return name
+        return None
+
+    if engine == "ixbrl":
+        for name in names:
+            if name.lower().endswith((".htm", ".html", ".xhtml")):
+                with archive.open(name) as fh:
+                    if INLINE_MARKER in fh.read(HEAD_SIZE):
+                        return name
+        return None
+
+    instances = [name for name in names if is_instance(name)]
+    dated = [name for name in instances if DATED_INSTANCE_RE.search(name)]
+    return (dated or instances or [None])[0]
+
+
+def open_instance(fh, member=None, engine="soup"):
+    """
+    Takes a binary file handler returns a file handler of the instance
+    document it holds: fh itself for a plain document, or a stream that
+    decompresses or extracts only the instance from an archive.
+
+    :param member: The zip member, or the submission document <TYPE> or
+        <FILENAME>, to read rather than looking for the instance.
+    :param engine: The engine the document is for, the ixbrl engine looks
+        for an inline XBRL document instead of an instance.
+    """
+    head, fh = peek(fh)
+    if not isinstance(head, bytes):
+        return fh
+
+    if head.startswith(GZIP_MAGIC):
+        stream = ArchiveFile(decompress_chunks(fh, gzip_decompressor), fh)
+        return open_instance(stream, member, engine)
+    if head.startswith(BZ2_MAGIC):
+        stream = ArchiveFile(decompress_chunks(fh, bz2.BZ2Decompressor), fh)
+        return open_instance(stream, member, engine)
+
+    if head.startswith(ZIP_MAGIC):
+        seekable = getattr(fh, "seekable", None)
+        source = fh if seekable is not None and seekable() \
+            else io.BytesIO(fh.read())
+        archive = zipfile.ZipFile(source)
+        name = zip_member(archive, member, engine)
+        if name is None:
+            archive.close()
+            fh.close()
+            # parsing nothing gives the usual empty file error
+            return io.BytesIO(b"")
+        stream = archive.open(name)
+        return ArchiveFile(iter(lambda: stream.read(CHUNK_SIZE), b""),
+                           stream, archive, fh)
+
+    if head.lstrip().startswith(SUBMISSION_MAGIC):
+        return ArchiveFile(submission_chunks(fh, member, engine), fh)
+    return fh
@@ -0,0 +1,146 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import six
+from concurrent import futures
+
+from xbrl.parser import XBRLParser
+from xbrl.archive import is_instance, is_submission
+from xbrl.serializers import GAAPSerializer, DEISerializer, BulkSerializer
+
+GAAP_ROWS = BulkSerializer(GAAPSerializer)
+DEI_ROWS = BulkSerializer(DEISerializer)
+
+# the file extensions of the filings each engine reads in a directory,
+# EDGAR archives and compressed files hold the filing itself
+ARCHIVE_EXTENSIONS = (".zip", ".txt", ".gz", ".bz2")
+EXTENSIONS = {"soup": (".xml",) + ARCHIVE_EXTENSIONS,
+              "iterparse": (".xml",) + ARCHIVE_EXTENSIONS,
+              "ixbrl": (".htm", ".html", ".xhtml") + ARCHIVE_EXTENSIONS}
+# found in a directory, these are only filings when they are submissions
+# or instance documents
+SUBMISSION_EXTENSIONS = (".txt",)
+INSTANCE_EXTENSIONS = (".xml",)
+
+
+def find_filings(paths, extensions=(".xml",), instances=True):
+    """
+    Takes paths to filings or directories of filings and yields the path
+    of every filing, walking directories in sorted order. The .txt files
+    of a directory are only yielded when they are EDGAR submissions, and
+    its .xml files when they are instance documents rather than linkbases
+    or FilingSummary.xml.
+
+    :param instances: Apply those checks, or yield every file with one of
+        the extensions.
+    """
+    if isinstance(paths, six.string_types):
+        paths = [paths]
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if not name.lower().endswith(extensions):
+                    continue
+                path = os.path.join(root, name)
+                if instances:
+                    if name.lower().endswith(INSTANCE_EXTENSIONS) and \
+                            not is_instance(name):
+                        continue
+                    if name.lower().endswith(SUBMISSION_EXTENSIONS) and \
+                            not is_submission(path):
+                        continue
+                yield path
+
+
+def parse_filing(path,
+                 engine="soup",
+                 doc_date=None,
+                 context="current",
+                 ignore_errors=0,
+                 mmap=False):
+    """
+    Parse GAAP and DEI from a single filing and return them serialized.
+
+    :param doc_date: The document date, read from dei:DocumentPeriodEndDate
+        when not given.
+    :param mmap: Memory map the filing rather than reading it.
+    """
+    xbrl_parser = XBRLParser(engine=engine, mmap=mmap)
+    xbrl = xbrl_parser.parse(path)
+
+    if doc_date is None:
+        doc_date = xbrl_parser.get_tag(xbrl, "^dei:documentperiodenddate$",
+                                       tag_type="String", no_context=True)
+
+    gaap_obj = xbrl_parser.parseGAAP(xbrl,
+                                     doc_date=str(doc_date),
+                                     context=context,
+                                     ignore_errors=ignore_errors)
+    dei_obj = xbrl_parser.parseDEI(xbrl, ignore_errors=ignore_errors)
+
+    return {"path": path,
+            "doc_date": str(doc_date),
+            "gaap": GAAP_ROWS.dump(gaap_obj),
+            "dei": DEI_ROWS.dump(dei_obj)}
+
+
+def parse_error(path, e):
+    return {"path": path, "error": "%s: %s" % (type(e).__name__, e)}
+
+
+def parse_chunk(paths, options):
+    """
+    Parse a chunk of filings in a worker, capturing errors per filing.
+    """
+    results = []
+    for path in paths:
+        try:
+            results.append(parse_filing(path, **options))
+        except Exception as e:
+            results.append(parse_error(path, e))
+    return results
+
+
+def parse_batch(paths, workers=None, chunk_size=1, **options):
+    """
+    Parse many filings across a pool of processes.
+
+    :param paths: Filing paths and/or directories of filings
+    :param workers: Number of worker processes, defaults to the CPU count
+    :param chunk_size: Number of filings handed to a worker at a time
+    :param options: engine, doc_date, context, ignore_errors and mmap as
+        taken by parse_filing
+
+    :returns: A generator of serialized results in completion order. A
+        filing that failed gives a dict with its path and the error.
+    """
+    filings = list(find_filings(paths,
+                                EXTENSIONS[options.get("engine", "soup")]))
+    chunk_size = max(1, int(chunk_size))
+    chunks = [filings[i:i + chunk_size]
+              for i in range(0, len(filings), chunk_size)]
+    if not chunks:
+        return
+
+    executor = futures.ProcessPoolExecutor(max_workers=workers)
+    pending = {}
+    try:
+        pending = dict((executor.submit(parse_chunk, chunk, options), chunk)
+                       for chunk in chunks)
+        for future in futures.as_completed(pending):
+            try:
+                results = future.result()
+            except Exception as e:
+                # the worker itself died, fail the whole chunk
+                results = [parse_error(path, e) for path in pending[future]]
+            for result in results:
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
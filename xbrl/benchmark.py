@@ -0,0 +1,292 @@
+#! /usr/bin/env python
+# encoding: utf-8
+"""
+Times and memory-profiles each stage of parsing a set of filings, and
+compares the results with a stored baseline.
+
+    python -m xbrl.benchmark tests/ --output results.json
+    python -m xbrl.benchmark tests/ --baseline results.json
+"""
+
+from __future__ import print_function
+
+import os
+import re
+import sys
+import gc
+import json
+import timeit
+import platform
+import argparse
+from collections import OrderedDict
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from xbrl.batch import ARCHIVE_EXTENSIONS, EXTENSIONS, find_filings
+from xbrl.model import XBRLPreprocessedFile
+from xbrl.parser import ENGINES, XBRLParser, soup_maker, stream_maker, \
+    ixbrl_maker
+from xbrl.serializers import GAAPSerializer, DEISerializer
+
+BENCHMARK_VERSION = 1
+
+# the document date is taken from the file name, e.g. sam-20130629.xml or
+# abc-20131231.htm
+FILING_PATTERN = re.compile(r"-(\d{8})\.[a-z]+$", re.IGNORECASE)
+
+# timings below this many seconds are too noisy to compare
+MIN_TIME = 0.01
+
+
+def find_benchmark_filings(paths, engine="soup"):
+    """
+    Yields (path, doc_date) of every filing the engine reads with a date
+    in its file name. Archives are left out, their stages are not timed.
+    """
+    extensions = tuple(extension for extension in EXTENSIONS[engine]
+                       if extension not in ARCHIVE_EXTENSIONS)
+    for path in find_filings(paths, extensions):
+        match = FILING_PATTERN.search(path)
+        if match:
+            yield path, match.group(1)
+
+
+def run_stages(path, doc_date, engine="soup", context="current"):
+    """
+    Parse a filing one stage at a time.
+
+    :returns: A generator of stage names. Each stage has run by the time
+        its name is yielded, so the caller can measure it in between.
+    """
+    xbrl_parser = XBRLParser(engine=engine)
+    fh = open(path, "rb")
+    try:
+        if engine == "iterparse":
+            xbrl = stream_maker(fh)
+        elif engine == "ixbrl":
+            xbrl = ixbrl_maker(fh)
+        else:
+            xbrl_file = XBRLPreprocessedFile(fh)
+            yield "preprocess"
+            xbrl = soup_maker(xbrl_file.fh)
+    finally:
+        fh.close()
+    yield "tree"
+
+    xbrl_parser.fact_index(xbrl)
+    yield "facts"
+
+    xbrl_parser.index(xbrl)
+    yield "contexts"
+
+    # parseGAAP selects them again, which is small next to reading fields
+    xbrl_parser.context_table(xbrl).select(
+        *xbrl_parser.period_filter(doc_date, context))
+    yield "context_filter"
+
+    gaap_obj = xbrl_parser.parseGAAP(xbrl, doc_date=doc_date,
+                                     context=context, ignore_errors=1)
+    yield "gaap"
+
+    dei_obj = xbrl_parser.parseDEI(xbrl, ignore_errors=1)
+    yield "dei"
+
+    xbrl_parser.parseCustom(xbrl, ignore_errors=1)
+    yield "custom"
+
+    GAAPSerializer().dump(gaap_obj)
+    DEISerializer().dump(dei_obj)
+    yield "serialize"
+
+
+def time_stages(path, doc_date, **options):
+    """ Returns the seconds spent in each stage """
+    timer = timeit.default_timer
+    times = OrderedDict()
+    start = timer()
+    for stage in run_stages(path, doc_date, **options):
+        now = timer()
+        times[stage] = now - start
+        start = timer()
+    return times
+
+
+def trace_stages(path, doc_date, **options):
+    """
+    Returns the peak bytes allocated while running each stage, or an
+    empty dict when tracemalloc is not available.
+    """
+    peaks = OrderedDict()
+    if tracemalloc is None:
+        return peaks
+
+    # without reset_peak (before python 3.9) a stage's peak can include
+    # an earlier, bigger one
+    reset_peak = getattr(tracemalloc, "reset_peak", lambda: None)
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        reset_peak()
+        for stage in run_stages(path, doc_date, **options):
+            current, peak = tracemalloc.get_traced_memory()
+            peaks[stage] = max(peak - base, 0)
+            reset_peak()
+            base = current
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return peaks
+
+
+def benchmark(paths, repeat=3, memory=True, **options):
+    """
+    Benchmark every filing found in paths.
+
+    :param repeat: Runs per filing, the fastest run of each stage is kept
+    :param memory: Also record the peak allocations of each stage
+    :param options: engine and context as taken by run_stages
+
+    :returns: A JSON serializable dict with the time (seconds) and memory
+        (peak bytes) of each stage per filing, and their totals.
+    """
+    filings = OrderedDict()
+    totals = OrderedDict()
+    engine = options.get("engine", "soup")
+    for path, doc_date in find_benchmark_filings(paths, engine):
+        gc.collect()
+        runs = [time_stages(path, doc_date, **options)
+                for _ in range(max(1, repeat))]
+        result = OrderedDict()
+        for stage in runs[0]:
+            result[stage] = OrderedDict(
+                [("time", min(run[stage] for run in runs))])
+        if memory:
+            gc.collect()
+            for stage, peak in trace_stages(path, doc_date,
+                                            **options).items():
+                result[stage]["memory"] = peak
+        filings[os.path.basename(path)] = result
+
+        for stage, metrics in result.items():
+            total = totals.setdefault(stage, OrderedDict())
+            for metric, value in metrics.items():
+                if metric == "memory":
+                    total[metric] = max(total.get(metric, 0), value)
+                else:
+                    total[metric] = total.get(metric, 0) + value
+
+    return OrderedDict([
+        ("version", BENCHMARK_VERSION),
+        ("python", platform.python_version()),
+        ("engine", engine),
+        ("repeat", repeat),
+        ("filings", filings),
+        ("total", totals),
+    ])
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Compare benchmark results with a baseline.
+
+    :param tolerance: How much slower or bigger than the baseline a stage
+        may get, as a fraction of the baseline.
+
+    :returns: A list of (filing, stage, metric, baseline, result) for every
+        metric over the tolerance. Filings and stages missing from either
+        side are skipped, as are timings under MIN_TIME.
+    """
+    regressions = []
+    base_filings = dict(baseline.get("filings", {}))
+    base_filings["total"] = baseline.get("total", {})
+    filings = list(results.get("filings", {}).items())
+    filings.append(("total", results.get("total", {})))
+
+    for name, stages in filings:
+        base_stages = base_filings.get(name)
+        if not base_stages:
+            continue
+        for stage, metrics in stages.items():
+            for metric, value in metrics.items():
+                base_value = base_stages.get(stage, {}).get(metric)
+                if base_value is None:
+                    continue
+                if metric == "time" and max(value, base_value) < MIN_TIME:
+                    continue
+                if value > base_value * (1 + tolerance):
+                    regressions.append((name, stage, metric,
+                                        base_value, value))
+    return regressions
+
+
+def format_results(results):
+    """ Returns a table of the stage totals for the terminal """
+    lines = ["%-14s %10s %12s" % ("stage", "time (s)", "memory (KiB)")]
+    for stage, metrics in results["total"].items():
+        memory = metrics.get("memory")
+        lines.append("%-14s %10.4f %12s" % (
+            stage, metrics["time"],
+            "-" if memory is None else "%d" % (memory // 1024)))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m xbrl.benchmark",
+        description="Benchmark each parsing stage over a set of filings.")
+    parser.add_argument("paths", nargs="*", default=["tests"],
+                        help="filings or directories of filings named "
+                             "like name-YYYYMMDD.xml, or .htm for the ixbrl "
+                             "engine (default: tests)")
+    parser.add_argument("-e", "--engine", default="soup", choices=ENGINES)
+    parser.add_argument("--context", default="current",
+                        help="current, year, instant or a number of days")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="runs per filing, the fastest one is kept")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the memory profiling run")
+    parser.add_argument("-o", "--output",
+                        help="write the results as JSON to this file")
+    parser.add_argument("-b", "--baseline",
+                        help="compare with the results in this JSON file")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.25,
+                        help="allowed regression as a fraction of the "
+                             "baseline (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.paths,
+                        repeat=args.repeat,
+                        memory=not args.no_memory,
+                        engine=args.engine,
+                        context=args.context)
+    if not results["filings"]:
+        parser.error("no filings found")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+    print(format_results(results))
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        if baseline.get("engine") != results["engine"]:
+            parser.error("the baseline was run with the %s engine" %
+                         baseline.get("engine"))
+        regressions = compare(results, baseline, args.tolerance)
+        for name, stage, metric, base_value, value in regressions:
+            print("regression: %s %s %s %s -> %s" %
+                  (name, stage, metric, base_value, value))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import sys
+import six
+import errno
+import hashlib
+import tempfile
+import threading
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+# bump whenever the parser or the XBRL model changes what gets cached,
+# entries written under another version are never read and get removed
+CACHE_VERSION = 2
+
+CACHE_SUFFIX = ".xbrl.pickle"
+
+# writes between listings of the directory, which also count the entries
+# other processes sharing it wrote
+RESCAN_WRITES = 1000
+
+replace = getattr(os, "replace", os.rename)
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+
+class ParseCache(object):
+    """
+    On-disk cache of parsed XBRL objects keyed by a hash of the input
+    bytes, the engine and the cache version.
+
+    The directory is kept under max_size bytes by evicting the least
+    recently used entries, using file modification times as the clock. The
+    total size is listed once and then kept up to date by every write, the
+    directory is only listed again to evict or every RESCAN_WRITES writes.
+    """
+
+    def __init__(self, directory, max_size=2 ** 30):
+        self.directory = os.path.expanduser(directory)
+        self.max_size = max_size
+        self.version = "v%s-py%s" % (CACHE_VERSION, sys.version_info[0])
+        self.hits = 0
+        self.misses = 0
+        self.total = None
+        self.writes = 0
+
+        try:
+            os.makedirs(self.directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        self.prune()
+
+    def key(self, data, engine="soup", options=None):
+        """
+        Returns the cache key for the raw bytes of a document, or any
+        buffer of them such as an mmap.
+
+        :param options: A string of parser options that change the result.
+        """
+        if isinstance(data, six.text_type):
+            data = data.encode("utf-8")
+        if options:
+            engine += "-" + hashlib.sha1(
+                options.encode("utf-8")).hexdigest()[:12]
+        return "%s-%s-%s" % (self.version, engine,
+                             hashlib.sha256(data).hexdigest())
+
+    def path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def get(self, key):
+        """
+        Returns the cached XBRL object for a key or None.
+        """
+        path = self.path(key)
+        try:
+            with open(path, "rb") as fh:
+                xbrl = pickle.load(fh)
+        except (IOError, OSError):
+            self.misses += 1
+            return None
+        except Exception:
+            # a broken entry is as good as a missing one
+            self.misses += 1
+            self.remove(path)
+            return None
+
+        # mark it as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return xbrl
+
+    def set(self, key, xbrl):
+        """
+        Stores an XBRL object, then evicts entries over max_size.
+        """
+        path = self.path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump(xbrl, fh, pickle.HIGHEST_PROTOCOL)
+                size = fh.tell()
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            replace(tmp_path, path)
+        except Exception:
+            self.remove(tmp_path)
+            raise
+
+        self.writes += 1
+        if self.total is None or self.writes % RESCAN_WRITES == 0:
+            self.total = self.size()
+        else:
+            self.total += size - replaced
+        if self.total > self.max_size:
+            self.evict()
+
+    def entries(self):
+        """
+        Returns (mtime, size, path) of every current entry, oldest first.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in
+        max_size.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            self.remove(path)
+            total -= size
+        self.total = total
+
+    def prune(self):
+        """
+        Removes entries written by another cache version.
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith(CACHE_SUFFIX) and \
+                    not name.startswith(self.version + "-"):
+                self.remove(os.path.join(self.directory, name))
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self.remove(path)
+        self.total = 0
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class Memo(object):
+    """
+    Size-bounded in-memory memo shared across documents, e.g. of concept
+    names to the fields they feed. Once max_size keys are stored the
+    oldest ones are dropped first.
+    """
+
+    def __init__(self, max_size=2 ** 16):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.values = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.values)
+
+    def __reduce__(self):
+        # a copy, e.g. in another process, starts out empty
+        return (Memo, (self.max_size,))
+
+    def get(self, key, default=None):
+        value = self.values.get(key, default)
+        if value is default:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.values[key] = value
+            while len(self.values) > self.max_size:
+                self.values.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        """ Returns the hits, misses, evictions, size and max_size """
+        return OrderedDict([("hits", self.hits),
+                            ("misses", self.misses),
+                            ("evictions", self.evictions),
+                            ("size", len(self.values)),
+                            ("max_size", self.max_size)])
@@ -0,0 +1,469 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import re
+import heapq
+from decimal import Decimal
+
+from xbrl.cache import Memo
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+NON_CURRENT_ASSETS_TAG = "(us-gaap:)[^s]*(assetsnoncurrent)"
+
+# GAAP attributes and the concept name patterns they are read from, in the
+# order parseGAAP assigns them. The patterns in a list are tried in turn,
+# the first one is the highest priority.
+GAAP_TAGS = [
+    ("assets", "us-gaap:assets$"),
+    ("current_assets", "^us-gaap:assetscurrent$"),
+    ("non_current_assets", NON_CURRENT_ASSETS_TAG),
+    ("liabilities_and_equity", "(us-gaap:)[^s]*(liabilitiesand)"),
+    ("liabilities", "(us-gaap:)[^s]*(liabilities)"),
+    ("current_liabilities", "(us-gaap:)[^s]*(currentliabilities)"),
+    ("noncurrent_liabilities", "(us-gaap:)[^s]*(noncurrentliabilities)"),
+    ("commitments_and_contingencies", "(us-gaap:commitmentsandcontingencies)"),
+    ("redeemable_noncontrolling_interest",
+     "(us-gaap:redeemablenoncontrollinginterestequity)"),
+    ("temporary_equity", "(us-gaap:)[^s]*(temporaryequity)"),
+    ("equity", "(us-gaap:)[^s]*(equity)"),
+    ("equity_attributable_interest", "(us-gaap:minorityinterest)"),
+    ("stockholders_equity", "(us-gaap:stockholdersequity)"),
+    ("equity_attributable_parent", "(us-gaap:liabilitiesandpartnerscapital)"),
+
+    # Incomes #
+    ("revenues", "(us-gaap:)[^s]*(revenue)"),
+    ("cost_of_revenue", [
+        "(us-gaap:costofrevenue)",
+        "(us-gaap:costofservices)",
+        "(us-gaap:costofgoodssold)",
+        "(us-gaap:costofgoodsandservicessold)"
+    ]),
+    ("gross_profit", "(us-gaap:)[^s]*(grossprofit)"),
+    ("operating_expenses", "(us-gaap:operating)[^s]*(expenses)"),
+    ("costs_and_expenses", "(us-gaap:)[^s]*(costsandexpenses)"),
+    ("other_operating_income", "(us-gaap:otheroperatingincome)"),
+    ("operating_income_loss", "(us-gaap:otheroperatingincome)"),
+    ("nonoperating_income_loss", "(us-gaap:nonoperatingincomeloss)"),
+    ("interest_and_debt_expense", "(us-gaap:interestanddebtexpense)"),
+    ("income_before_equity_investments",
+     "(us-gaap:incomelossfromcontinuing"
+     "operationsbeforeincometaxes"
+     "minorityinterest)"),
+    ("income_from_equity_investments",
+     "(us-gaap:incomelossfromequity"
+     "methodinvestments)"),
+    ("income_tax_expense_benefit", "(us-gaap:incometaxexpensebenefit)"),
+    ("income_continuing_operations_tax",
+     "(us-gaap:IncomeLossBeforeExtraordinaryItemsAndCumulativeEffectOfChangeInAccountingPrinciple)"),
+    ("income_discontinued_operations",
+     "(us-gaap:)[^s]*(discontinuedoperation)"),
+    ("extraordary_items_gain_loss", "(us-gaap:extraordinaryitemnetoftax)"),
+    ("income_loss", [
+        "(us-gaap:)[^s]*(incomeloss)",
+        "(us-gaap:profitloss)"
+    ]),
+    ("net_income_shareholders",
+     "(us-gaap:netincomeavailabletocommonstockholdersbasic)"),
+    ("preferred_stock_dividends",
+     "(us-gaap:preferredstockdividendsandotheradjustments)"),
+    ("net_income_loss_noncontrolling",
+     "(us-gaap:netincomelossattributabletononcontrollinginterest)"),
+    ("net_income_loss", "^us-gaap:netincomeloss$"),
+
+    # Comprehensive income
+    ("comprehensive_income", "(us-gaap:comprehensiveincome)"),
+    ("comprehensive_income_parent", "(us-gaap:comprehensiveincomenetoftax)"),
+    ("comprehensive_income_interest",
+     "(us-gaap:comprehensiveincomenetoftaxattributabletononcontrollinginterest)"),
+    ("other_comprehensive_income",
+     "(us-gaap:othercomprehensiveincomelossnetoftax)"),
+
+    # Net cash flow statements
+    ("net_cash_flows_operating",
+     "(us-gaap:netcashprovidedbyusedinoperatingactivities)"),
+    ("net_cash_flows_investing",
+     "(us-gaap:netcashprovidedbyusedininvestingactivities)"),
+    ("net_cash_flows_financing",
+     "(us-gaap:netcashprovidedbyusedinfinancingactivities)"),
+    ("net_cash_flows_operating_continuing",
+     "(us-gaap:netcashprovidedbyusedinoperatingactivitiescontinuingoperations)"),
+    ("net_cash_flows_investing_continuing",
+     "(us-gaap:netcashprovidedbyusedininvestingactivitiescontinuingoperations)"),
+    ("net_cash_flows_financing_continuing",
+     "(us-gaap:netcashprovidedbyusedinfinancingactivitiescontinuingoperations)"),
+    ("net_cash_flows_operating_discontinued",
+     "(us-gaap:cashprovidedbyusedinoperatingactivitiesdiscontinuedoperations)"),
+    ("net_cash_flows_investing_discontinued",
+     "(us-gaap:cashprovidedbyusedininvestingactivitiesdiscontinuedoperations)"),
+    ("net_cash_flows_discontinued",
+     "(us-gaap:netcashprovidedbyusedindiscontinuedoperations)"),
+    ("common_shares_outstanding", "(us-gaap:commonstocksharesoutstanding)"),
+    ("common_shares_issued", "(us-gaap:commonstocksharesissued)"),
+    ("common_shares_authorized", "(us-gaap:commonstocksharesauthorized)"),
+]
+
+
+class ConceptMap(object):
+    """
+    Declarative mapping of GAAP fields to the concept name patterns they
+    are read from, extended with add().
+
+    The patterns are compiled into a dispatch of concept name to the fields
+    it feeds, so resolving a document is one pass over its distinct concept
+    names, and names seen in earlier documents are not matched again. A
+    combined regex of every pattern rules out the names no field uses.
+
+    :param max_names: How many concept names the dispatch keeps.
+    """
+
+    def __init__(self, concepts=(), max_names=2 ** 16):
+        self.dispatch = Memo(max_names)
+        # field -> [pattern] highest priority first
+        self.concepts = OrderedDict()
+        for field, patterns in concepts:
+            self.add(field, patterns)
+
+    def __iter__(self):
+        """
+        Iterates over the fields in the order they were added.
+        """
+        return iter(self.concepts)
+
+    def __len__(self):
+        return len(self.concepts)
+
+    def __contains__(self, field):
+        return field in self.concepts
+
+    def __getitem__(self, field):
+        return list(self.concepts[field])
+
+    def add(self, field, patterns, priority=None):
+        """
+        Map a field to one or more concept name patterns, searched case
+        insensitively in lowercased concept names.
+
+        :param priority: Where the patterns go in the field's fallback
+            list, 0 is tried first. They go last by default.
+        """
+        if not isinstance(patterns, (list, tuple)):
+            patterns = [patterns]
+        for pattern in patterns:
+            re.compile(pattern)
+        current = self.concepts.setdefault(field, [])
+        if priority is None:
+            priority = len(current)
+        current[priority:priority] = patterns
+        self.reset()
+
+    def remove(self, field):
+        del self.concepts[field]
+        self.reset()
+
+    def copy(self):
+        return ConceptMap(((field, list(patterns))
+                           for field, patterns in self.concepts.items()),
+                          self.dispatch.max_size)
+
+    def reset(self):
+        self._matchers = None
+        self._any = None
+        self.dispatch.clear()
+
+    def info(self):
+        """ Returns the hit and miss counts of the dispatch """
+        return self.dispatch.info()
+
+    def compile(self):
+        flags = re.IGNORECASE | re.MULTILINE
+        self._matchers = [(field, priority, re.compile(pattern, flags))
+                          for field, patterns in self.concepts.items()
+                          for priority, pattern in enumerate(patterns)]
+        try:
+            self._any = re.compile(
+                "|".join("(?:%s)" % pattern
+                         for patterns in self.concepts.values()
+                         for pattern in patterns), flags)
+        except (re.error, AssertionError, OverflowError):
+            # too many groups for this version of re, check every pattern
+            self._any = None
+
+    def match(self, name):
+        """
+        Returns the (field, priority) pairs a concept name feeds.
+        """
+        fields = self.dispatch.get(name)
+        if fields is None:
+            if self._matchers is None:
+                self.compile()
+            if self._any is not None and not self._any.search(name):
+                fields = ()
+            else:
+                fields = tuple((field, priority)
+                               for field, priority, regex in self._matchers
+                               if regex.search(name))
+            self.dispatch.set(name, fields)
+        return fields
+
+    def resolve(self, names):
+        """
+        Takes the distinct concept names of a document and returns a dict
+        of field to lists of names, one list per pattern in priority order.
+        Fields no name matched are left out.
+        """
+        resolved = {}
+        for name in names:
+            for field, priority in self.match(name):
+                groups = resolved.get(field)
+                if groups is None:
+                    groups = resolved[field] = \
+                        [[] for _ in self.concepts[field]]
+                groups[priority].append(name)
+        return resolved
+
+
+GAAP_CONCEPTS = ConceptMap(GAAP_TAGS)
+
+
+def weigh(value, weight):
+    if weight == 1:
+        return value
+    if weight == -1:
+        return -value
+    if isinstance(value, Decimal):
+        weight = Decimal(repr(weight))
+    return value * weight
+
+
+class DerivationRules(object):
+    """
+    Derivations of the GAAP fields a document does not have from the
+    fields it does, each one a weighted sum of other fields such as
+    non_current_assets = assets - current_assets.
+
+    The rules are sorted topologically once, so a field one rule derives
+    is there for the rules that use it, and derive() runs every rule once
+    over all the GAAP objects of a document. Otherwise the sort keeps the
+    order the rules were added in: rules depending on each other in a
+    cycle, as the rules of a calculation do, run in that order, and the
+    rules for a field never run before the ones added for it earlier, so
+    a field takes the first of them whose fields are all there.
+
+    :param rules: (field, terms) or (field, terms, partial) rules, as
+        taken by add().
+    """
+
+    def __init__(self, rules=()):
+        # field -> [(((field, weight), ...), partial)] in the order added
+        self.rules = OrderedDict()
+        for rule in rules:
+            self.add(*rule)
+
+    def __iter__(self):
+        """
+        Iterates over the (field, terms, partial) rules in the order they
+        were added.
+        """
+        for field, alternatives in self.rules.items():
+            for terms, partial in alternatives:
+                yield field, terms, partial
+
+    def __len__(self):
+        return sum(len(alternatives) for alternatives in self.rules.values())
+
+    def add(self, field, terms, partial=False):
+        """
+        Derive field as the sum of the (field, weight) terms.
+
+        :param partial: Also derive it when terms are missing, taking them
+            as 0, but only for documents that report field in no context
+            at all.
+        """
+        terms = tuple((term, float(weight)) for term, weight in terms)
+        if not terms or field in dict(terms):
+            raise ValueError("invalid rule for %s" % field)
+        alternatives = self.rules.setdefault(field, [])
+        if (terms, partial) not in alternatives:
+            alternatives.append((terms, partial))
+        self.reset()
+
+    def add_calculation(self, total, items):
+        """
+        Add the rules of a calculation, total = sum of the (field, weight)
+        items, deriving whichever one of them is missing.
+        """
+        items = [(item, float(weight)) for item, weight in items]
+        self.add(total, items)
+        for index, (item, weight) in enumerate(items):
+            if not weight:
+                continue
+            self.add(item, [(total, 1 / weight)] +
+                     [(other, -other_weight / weight)
+                      for other, other_weight in
+                      items[:index] + items[index + 1:]])
+
+    def add_taxonomy(self, taxonomy, concepts=None):
+        """
+        Add the calculations of a Taxonomy, such as a filing's _cal.xml,
+        between concepts that each feed a single field of concepts,
+        GAAP_CONCEPTS by default. A calculation with an item that is not
+        one of the fields is left out, it would not add up.
+        """
+        concepts = concepts if concepts is not None else GAAP_CONCEPTS
+        fields = {}
+
+        def field(name):
+            if name not in fields:
+                matched = set(field for field, priority
+                              in concepts.match(name))
+                fields[name] = matched.pop() if len(matched) == 1 else None
+            return fields[name]
+
+        for relationships in taxonomy.calculations.values():
+            for parent, children in relationships.items():
+                total = field(parent)
+                items = [(field(child), weight) for child, weight in children]
+                names = [item for item, weight in items]
+                if total is None or None in names or total in names or \
+                        len(set(names)) != len(names):
+                    continue
+                self.add_calculation(total, items)
+
+    def copy(self):
+        return DerivationRules(self)
+
+    def reset(self):
+        self._order = None
+
+    def order(self):
+        """
+        Returns the (field, terms, partial) rules, each one after the rules
+        deriving its terms and the rules added earlier for its field.
+        """
+        if self._order is None:
+            rules = list(self)
+            producers = {}
+            for index, (field, terms, partial) in enumerate(rules):
+                producers.setdefault(field, []).append(index)
+            depends = []
+            for index, (field, terms, partial) in enumerate(rules):
+                before = set(producer for term, weight in terms
+                             for producer in producers.get(term, ()))
+                before.update(producer for producer in producers[field]
+                              if producer < index)
+                depends.append(before)
+
+            # the strongly connected components, the rules of a cycle
+            number, low, stack = {}, {}, []
+            component, components = {}, []
+
+            def connect(index):
+                number[index] = low[index] = len(number)
+                stack.append(index)
+                for other in depends[index]:
+                    if other not in number:
+                        connect(other)
+                        low[index] = min(low[index], low[other])
+                    elif other not in component:
+                        low[index] = min(low[index], number[other])
+                if low[index] == number[index]:
+                    members = []
+                    while not members or members[-1] != index:
+                        members.append(stack.pop())
+                        component[members[-1]] = len(components)
+                    components.append(sorted(members))
+
+            for index in range(len(rules)):
+                if index not in number:
+                    connect(index)
+
+            # sorted topologically, the first rule added that is ready first
+            waiting = [set(component[other] for index in members
+                           for other in depends[index]) - set([position])
+                       for position, members in enumerate(components)]
+            dependents = [[] for _ in components]
+            for position, before in enumerate(waiting):
+                for other in before:
+                    dependents[other].append(position)
+            ready = [(members[0], position)
+                     for position, members in enumerate(components)
+                     if not waiting[position]]
+            heapq.heapify(ready)
+            order = []
+            while ready:
+                first, position = heapq.heappop(ready)
+                order.extend(rules[index] for index in components[position])
+                for other in dependents[position]:
+                    waiting[other].discard(position)
+                    if not waiting[other]:
+                        heapq.heappush(ready,
+                                       (components[other][0], other))
+            self._order = order
+        return self._order
+
+    def derive(self, gaap_objs, found, reported=None):
+        """
+        Sets the fields of the GAAP objects that are missing and can be
+        derived, and records them in order in each one's derived tuple.
+
+        :param found: The set of fields the document had for each object.
+            Other fields are only used once a rule derived them.
+        :param reported: The fields the document has concepts for in any
+            context, which partial rules leave alone. All the fields found
+            by default.
+        """
+        available = [set(fields) for fields in found]
+        if reported is None:
+            reported = set().union(*available)
+        derived = [[] for _ in available]
+        for field, terms, partial in self.order():
+            if partial and field in reported:
+                continue
+            for gaap_obj, fields, done in zip(gaap_objs, available, derived):
+                if field in fields:
+                    continue
+                if partial and not any(term in fields for term, weight
+                                       in terms):
+                    continue
+                values = []
+                for term, weight in terms:
+                    if term in fields:
+                        value = getattr(gaap_obj, term, None)
+                    else:
+                        value = 0 if partial else None
+                    if value is None:
+                        break
+                    values.append(weigh(value, weight))
+                else:
+                    setattr(gaap_obj, field, sum(values[1:], values[0]))
+                    fields.add(field)
+                    done.append(field)
+        for gaap_obj, done in zip(gaap_objs, derived):
+            gaap_obj.derived = tuple(done)
+        return [gaap_obj.derived for gaap_obj in gaap_objs]
+
+
+# the rules parseGAAP applies by default
+GAAP_RULES = DerivationRules([
+    # Assets  = AssetsCurrent  +  AssetsNoncurrent
+    ("non_current_assets", [("assets", 1), ("current_assets", -1)], True),
+])
+
+# more rules, from us-gaap calculations between fields whose concepts are
+# read reliably. Fields such as revenues take the first of many concepts,
+# so totals like gross_profit are better left to a filing's own _cal.xml.
+GAAP_CALCULATIONS = GAAP_RULES.copy()
+GAAP_CALCULATIONS.add_calculation("assets", [("current_assets", 1),
+                                             ("non_current_assets", 1)])
+GAAP_CALCULATIONS.add_calculation(
+    "net_cash_flows_operating",
+    [("net_cash_flows_operating_continuing", 1),
+     ("net_cash_flows_operating_discontinued", 1)])
+GAAP_CALCULATIONS.add_calculation(
+    "net_cash_flows_investing",
+    [("net_cash_flows_investing_continuing", 1),
+     ("net_cash_flows_investing_discontinued", 1)])
@@ -0,0 +1,176 @@
+#! /usr/bin/env python
+# encoding: utf-8
+"""
+Inline XBRL transformation rules, turning the displayed text of ix facts
+into the values an XBRL instance would hold.
+"""
+
+import re
+from decimal import Decimal, InvalidOperation
+
+IX_NAMESPACES = ("http://www.xbrl.org/2013/inlineXBRL",
+                 "http://www.xbrl.org/2008/inlineXBRL")
+
+XSI_NIL = "{http://www.w3.org/2001/XMLSchema-instance}nil"
+
+MONTHS = dict((month, number + 1) for number, month in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun",
+     "jul", "aug", "sep", "oct", "nov", "dec")))
+
+NUMBER_WORDS = dict((word, number) for number, word in enumerate(
+    ("zero one two three four five six seven eight nine ten eleven twelve "
+     "thirteen fourteen fifteen sixteen seventeen eighteen nineteen")
+    .split()))
+NUMBER_WORDS.update((word, (number + 2) * 10) for number, word in enumerate(
+    "twenty thirty forty fifty sixty seventy eighty ninety".split()))
+NUMBER_WORDS.update(no=0, none=0)
+SCALE_WORDS = {"hundred": 100, "thousand": 10 ** 3, "million": 10 ** 6,
+               "billion": 10 ** 9, "trillion": 10 ** 12}
+
+WORDS_RE = re.compile(r"[a-z]+")
+DATE_TOKENS_RE = re.compile(r"[^\W\d_]+|\d+", re.UNICODE)
+NUMBER_RE = re.compile(r"\d+")
+
+# rules taking 0 whatever the text, usually a dash
+ZERO_FORMATS = ("zerodash", "numdash", "fixedzero")
+# rules with a comma as the decimal separator
+COMMA_FORMATS = ("numcommadecimal", "numdotcomma", "numspacecomma")
+
+
+def format_name(format):
+    """
+    Returns the local name of a transformation rule, e.g. numdotdecimal
+    for ixt:num-dot-decimal.
+    """
+    return format.rpartition(":")[2].replace("-", "").lower()
+
+
+def words_number(text):
+    """ Reads an english number in words, e.g. 'twenty five', or None """
+    total = 0
+    current = 0
+    words = WORDS_RE.findall(text.lower())
+    if not words:
+        return None
+    for word in words:
+        if word in NUMBER_WORDS:
+            current += NUMBER_WORDS[word]
+        elif word == "hundred":
+            current = max(current, 1) * 100
+        elif word in SCALE_WORDS:
+            total += max(current, 1) * SCALE_WORDS[word]
+            current = 0
+        elif word != "and":
+            return None
+    return total + current
+
+
+def ix_number(text, format=None, scale=None, sign=None):
+    """
+    Returns the value of an ix:nonFraction as a plain decimal string with
+    its scale and sign applied, e.g. '-1234000' for '(1,234)' with scale
+    3 and sign '-', or None when the text can't be read.
+    """
+    rule = format_name(format) if format else "numdotdecimal"
+    text = text.strip()
+    if rule in ZERO_FORMATS or text in ("-", u"–", u"—"):
+        number = "0"
+    elif rule.startswith("numword"):
+        number = words_number(text)
+        if number is None:
+            return None
+        number = str(number)
+    elif rule == "numunitdecimal":
+        # whole and fractional units, e.g. 5 dollars and 25 cents
+        parts = NUMBER_RE.findall(text)
+        if not parts:
+            return None
+        number = parts[0] + ("." + parts[1] if len(parts) > 1 else "")
+    else:
+        separator = "," if rule in COMMA_FORMATS else "."
+        number = "".join(char for char in text
+                         if char.isdigit() or char == separator)
+        number = number.replace(separator, ".")
+
+    try:
+        value = Decimal(number)
+    except InvalidOperation:
+        return None
+    if scale:
+        try:
+            value = value.scaleb(int(scale))
+        except ValueError:
+            pass
+    if sign == "-":
+        value = -value
+    return format_decimal(value)
+
+
+def format_decimal(value):
+    """ Returns a Decimal as a string without an exponent """
+    text = "{0:f}".format(value)
+    return text[1:] if text.startswith("-") and not text.strip("-0.") \
+        else text
+
+
+def ix_date(text, rule):
+    """
+    Returns a date in the order of a date rule, e.g. datemonthdayyearen
+    for 'December 31, 2013', as yyyy-mm-dd, or None when it can't be read.
+    """
+    # e.g. datedaymonthnameyearen reads like datedaymonthyearen
+    rule = rule.replace("name", "")
+    if "monthdayyear" in rule or rule.endswith("us"):
+        order = ("month", "day", "year")
+    elif "daymonthyear" in rule or rule.endswith(("uk", "eu")):
+        order = ("day", "month", "year")
+    elif "yearmonthday" in rule:
+        order = ("year", "month", "day")
+    elif "monthyear" in rule:
+        order = ("month", "year")
+    elif "yearmonth" in rule:
+        order = ("year", "month")
+    else:
+        return None
+
+    parts = {}
+    numbers = []
+    for token in DATE_TOKENS_RE.findall(text):
+        if token.isdigit():
+            numbers.append(int(token))
+        elif token[:3].lower() in MONTHS:
+            parts["month"] = MONTHS[token[:3].lower()]
+    for part in order:
+        if part not in parts:
+            if not numbers:
+                return None
+            parts[part] = numbers.pop(0)
+
+    year = parts["year"]
+    if year < 100:
+        year += 2000
+    if not (1 <= parts["month"] <= 12 and 1 <= parts.get("day", 1) <= 31):
+        return None
+    if "day" not in parts:
+        return "%04d-%02d" % (year, parts["month"])
+    return "%04d-%02d-%02d" % (year, parts["month"], parts["day"])
+
+
+def ix_text(text, format=None):
+    """
+    Returns the value of an ix:nonNumeric, applying its date and boolean
+    transformation rules. Text under other rules is kept as it is.
+    """
+    if not format:
+        return text
+    rule = format_name(format)
+    if rule.startswith("date"):
+        date = ix_date(text, rule)
+        return date if date is not None else text
+    if rule in ("booleanfalse", "fixedfalse"):
+        return "false"
+    if rule in ("booleantrue", "fixedtrue"):
+        return "true"
+    if rule in ("fixedempty", "nocontent"):
+        return ""
+    return text
@@ -1,15 +1,21 @@
+import os
 import re
+import mmap
+import datetime
+import six
+from array import array
+from operator import attrgetter
+
+from collections import namedtuple
+from decimal import Decimal
+
+from xbrl.cache import Memo
 
 try:
     from collections import OrderedDict
 except ImportError:
     from ordereddict import OrderedDict
 
-try:
-    from io import StringIO
-except ImportError:
-    from StringIO import StringIO
-
 
 class XBRLFile(object):
     def __init__(self, fh):
@@ -20,52 +26,818 @@ class XBRLFile(object):
         self.fh = fh
 
 
+# tags as seen by the repair pass, for str and bytes documents
+TAG_PATTERN = r'(?i)<(/|\?)?([a-z0-9_\.\-:]+)([^<>]*)>'
+SIMPLE_TAG_PATTERN = r'(?i)[a-z0-9_\.]+$'
+TAG_RE = re.compile(TAG_PATTERN)
+SIMPLE_TAG_RE = re.compile(SIMPLE_TAG_PATTERN)
+BYTES_TAG_RE = re.compile(TAG_PATTERN.encode('ascii'))
+BYTES_SIMPLE_TAG_RE = re.compile(SIMPLE_TAG_PATTERN.encode('ascii'))
+
+CHUNK_SIZE = 65536
+
+
+def is_well_formed(chunks):
+    """
+    Check if an iterable of str or bytes chunks is well-formed XML without
+    building a tree. Returns False when lxml is not available.
+    """
+    try:
+        from lxml import etree
+    except ImportError:
+        return False
+
+    class _NullTarget(object):
+        def close(self):
+            return None
+
+    parser = etree.XMLParser(target=_NullTarget())
+    try:
+        empty = True
+        for chunk in chunks:
+            if chunk:
+                empty = False
+                parser.feed(chunk)
+        if empty:
+            return False
+        parser.close()
+    except etree.XMLSyntaxError:
+        return False
+    return True
+
+
+def _close_bytes_tag(name):
+    return b"</" + name + b">"
+
+
+def _close_text_tag(name):
+    return "</" + name + ">"
+
+
+def _mapped_pieces(mapping, start, end):
+    """ Copies a slice of a memory map a chunk at a time """
+    for offset in range(start, end, CHUNK_SIZE):
+        yield mapping[offset:min(offset + CHUNK_SIZE, end)]
+
+
+def _pieces(xbrl_string, start, end):
+    return (xbrl_string[start:end],)
+
+
+def repair_chunks(xbrl_string):
+    """
+    Yields a str or bytes document in chunks with every simple open tag
+    that is never closed anywhere in the document closed before the next
+    tag. Tags are found in a single linear scan.
+
+    The document can also be an mmap, which is scanned in place and only
+    copied a chunk at a time.
+    """
+    if isinstance(xbrl_string, mmap.mmap):
+        pieces = _mapped_pieces
+    else:
+        pieces = _pieces
+
+    if not isinstance(xbrl_string, six.text_type):
+        tag_re, simple_tag_re = BYTES_TAG_RE, BYTES_SIMPLE_TAG_RE
+        close_tag = _close_bytes_tag
+    else:
+        tag_re, simple_tag_re = TAG_RE, SIMPLE_TAG_RE
+        close_tag = _close_text_tag
+
+    # closing tags act as hints, open tags are candidates to be closed
+    # before whatever tag follows them
+    closing_tags = set()
+    candidates = []
+    last_open_tag = None
+    for match in tag_re.finditer(xbrl_string):
+        if last_open_tag is not None:
+            candidates.append((match.start(), last_open_tag))
+            last_open_tag = None
+        kind, tag_name, rest = match.groups()
+        if kind is None and not rest and simple_tag_re.match(tag_name):
+            last_open_tag = tag_name
+        elif kind is not None and kind[:1] in ("/", b"/"):
+            closing_tags.add(tag_name.upper())
+
+    last = 0
+    for position, tag_name in candidates:
+        if tag_name.upper() in closing_tags:
+            continue
+        for piece in pieces(xbrl_string, last, position):
+            yield piece
+        yield close_tag(tag_name)
+        last = position
+    for piece in pieces(xbrl_string, last, len(xbrl_string)):
+        yield piece
+
+
+class ChunkedFile(object):
+    """
+    Read-only file-like object over an iterable of str or bytes chunks.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.pending = None
+
+    def read(self, size=-1):
+        data = [] if self.pending is None else [self.pending]
+        length = sum(len(chunk) for chunk in data)
+        for chunk in self.chunks:
+            data.append(chunk)
+            length += len(chunk)
+            if size is not None and 0 <= size <= length:
+                break
+
+        self.pending = None
+        if not data:
+            return ""
+        data = data[0][:0].join(data)
+        if size is not None and 0 <= size < len(data):
+            data, self.pending = data[:size], data[size:]
+        return data
+
+    def close(self):
+        self.chunks = iter(())
+        self.pending = None
+
+
+class MappedFile(object):
+    """
+    Read-only binary file over a memory map of a path. Reads copy only the
+    bytes asked for, and the mapping itself can be scanned in place.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        if os.fstat(self.file.fileno()).st_size:
+            self.mapping = mmap.mmap(self.file.fileno(), 0,
+                                     access=mmap.ACCESS_READ)
+        else:
+            # an empty file can't be mapped
+            self.mapping = b""
+        self.position = 0
+
+    def read(self, size=-1):
+        start = self.position
+        if size is None or size < 0:
+            end = len(self.mapping)
+        else:
+            end = min(start + size, len(self.mapping))
+        self.position = max(start, end)
+        return self.mapping[start:end]
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += len(self.mapping)
+        self.position = max(0, offset)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        if isinstance(self.mapping, mmap.mmap):
+            self.mapping.close()
+        self.mapping = b""
+        self.file.close()
+
+
 # Preprocessing to fix broken XML
 # TODO - Run tests to see if other XML processing errors can occur
 class XBRLPreprocessedFile(XBRLFile):
     def __init__(self, fh):
         super(XBRLPreprocessedFile, self).__init__(fh)
+        self.repaired = False
 
         if self.fh is None:
             return
 
-        xbrl_string = self.fh.read()
-
-        # find all closing tags as hints
-        closing_tags = [t.upper() for t in re.findall(r'(?i)</([a-z0-9_\.]+)>',
-                        xbrl_string)]
+        # most instances are already well-formed and need no repair, so
+        # check that first while streaming from the file when we can
+        seekable = getattr(self.fh, 'seekable', None)
+        if seekable is not None and seekable():
+            start = self.fh.tell()
+            chunks = iter(lambda: self.fh.read(CHUNK_SIZE), self.fh.read(0))
+            well_formed = is_well_formed(chunks)
+            self.fh.seek(start)
+            if well_formed:
+                return
+            # repair a memory map in place rather than reading it all
+            xbrl_string = getattr(self.fh, 'mapping', None)
+            if not isinstance(xbrl_string, mmap.mmap) or start:
+                xbrl_string = self.fh.read()
+        else:
+            xbrl_string = self.fh.read()
+            if is_well_formed([xbrl_string]):
+                self.fh = ChunkedFile([xbrl_string])
+                return
 
         # close all tags that don't have closing tags and
         # leave all other data intact
-        last_open_tag = None
-        tokens = re.split(r'(?i)(</?[a-z0-9_\.]+>)', xbrl_string)
-        new_fh = StringIO()
-        for idx, token in enumerate(tokens):
-            is_closing_tag = token.startswith('</')
-            is_processing_tag = token.startswith('<?')
-            is_cdata = token.startswith('<!')
-            is_tag = token.startswith('<') and not is_cdata
-            is_open_tag = is_tag and not is_closing_tag \
-                and not is_processing_tag
-            if is_tag:
-                if last_open_tag is not None:
-                    new_fh.write("</%s>" % last_open_tag)
-                    last_open_tag = None
-            if is_open_tag:
-                tag_name = re.findall(r'(?i)<*>', token)[0]
-                if tag_name.upper() not in closing_tags:
-                    last_open_tag = tag_name
-            new_fh.write(token)
-        new_fh.seek(0)
-        self.fh = new_fh
+        self.fh = ChunkedFile(repair_chunks(xbrl_string))
+        self.repaired = True
+
+
+# (pattern, concept name) -> whether it matched, shared by every document
+# since the same concept names recur across filings
+NAME_MATCHES = Memo(2 ** 17)
+
+
+class FactIndex(object):
+    """
+    Index of the elements of an XBRL document, built in one traversal.
+
+    Elements are keyed by their lowercased name and grouped by contextref,
+    so looking up a concept is a dictionary probe or a regex match over the
+    distinct names rather than a walk over the whole tree.
+    """
+
+    def __init__(self, elements=()):
+        # name -> [(position, element)] in document order
+        self.elements = OrderedDict()
+        # name -> {contextref: [(position, element)]}
+        self.contexts = {}
+        self.count = 0
+        self._names = {}
+        # id(element) -> FactValue, as floats and as Decimals
+        self._values = ({}, {})
+        for position, element in enumerate(elements):
+            self.add(position, element)
+
+    def __reduce__(self):
+        # the groupings are rebuilt on load, only the elements are stored
+        return (FactIndex, (list(self),))
+
+    def __iter__(self):
+        """
+        Iterates over every element in document order.
+        """
+        entries = sorted(entry for group in self.elements.values()
+                         for entry in group)
+        return iter([element for _, element in entries])
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, name):
+        return name in self.elements
+
+    def add(self, position, element):
+        name = element.name.lower()
+        entry = (position, element)
+        if name not in self.elements:
+            self.elements[name] = []
+            self.contexts[name] = {}
+            self._names.clear()
+        self.elements[name].append(entry)
+        self.count += 1
+        self.contexts[name].setdefault(element.attrs.get('contextref'),
+                                       []).append(entry)
+
+    def names(self, pattern):
+        """
+        Returns the distinct element names matched by a regex pattern.
+        """
+        names = self._names.get(pattern)
+        if names is None:
+            regex = None
+            names = []
+            for name in self.elements:
+                key = (pattern, name)
+                matched = NAME_MATCHES.get(key)
+                if matched is None:
+                    if regex is None:
+                        regex = re.compile(pattern,
+                                           re.IGNORECASE | re.MULTILINE)
+                    matched = regex.search(name) is not None
+                    NAME_MATCHES.set(key, matched)
+                if matched:
+                    names.append(name)
+            self._names[pattern] = names
+        return names
+
+    def get(self, name):
+        """
+        Returns all elements with exactly this name in document order.
+        """
+        return [element for _, element in self.elements.get(name, [])]
+
+    def find(self, pattern, context_ids=None):
+        """
+        Returns the elements whose name matches a regex pattern in document
+        order, optionally restricted to the given contextrefs.
+        """
+        return self.select(self.names(pattern), context_ids)
+
+    def select(self, names, context_ids=None):
+        """
+        Returns the elements with any of the given names in document order,
+        optionally restricted to the given contextrefs.
+        """
+        groups = []
+        if context_ids is None:
+            for name in names:
+                groups.append(self.elements[name])
+        else:
+            context_ids = set(context_ids)
+            for name in names:
+                by_context = self.contexts[name]
+                for context_id in context_ids:
+                    if context_id in by_context:
+                        groups.append(by_context[context_id])
+
+        if len(groups) == 1:
+            entries = groups[0]
+        else:
+            entries = sorted(entry for group in groups for entry in group)
+        return [element for _, element in entries]
+
+    def value(self, element, decimal=False):
+        """
+        Returns the FactValue of an element, decoding it the first time.
+        """
+        values = self._values[bool(decimal)]
+        value = values.get(id(element))
+        if value is None:
+            value = decode_value(element.text, element.attrs, decimal)
+            # keep the element so its id is not reused by another one
+            values[id(element)] = (value, element)
+            return value
+        return value[0]
+
+    def first(self, pattern):
+        """
+        Returns the first element whose name matches a regex pattern.
+        """
+        entries = [self.elements[name][0] for name in self.names(pattern)]
+        if not entries:
+            return None
+        return min(entries)[1]
+
+
+class Fact(object):
+    """
+    Compact record of a single element collected by the streaming engine.
+    It mirrors the name, text and attrs of the equivalent soup tag.
+    """
+    __slots__ = ('name', 'text', 'attrs')
+
+    def __init__(self, name, text='', attrs=None):
+        self.name = name
+        self.text = text
+        self.attrs = attrs if attrs is not None else {}
+
+    def __reduce__(self):
+        return (Fact, (self.name, self.text, self.attrs))
+
+    def __repr__(self):
+        return "<Fact %s %r>" % (self.name, self.text)
+
+
+INF = float("inf")
+
+NON_ASCII_RE = re.compile(u'[^\x00-\x7f]+')
+
+
+def parse_decimals(text):
+    """
+    Read a decimals or precision attribute as an int or INF, None when it
+    is missing or not valid.
+    """
+    if text is None:
+        return None
+    if text == "INF":
+        return INF
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+
+class FactValue(object):
+    """
+    The value of a fact, decoded once from its text and attributes.
+
+    number is the text as a float, or a Decimal, with the scale and sign
+    attributes applied, None when the text is not a number. decimals and
+    precision are ints, INF or None. value is what data_processing gives
+    for the fact, its text trimmed by decimals characters the way
+    XBRLParser.trim_decimals does, and error what reading it raised.
+    """
+    __slots__ = ('number', 'decimals', 'precision', 'value', 'error')
+
+    def __init__(self, number=None, decimals=None, precision=None, value=0,
+                 error=None):
+        self.number = number
+        self.decimals = decimals
+        self.precision = precision
+        self.value = value
+        self.error = error
+
+    def __repr__(self):
+        return "<FactValue %r>" % (self.number,)
+
+
+def decode_value(text, attrs, decimal=False):
+    """
+    Takes the text and attrs of a fact returns its FactValue, with Decimal
+    numbers when decimal is set.
+    """
+    convert = Decimal if decimal else float
+    value = FactValue(decimals=parse_decimals(attrs.get('decimals')),
+                      precision=parse_decimals(attrs.get('precision')))
+    try:
+        number = convert(text)
+    except (ValueError, ArithmeticError):
+        # data_processing takes a fact that is not a number as 0
+        return value
+
+    try:
+        # the same steps as trim_decimals, without re-encoding ascii text
+        places = attrs['decimals']
+        places = 0 if places == "INF" else int(places)
+        trimmed = NON_ASCII_RE.sub(u'', text)
+        if places != 0:
+            trimmed = trimmed[:places]
+        value.value = convert(trimmed) if len(trimmed) > 0 else 0
+    except Exception as e:
+        value.value = None
+        value.error = e
+
+    scale = attrs.get('scale')
+    if scale:
+        try:
+            scale = int(scale)
+        except ValueError:
+            scale = 0
+        if decimal:
+            number = number.scaleb(scale)
+        else:
+            number *= 10.0 ** scale
+    if attrs.get('sign') == "-":
+        number = -number
+    value.number = number
+    return value
+
+
+DATE_DIGITS_RE = re.compile(r'[^\d]+')
+
+
+def date_ordinal(text):
+    """
+    Convert a date as written in a context (2013-12-31, 2013-12-31T00:00)
+    to a proleptic Gregorian ordinal, or None if it can't be read.
+    """
+    if text is None:
+        return None
+    try:
+        return datetime.datetime.strptime(DATE_DIGITS_RE.sub('', text)[:8],
+                                          "%Y%m%d").toordinal()
+    except ValueError:
+        return None
+
+
+class Context(object):
+    """
+    An XBRL context. entity is the identifier text, or None when the
+    context has no entity element at all. start, end and instant are date
+    ordinals, segment is True for dimensional contexts.
+
+    dimensions are the (axis, member) pairs of its explicit and typed
+    members in document order. Axes and explicit members are lowercased
+    names like the concepts, a typed member is its stripped text.
+    """
+    __slots__ = ('id', 'entity', 'segment', 'start', 'end', 'instant',
+                 'dimensions')
+
+    def __init__(self, id, entity=None, segment=False, start=None,
+                 end=None, instant=None, dimensions=()):
+        self.id = id
+        self.entity = entity
+        self.segment = segment
+        self.start = start
+        self.end = end
+        self.instant = instant
+        self.dimensions = tuple(dimensions)
+
+    def __reduce__(self):
+        return (Context, (self.id, self.entity, self.segment, self.start,
+                          self.end, self.instant, self.dimensions))
+
+    @property
+    def duration(self):
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+    def __repr__(self):
+        return "<Context %s>" % self.id
+
+
+class Period(namedtuple('Period', ['start', 'end'])):
+    """
+    A reporting period as datetime.date values, start is None for an
+    instant.
+    """
+    __slots__ = ()
+
+    @property
+    def instant(self):
+        return self.start is None
+
+    @property
+    def days(self):
+        return 0 if self.start is None else (self.end - self.start).days
+
+    @classmethod
+    def from_context(cls, context):
+        """
+        Returns the Period of a Context, or None if it has no dates.
+        """
+        if context.instant is not None:
+            return cls(None, datetime.date.fromordinal(context.instant))
+        if context.duration is not None:
+            return cls(datetime.date.fromordinal(context.start),
+                       datetime.date.fromordinal(context.end))
+        return None
+
+
+class ContextTable(object):
+    """
+    All contexts of a document, indexed by end date (the instant for
+    instant contexts), by duration in days and by (axis, member) so that
+    selecting the contexts for a period or a dimension is a lookup.
+    """
+
+    def __init__(self, contexts=()):
+        self.contexts = OrderedDict()
+        self.by_end_date = {}
+        self.by_duration = {}
+        # (axis, member) -> [context], axis -> [context],
+        # axis -> {member: [context]}
+        self.by_dimension = {}
+        self.by_axis = {}
+        self.members_by_axis = {}
+        for context in contexts:
+            self.add(context)
+
+    def __reduce__(self):
+        return (ContextTable, (list(self),))
+
+    def __iter__(self):
+        return iter(self.contexts.values())
+
+    def __len__(self):
+        return len(self.contexts)
+
+    def __getitem__(self, context_id):
+        return self.contexts[context_id]
+
+    def add(self, context):
+        self.contexts[context.id] = context
+        end = context.instant if context.instant is not None else context.end
+        if end is not None:
+            self.by_end_date.setdefault(end, []).append(context)
+        if context.duration is not None:
+            self.by_duration.setdefault(context.duration, []).append(context)
+        for dimension in context.dimensions:
+            self.by_dimension.setdefault(dimension, []).append(context)
+            self.by_axis.setdefault(dimension[0], []).append(context)
+            self.members_by_axis.setdefault(dimension[0], OrderedDict()) \
+                .setdefault(dimension[1], []).append(context)
+
+    def select(self, end_date, durations=(), segments=False):
+        """
+        Returns the ids of the contexts that are instants on end_date or
+        that end on end_date and last one of durations days, in document
+        order. Contexts without an entity are never selected, dimensional
+        ones only when segments is True.
+        """
+        durations = set(durations)
+        context_ids = []
+        for context in self.by_end_date.get(end_date, ()):
+            if context.entity is None or (context.segment and not segments):
+                continue
+            if context.instant == end_date or \
+                    context.duration in durations:
+                context_ids.append(context.id)
+        return context_ids
+
+    def dimension(self, axis, member=None):
+        """
+        Returns the contexts with a member on axis, or with exactly this
+        member, in document order.
+        """
+        axis = axis.lower()
+        if member is not None:
+            # explicit members are lowercased, typed ones are not
+            contexts = self.by_dimension.get((axis, member)) or \
+                self.by_dimension.get((axis, member.lower()), ())
+            return list(contexts)
+        return list(self.by_axis.get(axis, ()))
+
+    def members(self, axis, only=True):
+        """
+        Returns an OrderedDict of every member of axis to the ids of its
+        contexts. With only, contexts that also have members on other axes
+        are left out, so the members break down the undimensioned total.
+        """
+        members = OrderedDict()
+        for member, contexts in \
+                self.members_by_axis.get(axis.lower(), {}).items():
+            context_ids = [context.id for context in contexts
+                           if not only or len(context.dimensions) == 1]
+            if context_ids:
+                members[member] = context_ids
+        return members
+
+
+class Unit(object):
+    """
+    An XBRL unit, as the measures of its numerator and denominator.
+    """
+    __slots__ = ('id', 'numerator', 'denominator')
+
+    def __init__(self, id, numerator=(), denominator=()):
+        self.id = id
+        self.numerator = tuple(numerator)
+        self.denominator = tuple(denominator)
+
+    def __reduce__(self):
+        return (Unit, (self.id, self.numerator, self.denominator))
+
+    def __repr__(self):
+        return "<Unit %s>" % self.id
 
 
 class XBRL(object):
+    """
+    Compact parsed XBRL document, made of Fact, Context and Unit records
+    instead of a tree. It is cheap to pickle, so it can be handed between
+    processes or cached on disk.
+    """
+    __slots__ = ('fact_index', 'context_table', 'units')
+
+    def __init__(self, fact_index=None, context_table=None, units=None):
+        self.fact_index = fact_index if fact_index is not None \
+            else FactIndex()
+        self.context_table = context_table if context_table is not None \
+            else ContextTable()
+        self.units = units if units is not None else OrderedDict()
+
+    def __reduce__(self):
+        return (XBRL, (self.fact_index, self.context_table, self.units))
+
     def __str__(self):
         return ""
 
+
+def date_number(ordinal):
+    """
+    Takes a date ordinal and returns it as an int like 20131231, 0 for
+    None.
+    """
+    if ordinal is None:
+        return 0
+    date = datetime.date.fromordinal(ordinal)
+    return date.year * 10000 + date.month * 100 + date.day
+
+
+class FactTable(object):
+    """
+    Numeric facts of a document as typed columns, one row per fact.
+
+    concept, context and unit are indexes into the concepts, contexts and
+    units name lists. Facts without a unitref are not numeric and are left
+    out. start and end are ints like 20131231, an instant has start 0.
+    decimals is inf for INF and nan when missing. dimensional is 1 for
+    facts in contexts with segments.
+
+    Rows are grouped by concept, in document order within a concept.
+    """
+
+    # column -> (array typecode, numpy dtype)
+    COLUMNS = OrderedDict([
+        ("concept", ("i", "i4")),
+        ("context", ("i", "i4")),
+        ("start", ("i", "i4")),
+        ("end", ("i", "i4")),
+        ("unit", ("i", "i4")),
+        ("decimals", ("d", "f8")),
+        ("value", ("d", "f8")),
+        ("dimensional", ("b", "i1")),
+    ])
+
+    def __init__(self):
+        self.concepts = []
+        self.contexts = []
+        self.units = []
+        self.columns = OrderedDict((name, array(typecode))
+                                   for name, (typecode, _)
+                                   in self.COLUMNS.items())
+
+    def __len__(self):
+        return len(self.columns["value"])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def rows(self):
+        """
+        Iterates over the facts as (concept, context, start, end, unit,
+        decimals, value, dimensional) tuples with the names filled in.
+        """
+        units = self.units
+        for row in zip(*self.columns.values()):
+            row = list(row)
+            row[0] = self.concepts[row[0]]
+            row[1] = self.contexts[row[1]]
+            row[4] = units[row[4]] if row[4] >= 0 else None
+            yield tuple(row)
+
+    def to_numpy(self):
+        """
+        Returns the facts as a NumPy structured array, needs numpy.
+        """
+        import numpy
+        table = numpy.empty(len(self), dtype=[
+            (name, dtype) for name, (_, dtype) in self.COLUMNS.items()])
+        for name, (_, dtype) in self.COLUMNS.items():
+            table[name] = numpy.frombuffer(self.columns[name],
+                                           dtype=self.columns[name].typecode)
+        return table
+
+    def to_dataframe(self):
+        """
+        Returns the facts as a pandas DataFrame, with concept, context and
+        unit as categoricals of their names. Needs pandas.
+        """
+        import numpy
+        import pandas
+        data = OrderedDict()
+        for name in self.COLUMNS:
+            data[name] = numpy.frombuffer(self.columns[name],
+                                          dtype=self.columns[name].typecode)
+        for name, names in (("concept", self.concepts),
+                            ("context", self.contexts),
+                            ("unit", self.units)):
+            data[name] = pandas.Categorical.from_codes(data[name], names)
+        data["dimensional"] = data["dimensional"].astype(bool)
+        return pandas.DataFrame(data)
+
+
+NAN = float("nan")
+
+
 # Base GAAP object
 class GAAP(object):
+    """
+    Values are kept in slots, a __dict__ is only made for attributes that
+    are not in FIELDS. to_tuple() and to_array() give the FIELDS in order,
+    from_tuple() and from_buffer() build a GAAP back from them.
+
+    derived lists the fields that were worked out from other fields rather
+    than read from the document, see DerivationRules.
+    """
+    FIELDS = ("assets", "current_assets", "non_current_assets",
+              "liabilities_and_equity", "liabilities", "current_liabilities",
+              "noncurrent_liabilities", "commitments_and_contingencies",
+              "redeemable_noncontrolling_interest", "temporary_equity",
+              "equity", "equity_attributable_interest",
+              "equity_attributable_parent", "stockholders_equity", "revenue",
+              "cost_of_revenue", "gross_profit", "costs_and_expenses",
+              "other_operating_income", "operating_income_loss",
+              "nonoperating_income_loss", "interest_and_debt_expense",
+              "income_before_equity_investments",
+              "income_from_equity_investments", "income_tax_expense_benefit",
+              "extraordary_items_gain_loss", "income_loss",
+              "net_income_shareholders", "preferred_stock_dividends",
+              "net_income_loss_noncontrolling", "net_income_parent",
+              "net_income_loss", "other_comprehensive_income",
+              "comprehensive_income", "comprehensive_income_parent",
+              "comprehensive_income_interest", "net_cash_flows_operating",
+              "net_cash_flows_investing", "net_cash_flows_financing",
+              "net_cash_flows_operating_continuing",
+              "net_cash_flows_investing_continuing",
+              "net_cash_flows_financing_continuing",
+              "net_cash_flows_operating_discontinued",
+              "net_cash_flows_investing_discontinued",
+              "net_cash_flows_discontinued", "common_shares_outstanding",
+              "common_shares_issued", "common_shares_authorized",
+              "operating_expenses", "revenues",
+              "income_continuing_operations_tax",
+              "income_discontinued_operations")
+    __slots__ = FIELDS + ("derived", "__dict__")
+
+    _values = attrgetter(*FIELDS)
+
     def __init__(self,
                  assets=0.0,
                  current_assets=0.0,
@@ -114,14 +886,18 @@ class GAAP(object):
                  net_cash_flows_discontinued=0.0,
                  common_shares_outstanding=0.0,
                  common_shares_issued=0.0,
-                 common_shares_authorized=0.0):
+                 common_shares_authorized=0.0,
+                 operating_expenses=0.0,
+                 revenues=0.0,
+                 income_continuing_operations_tax=0.0,
+                 income_discontinued_operations=0.0):
         self.assets = assets
         self.current_assets = current_assets
         self.non_current_assets = non_current_assets
         self.liabilities_and_equity = liabilities_and_equity
         self.liabilities = liabilities
         self.current_liabilities = current_liabilities
-        self.noncurrentLiabilities = noncurrent_liabilities
+        self.noncurrent_liabilities = noncurrent_liabilities
         self.commitments_and_contingencies = commitments_and_contingencies
         self.redeemable_noncontrolling_interest = \
             redeemable_noncontrolling_interest
@@ -135,13 +911,13 @@ class GAAP(object):
         self.gross_profit = gross_profit
         self.costs_and_expenses = costs_and_expenses
         self.other_operating_income = other_operating_income
+        self.operating_income_loss = operating_income_loss
         self.nonoperating_income_loss = nonoperating_income_loss
         self.interest_and_debt_expense = interest_and_debt_expense
         self.income_before_equity_investments = \
             income_before_equity_investments
         self.income_from_equity_investments = income_from_equity_investments
         self.income_tax_expense_benefit = income_tax_expense_benefit
-        self.net_income_shareholders = net_income_shareholders
         self.extraordary_items_gain_loss = extraordary_items_gain_loss
         self.income_loss = income_loss
         self.net_income_shareholders = net_income_shareholders
@@ -170,9 +946,77 @@ class GAAP(object):
         self.common_shares_outstanding = common_shares_outstanding
         self.common_shares_issued = common_shares_issued
         self.common_shares_authorized = common_shares_authorized
+        self.operating_expenses = operating_expenses
+        self.revenues = revenues
+        self.income_continuing_operations_tax = \
+            income_continuing_operations_tax
+        self.income_discontinued_operations = income_discontinued_operations
+        self.derived = ()
+
+    # older name of noncurrent_liabilities
+    @property
+    def noncurrentLiabilities(self):
+        return self.noncurrent_liabilities
+
+    @noncurrentLiabilities.setter
+    def noncurrentLiabilities(self, value):
+        self.noncurrent_liabilities = value
+
+    def __reduce__(self):
+        state = vars(self) or None
+        if self.derived:
+            # slot values go in the second half of the state
+            state = (state, {"derived": self.derived})
+        return (self.__class__, self.to_tuple(), state)
+
+    def to_tuple(self):
+        return self._values(self)
+
+    def to_array(self):
+        """
+        Returns the FIELDS as an array('d'), None becomes nan.
+        """
+        return array('d', [NAN if value is None else value
+                           for value in self._values(self)])
+
+    @classmethod
+    def from_tuple(cls, values):
+        return cls(*values)
+
+    @classmethod
+    def from_buffer(cls, buffer, index=0):
+        """
+        Takes an array('d') or a buffer of doubles holding rows of FIELDS,
+        e.g. to_array() of many objects joined together, and returns the
+        GAAP of the row at index.
+        """
+        size = len(cls.FIELDS)
+        if isinstance(buffer, array):
+            return cls(*buffer[index * size:(index + 1) * size])
+        view = memoryview(buffer)
+        if hasattr(view, "cast"):
+            view = view.cast("B")
+        itemsize = array('d').itemsize
+        values = array('d')
+        data = view[index * size * itemsize:
+                    (index + 1) * size * itemsize].tobytes()
+        if hasattr(values, "frombytes"):
+            values.frombytes(data)
+        else:
+            values.fromstring(data)
+        if len(values) != size:
+            raise IndexError("row %d is not in the buffer" % index)
+        return cls(*values)
+
 
 # Base DEI object
 class DEI(object):
+    FIELDS = ("trading_symbol", "company_name", "shares_outstanding",
+              "public_float")
+    __slots__ = FIELDS + ("__dict__",)
+
+    _values = attrgetter(*FIELDS)
+
     def __init__(self,
                  trading_symbol='',
                  company_name='',
@@ -183,6 +1027,16 @@ class DEI(object):
         self.shares_outstanding = shares_outstanding
         self.public_float = public_float
 
+    def __reduce__(self):
+        return (self.__class__, self.to_tuple(), vars(self) or None)
+
+    def to_tuple(self):
+        return self._values(self)
+
+    @classmethod
+    def from_tuple(cls, values):
+        return cls(*values)
+
 
 # Base Custom object
 class Custom(object):
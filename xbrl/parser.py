@@ -7,8 +7,42 @@ import six
 import logging
 import warnings
 
-from xbrl.model import XBRL, GAAP, DEI, Custom, XBRLPreprocessedFile
+from xbrl.model import XBRL, GAAP, DEI, Custom, XBRLPreprocessedFile, \
+    MappedFile, \
+    FactIndex, Fact, Context, ContextTable, Unit, Period, FactTable, \
+    date_ordinal, date_number
 from xbrl.serializers import GAAPSerializer, DEISerializer
+from xbrl.cache import ParseCache
+from xbrl.stats import ParseStats
+from xbrl.gaap import GAAP_CONCEPTS, GAAP_RULES
+from xbrl.ixbrl import IX_NAMESPACES, XSI_NIL, ix_number, ix_text
+from xbrl.archive import open_instance
+
+from io import BytesIO, StringIO
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+XBRLI_NS = "http://www.xbrl.org/2003/instance"
+XBRLDI_NS = "http://xbrl.org/2006/xbrldi"
+
+# xbrldi:explicitmember and xbrldi:typedmember soup tags
+MEMBER_RE = re.compile(r"(^|:)(explicit|typed)member$")
+
+ENGINES = ("soup", "iterparse", "ixbrl")
+
+# the ix elements ixbrl_maker reads, and those holding a fact's text
+IX_ELEMENTS = ("nonFraction", "nonNumeric", "continuation", "exclude")
+IX_FACTS = ("nonFraction", "nonNumeric", "continuation")
+# ix attributes already applied to a fact's text
+IX_ATTRS = ("name", "format", "scale", "sign", "continuedat", "escape",
+            "xsi:nil")
+
+# attribute values repeated across many facts, shared between them
+INTERNED_ATTRS = ("contextref", "unitref", "decimals", "precision")
+
 
 def soup_maker(fh):
     """ Takes a file handler returns BeautifulSoup"""
@@ -23,46 +57,621 @@ def soup_maker(fh):
     return soup
 
 
+def dimension(axis, member, typed=False):
+    """ Returns the (axis, member) pair of a context member """
+    member = member.strip()
+    return (axis.strip().lower(), member if typed else member.lower())
+
+
+def context_from_tag(context_tag, doc_root=""):
+    """ Takes a soup context tag returns a Context"""
+    identifier = None
+    segment = False
+    entity = context_tag.find(doc_root + "entity")
+    if entity is not None:
+        identifier_tag = entity.find(doc_root + "identifier")
+        identifier = identifier_tag.text if identifier_tag is not None \
+            else ""
+        segment = entity.find(doc_root + "segment") is not None
+
+    instant = context_tag.find(doc_root + "instant")
+    start_date = None
+    end_date = None
+    period = context_tag.find(doc_root + "period")
+    if period is not None:
+        start_date = period.find(doc_root + "startdate")
+        end_date = period.find(doc_root + "enddate")
+
+    dimensions = [dimension(member.attrs.get('dimension', ""),
+                            member.text,
+                            member.name.endswith("typedmember"))
+                  for member in context_tag.find_all(MEMBER_RE)]
+
+    return Context(context_tag.attrs.get('id'),
+                   entity=identifier,
+                   segment=segment,
+                   start=date_ordinal(start_date.text) if start_date
+                   else None,
+                   end=date_ordinal(end_date.text) if end_date else None,
+                   instant=date_ordinal(instant.text) if instant else None,
+                   dimensions=dimensions)
+
+
+def unit_from_tag(unit_tag, doc_root=""):
+    """ Takes a soup unit tag returns a Unit"""
+    def measure(tag):
+        return [m.text.strip() for m in tag.find_all(doc_root + "measure")
+                if m.text]
+
+    divide = unit_tag.find(doc_root + "divide")
+    if divide is not None:
+        numerator = divide.find(doc_root + "unitnumerator")
+        denominator = divide.find(doc_root + "unitdenominator")
+        return Unit(unit_tag.attrs.get('id'),
+                    measure(numerator) if numerator is not None else (),
+                    measure(denominator) if denominator is not None else ())
+    return Unit(unit_tag.attrs.get('id'), measure(unit_tag))
+
+
+def compact_maker(soup, context_table, doc_root=""):
+    """
+    Takes a BeautifulSoup returns an equivalent compact XBRL object.
+
+    Element names and repeated attribute values are interned. The root and
+    the tags wrapping it keep no text, as with the iterparse engine.
+    """
+    fact_index = XBRLParser.fact_index(soup)
+    intern = {}.setdefault
+
+    wrappers = set()
+    root = fact_index.first("xbrl*:*")
+    if root is not None:
+        wrappers.add(id(root))
+        wrappers.update(id(parent) for parent in root.parents)
+
+    facts = []
+    for tag in fact_index:
+        attrs = {}
+        for key, value in tag.attrs.items():
+            if isinstance(value, list):
+                value = " ".join(value)
+            attrs[intern(key, key)] = intern(value, value) \
+                if key in INTERNED_ATTRS else value
+        facts.append(Fact(intern(tag.name, tag.name),
+                          "" if id(tag) in wrappers else tag.text,
+                          attrs))
+
+    units = OrderedDict()
+    for unit_tag in fact_index.find("^" + doc_root + "unit$"):
+        unit = unit_from_tag(unit_tag, doc_root)
+        units[unit.id] = unit
+
+    return XBRL(FactIndex(facts), ContextTable(context_table), units)
+
+
+def stream_events(fh, chunk_size=65536):
+    """ Takes a file handler and yields lxml pull parser events"""
+    from lxml import etree
+
+    parser = etree.XMLPullParser(events=("start-ns", "start", "end"),
+                                 recover=True)
+    data = fh.read(chunk_size)
+    while data:
+        parser.feed(data)
+        for event in parser.read_events():
+            yield event
+        data = fh.read(chunk_size)
+    parser.close()
+    for event in parser.read_events():
+        yield event
+
+
+class ConceptSelector(object):
+    """
+    Tells which facts to keep from a list of concept name patterns, e.g.
+    ["^dei:", "^us-gaap:assets$"]. Text blocks are left out unless a
+    pattern mentions them. Elements that are not facts, having no
+    contextref, are always kept.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.regexes = [re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+                        for pattern in self.patterns]
+        self.textblocks = any("textblock" in pattern.lower()
+                              for pattern in self.patterns)
+        self.selected = {}
+
+    def __reduce__(self):
+        return (ConceptSelector, (self.patterns,))
+
+    def __call__(self, name):
+        """ Takes a lowercased concept name """
+        keep = self.selected.get(name)
+        if keep is None:
+            keep = (self.textblocks or "textblock" not in name) and \
+                any(regex.search(name) for regex in self.regexes)
+            self.selected[name] = keep
+        return keep
+
+    def keeps(self, element):
+        return element.attrs.get('contextref') is None or \
+            self(element.name)
+
+
+class StreamReader(object):
+    """
+    Reads the name, text and attrs of lxml elements the way they are
+    recorded in Facts, sharing names and repeated values between them.
+    """
+
+    # soup names go through libxml2's HTML parser, which cuts them at
+    # 100 characters, and BeautifulSoup collapses whitespace-only strings;
+    # do the same so both engines give identical results
+
+    def __init__(self):
+        # namespace uri -> the first prefix it was declared with
+        self.prefixes = {}
+        self.names = {}
+        self.intern = {}.setdefault
+
+    def name(self, element):
+        key = (element.tag, element.prefix)
+        name = self.names.get(key)
+        if name is None:
+            local = element.tag.rpartition("}")[2]
+            if element.prefix:
+                local = element.prefix + ":" + local
+            name = local.lower()[:100]
+            name = self.names[key] = self.intern(name, name)
+        return name
+
+    def text(self, element):
+        chunks = []
+        for chunk in element.itertext():
+            if chunk and not chunk.strip(" \n\t\f\r"):
+                chunk = "\n" if "\n" in chunk else " "
+            chunks.append(chunk)
+        return "".join(chunks)
+
+    def attrs(self, element, skip=()):
+        intern = self.intern
+        attrs = {}
+        for key, value in element.attrib.items():
+            if key[0] == "{":
+                uri, _, key = key[1:].partition("}")
+                if self.prefixes.get(uri):
+                    key = self.prefixes[uri] + ":" + key
+            key = key.lower()
+            if key in skip:
+                continue
+            attrs[intern(key, key)] = intern(value, value) \
+                if key in INTERNED_ATTRS else value
+        return attrs
+
+
+def stream_maker(fh, select=None):
+    """
+    Takes a file handler returns an XBRL object without building a tree.
+
+    The instance is streamed with lxml and every top level element is
+    turned into compact Fact, Context and Unit records and then cleared,
+    so memory stays bounded by the largest single fact.
+
+    :param select: A ConceptSelector, facts it leaves out are dropped as
+        soon as they end without making any records.
+    """
+    from lxml import etree
+
+    xbrl = XBRL()
+    fact_index = xbrl.fact_index
+    reader = StreamReader()
+    prefixes = reader.prefixes
+    element_name = reader.name
+    element_text = reader.text
+    element_attrs = reader.attrs
+    position = 0
+    depth = 0
+    skipping = None
+
+    try:
+        for event, element in stream_events(fh):
+            if event == "start-ns":
+                prefixes.setdefault(element[1], element[0])
+                continue
+
+            if event == "start":
+                if depth == 0:
+                    fact_index.add(position, Fact(element_name(element), "",
+                                                  element_attrs(element)))
+                    position += 1
+                elif depth == 1 and select is not None and \
+                        (element.get("contextRef") is not None or
+                         element.get("contextref") is not None) and \
+                        not select(element_name(element)):
+                    skipping = element
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth != 1:
+                continue
+
+            if element is skipping:
+                skipping = None
+                element.clear()
+                continue
+
+            for child in element.iter(etree.Element):
+                fact_index.add(position, Fact(element_name(child),
+                                              element_text(child),
+                                              element_attrs(child)))
+                position += 1
+
+            if element.tag == "{%s}context" % XBRLI_NS:
+                xbrl.context_table.add(stream_context(element))
+            elif element.tag == "{%s}unit" % XBRLI_NS:
+                unit = stream_unit(element)
+                xbrl.units[unit.id] = unit
+
+            # drop what we have recorded to keep memory flat
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    except etree.XMLSyntaxError as e:
+        if position > 0:
+            raise XBRLParserException(str(e))
+
+    return xbrl
+
+
+def ixbrl_maker(fh, select=None):
+    """
+    Takes a file handler of an Inline XBRL (XHTML) document returns an
+    XBRL object without building a tree.
+
+    ix:nonFraction and ix:nonNumeric facts become Facts holding the value
+    an XBRL instance would, with their format, scale and sign applied and
+    the text of their ix:continuation elements joined on. Text blocks keep
+    their text, not their markup. Contexts and units are read from the
+    ix:resources. As with stream_maker, elements are cleared as soon as
+    they are read unless they are part of a fact, so memory stays bounded
+    by the largest fact rather than the document.
+
+    :param select: A ConceptSelector, facts it leaves out make no records.
+    """
+    from lxml import etree
+
+    xbrl = XBRL()
+    fact_index = xbrl.fact_index
+    reader = StreamReader()
+    intern = reader.intern
+    kinds = dict(("{%s}%s" % (ns, kind), kind) for ns in IX_NAMESPACES
+                 for kind in IX_ELEMENTS)
+    context_tag = "{%s}context" % XBRLI_NS
+    unit_tag = "{%s}unit" % XBRLI_NS
+    position = 0
+    # facts, continuations, contexts and units being read, their
+    # elements are kept until they end
+    keeping = 0
+    # continuation id -> (text, continuedat)
+    continuations = {}
+    # (fact, continuedat, format) of the facts continued elsewhere
+    continued = []
+
+    def fact_text(element):
+        # the text of an element, leaving out ix:exclude
+        chunks = [element.text or ""]
+        for child in element:
+            if isinstance(child.tag, six.string_types) and \
+                    kinds.get(child.tag) != "exclude":
+                chunks.append(fact_text(child))
+            chunks.append(child.tail or "")
+        return "".join(chunks)
+
+    try:
+        for event, element in stream_events(fh):
+            if event == "start-ns":
+                reader.prefixes.setdefault(element[1], element[0])
+                continue
+
+            kind = kinds.get(element.tag)
+            resource = element.tag == context_tag or element.tag == unit_tag
+            if event == "start":
+                if kind in IX_FACTS or resource:
+                    keeping += 1
+                continue
+
+            if kind in IX_FACTS or resource:
+                keeping -= 1
+
+            if kind in IX_FACTS:
+                name = (element.get("name") or "").lower()[:100]
+                if kind == "continuation":
+                    continuations[element.get("id")] = \
+                        (fact_text(element), element.get("continuedAt"))
+                elif name and (select is None or select(name)):
+                    format = element.get("format")
+                    if element.get(XSI_NIL) == "true":
+                        text = ""
+                    elif kind == "nonFraction":
+                        text = fact_text(element)
+                        number = ix_number(text, format,
+                                           element.get("scale"),
+                                           element.get("sign"))
+                        text = text.strip() if number is None else number
+                    elif element.get("continuedAt"):
+                        text = fact_text(element)
+                    else:
+                        text = ix_text(fact_text(element), format)
+                    fact = Fact(intern(name, name), text,
+                                reader.attrs(element, IX_ATTRS))
+                    fact_index.add(position, fact)
+                    position += 1
+                    if kind == "nonNumeric" and element.get("continuedAt"):
+                        continued.append((fact, element.get("continuedAt"),
+                                          format))
+            elif resource:
+                for child in element.iter(etree.Element):
+                    fact_index.add(position, Fact(reader.name(child),
+                                                  reader.text(child),
+                                                  reader.attrs(child)))
+                    position += 1
+                if element.tag == context_tag:
+                    xbrl.context_table.add(stream_context(element))
+                else:
+                    unit = stream_unit(element)
+                    xbrl.units[unit.id] = unit
+
+            # drop what we have read unless a fact still needs it
+            if keeping == 0:
+                element.clear()
+                parent = element.getparent()
+                while parent is not None and \
+                        element.getprevious() is not None:
+                    del parent[0]
+    except etree.XMLSyntaxError as e:
+        if position > 0:
+            raise XBRLParserException(str(e))
+
+    for fact, continued_at, format in continued:
+        chunks = [fact.text]
+        seen = set()
+        while continued_at in continuations and continued_at not in seen:
+            seen.add(continued_at)
+            text, continued_at = continuations[continued_at]
+            chunks.append(text)
+        fact.text = ix_text("".join(chunks), format)
+
+    return xbrl
+
+
+def stream_context(element):
+    """ Takes an lxml context element returns a Context"""
+    ns = "{%s}" % XBRLI_NS
+    identifier = None
+    segment = False
+    entity = element.find(".//%sentity" % ns)
+    if entity is not None:
+        identifier = entity.findtext(".//%sidentifier" % ns, "")
+        segment = entity.find(".//%ssegment" % ns) is not None
+
+    start_date = None
+    end_date = None
+    period = element.find(".//%speriod" % ns)
+    if period is not None:
+        start_date = period.findtext(".//%sstartDate" % ns)
+        end_date = period.findtext(".//%sendDate" % ns)
+
+    dimensions = [dimension(member.get("dimension", ""),
+                            "".join(member.itertext()),
+                            member.tag.endswith("typedMember"))
+                  for member in element.iter("{%s}explicitMember" %
+                                             XBRLDI_NS,
+                                             "{%s}typedMember" % XBRLDI_NS)]
+
+    return Context(element.get("id"),
+                   entity=identifier,
+                   segment=segment,
+                   start=date_ordinal(start_date),
+                   end=date_ordinal(end_date),
+                   instant=date_ordinal(element.findtext(".//%sinstant" %
+                                                         ns)),
+                   dimensions=dimensions)
+
+
+def stream_unit(element):
+    """ Takes an lxml unit element returns a Unit"""
+    ns = "{%s}" % XBRLI_NS
+
+    def measure(path):
+        return [m.text.strip() for m in element.iterfind(path) if m.text]
+
+    if element.find(ns + "divide") is not None:
+        return Unit(element.get("id"),
+                    measure("%sdivide/%sunitNumerator/%smeasure" %
+                            (ns, ns, ns)),
+                    measure("%sdivide/%sunitDenominator/%smeasure" %
+                            (ns, ns, ns)))
+    return Unit(element.get("id"), measure(ns + "measure"))
+
+
 class XBRLParser(object):
 
-    def __init__(self, precision=0):
+    def __init__(self,
+                 precision=0,
+                 engine="soup",
+                 cache=None,
+                 stats=None,
+                 concepts=None,
+                 mmap=False,
+                 select=None,
+                 decimal=False,
+                 member=None,
+                 rules=None):
+        """
+        :param engine: 'soup' builds a BeautifulSoup tree, 'iterparse'
+            streams the document with lxml into a compact XBRL object,
+            'ixbrl' does the same for Inline XBRL (XHTML) filings.
+        :param cache: A ParseCache or a directory for one. parse() then
+            returns compact XBRL objects, loaded from the cache when the
+            same document was parsed before.
+        :param stats: A ParseStats to record the time spent in each stage
+            and concept lookup, True for a new one. Nothing is recorded
+            when it is None.
+        :param concepts: The ConceptMap parseGAAP reads fields from,
+            GAAP_CONCEPTS by default.
+        :param mmap: Memory map the paths given to parse() rather than
+            reading them, so the document is not copied into memory as a
+            whole before it is parsed.
+        :param select: Concept name patterns of the facts to keep, e.g.
+            ["^dei:", "^us-gaap:assets$"]. Other facts and text blocks
+            are dropped while parsing, so only what is needed is indexed.
+        :param decimal: Return numbers as Decimals rather than floats.
+        :param member: The zip member, or the <TYPE> or <FILENAME> of the
+            full submission document, to read from an archive instead of
+            looking for the instance.
+        :param rules: The DerivationRules parseGAAP and parseGAAPPeriods
+            derive missing fields with, GAAP_RULES by default.
+        """
         if precision:
             warnings.warn("The precision argument has been deprecated. The argument will not affect any results.", DeprecationWarning, stacklevel=2)
+        if engine not in ENGINES:
+            raise XBRLParserException('invalid engine')
+        if isinstance(cache, six.string_types):
+            cache = ParseCache(cache)
+        self.engine = engine
+        self.cache = cache
+        if stats is True:
+            stats = ParseStats()
+        self.stats = stats
+        self.concepts = concepts if concepts is not None else GAAP_CONCEPTS
+        self.mmap = mmap
+        self.select = ConceptSelector(select) if select is not None \
+            else None
+        self.decimal = decimal
+        self.member = member
+        self.rules = rules if rules is not None else GAAP_RULES
         self.logger = logging.getLogger(__name__)
 
-    def parse(self, file_handle):
+    def parse(self, file_handle, compact=False):
         """
         parse is the main entry point for an XBRLParser. It takes a file
-        handle.
-        """
+        handle or a path, of an instance document or of an EDGAR zip, a
+        full submission .txt or a gzip or bz2 file holding one.
+
+        Returns a BeautifulSoup with the soup engine or an XBRL object with
+        the iterparse and ixbrl engines. Both are accepted by the parse
+        methods.
 
-        xbrl_obj = XBRL()
+        :param compact: Return an XBRL object with the soup engine too. It
+            is much smaller than the soup and can be pickled.
+        """
 
         # if no file handle was given create our own
         if not hasattr(file_handle, 'read'):
-            file_handler = open(file_handle)
+            if self.mmap:
+                file_handler = MappedFile(file_handle)
+            else:
+                file_handler = open(file_handle, 'rb')
         else:
             file_handler = file_handle
 
-        # Store the headers
-        xbrl_file = XBRLPreprocessedFile(file_handler)
+        # archives and compressed files give a stream of their instance
+        file_handler = open_instance(file_handler, self.member, self.engine)
+
+        stats = self.stats
+        if stats is not None:
+            start = stats.clock()
+
+        xbrl = None
+        cache_key = None
+        if self.cache is not None:
+            # a memory map is hashed in place and parsed from the file
+            mapping = getattr(file_handler, 'mapping', None)
+            options = None if self.select is None \
+                else repr(self.select.patterns)
+            if mapping is not None:
+                cache_key = self.cache.key(mapping, self.engine, options)
+            else:
+                data = file_handler.read()
+                file_handler.close()
+                cache_key = self.cache.key(data, self.engine, options)
+            xbrl = self.cache.get(cache_key)
+            if xbrl is None:
+                if mapping is None:
+                    file_handler = BytesIO(data) \
+                        if isinstance(data, bytes) else StringIO(data)
+                compact = True
+            else:
+                cache_key = None
+                file_handler.close()
+            if stats is not None:
+                stats.count("cache_misses" if xbrl is None else "cache_hits")
+                start = stats.lap("cache", start)
+
+        if xbrl is None:
+            if self.engine == "iterparse":
+                xbrl = stream_maker(file_handler, self.select)
+            elif self.engine == "ixbrl":
+                xbrl = ixbrl_maker(file_handler, self.select)
+            else:
+                # Store the headers
+                xbrl_file = XBRLPreprocessedFile(file_handler)
+                if stats is not None:
+                    if xbrl_file.repaired:
+                        stats.count("repaired")
+                    start = stats.lap("preprocess", start)
+                xbrl = soup_maker(xbrl_file.fh)
+            file_handler.close()
+            if stats is not None:
+                stats.lap("tree", start)
+
+        context_table = self.index(xbrl)
+
+        if compact and not isinstance(xbrl, XBRL):
+            doc_root = self.xbrl_base if len(self.xbrl_base) > 1 else ""
+            xbrl = compact_maker(xbrl, context_table, doc_root)
+
+        if cache_key is not None:
+            self.cache.set(cache_key, xbrl)
 
-        xbrl = soup_maker(xbrl_file.fh)
-        file_handler.close()
-        xbrl_base = xbrl.find(name=re.compile("xbrl*:*"))
+        return xbrl
 
-        if xbrl.find('xbrl') is None and xbrl_base is None:
+    def index(self, xbrl):
+        """
+        Index the facts and contexts of a parsed document, so lookups don't
+        rescan the tree, and return its ContextTable.
+        """
+        stats = self.stats
+        if stats is not None:
+            start = stats.clock()
+
+        if self.select is not None and not isinstance(xbrl, XBRL) and \
+                'fact_index' not in vars(xbrl):
+            xbrl.fact_index = FactIndex(element
+                                        for element in xbrl.find_all()
+                                        if self.select.keeps(element))
+        fact_index = self.fact_index(xbrl)
+        if stats is not None:
+            start = stats.lap("facts", start, len(fact_index))
+        xbrl_base = fact_index.first("xbrl*:*")
+
+        if 'xbrl' not in fact_index and xbrl_base is None:
             raise XBRLParserException('The xbrl file is empty!')
 
         # lookahead to see if we need a custom leading element
-        lookahead = xbrl.find(name=re.compile("context",
-                              re.IGNORECASE | re.MULTILINE)).name
+        lookahead = fact_index.first("context").name
         if ":" in lookahead:
             self.xbrl_base = lookahead.split(":")[0] + ":"
         else:
             self.xbrl_base = ""
 
-        return xbrl
+        # read every context once so parseGAAP only has to look them up
+        context_table = self.context_table(xbrl)
+        if stats is not None:
+            stats.lap("contexts", start, len(context_table))
+        return context_table
 
     def parseGAAP(self,
                   xbrl,
@@ -72,8 +681,51 @@ class XBRLParser(object):
         """
         Parse GAAP from our XBRL soup and return a GAAP object.
         """
+        stats = self.stats
+        if stats is not None:
+            start = stats.clock()
+
         gaap_obj = GAAP()
 
+        expected_end_date, durations = self.period_filter(doc_date, context)
+
+        # collect all contexts up that are relevant to us,
+        # we don't want any segments
+        context_ids = self.context_table(xbrl).select(expected_end_date,
+                                                      durations)
+        fact_index = self.fact_index(xbrl)
+        if stats is not None:
+            stats.lap("context_filter", start, len(context_ids))
+
+        # one pass over the concept names finds the names of every field
+        resolved = self.concepts.resolve(fact_index.elements)
+        found = set()
+        for field in self.concepts:
+            if stats is not None:
+                start = stats.clock()
+            elements = []
+            for names in resolved.get(field, ()):
+                elements += fact_index.select(names, context_ids)
+            setattr(gaap_obj, field,
+                    self.data_processing(elements, xbrl, ignore_errors,
+                                         context_ids))
+            if elements:
+                found.add(field)
+            if stats is not None:
+                stats.lookup(field, start, len(elements))
+
+        self.rules.derive([gaap_obj], [found], set(resolved))
+
+        if stats is not None:
+            stats.lap("gaap", start)
+        return gaap_obj
+
+    @staticmethod
+    def period_filter(doc_date="", context="current"):
+        """
+        Returns the end date ordinal and the durations in days of the
+        contexts parseGAAP reads for doc_date and context.
+        """
         # the default is today
         if doc_date == "":
             doc_date = str(datetime.date.today())
@@ -86,207 +738,151 @@ class XBRLParser(object):
         if context == "year":
             context = 360
 
-        context = int(context)
-
-        if context % 90 == 0:
-            context_extended = list(range(context, context + 9))
-            expected_start_date = \
-                datetime.datetime.strptime(doc_date, "%Y%m%d") \
-                - datetime.timedelta(days=context)
-        elif context == "instant":
-            expected_start_date = None
+        # instant only takes point in time contexts on the doc date
+        if context == "instant":
+            durations = ()
         else:
-            raise XBRLParserException('invalid context')
+            context = int(context)
+            if context % 90 != 0:
+                raise XBRLParserException('invalid context')
+            durations = range(context, context + 9)
 
-        # we need expected end date unless instant
-        if context != "instant":
-            expected_end_date = \
-                datetime.datetime.strptime(doc_date, "%Y%m%d")
+        end_date = date_ordinal(doc_date)
+        if end_date is None:
+            raise XBRLParserException('invalid doc date')
+        return end_date, durations
 
-        doc_root = ""
-
-        # we might need to attach the document root
-        if len(self.xbrl_base) > 1:
-            doc_root = self.xbrl_base
-
-        # collect all contexts up that are relevant to us
-        # TODO - Maybe move this to Preprocessing Ingestion
-        context_ids = []
-        context_tags = xbrl.find_all(name=re.compile(doc_root + "context",
-                                     re.IGNORECASE | re.MULTILINE))
+    def parseDimensions(self,
+                        xbrl,
+                        concept,
+                        axis,
+                        doc_date="",
+                        context="current",
+                        ignore_errors=0,
+                        only=True):
+        """
+        Parse a concept broken down by the members of an axis, e.g.
+        revenues by us-gaap:StatementBusinessSegmentsAxis, for the period
+        parseGAAP reads, and return an OrderedDict of member to value.
 
-        try:
-            for context_tag in context_tags:
-                # we don't want any segments
-                if context_tag.find(doc_root + "entity") is None:
-                    continue
-                if context_tag.find(doc_root + "entity").find(
-                doc_root + "segment") is None:
-                    context_id = context_tag.attrs['id']
-
-                    found_start_date = None
-                    found_end_date = None
-
-                    if context_tag.find(doc_root + "instant"):
-                        instant = \
-                            datetime.datetime.strptime(re.compile('[^\d]+')
-                                                       .sub('', context_tag
-                                                       .find(doc_root +
-                                                             "instant")
-                                                        .text)[:8], "%Y%m%d")
-                        if instant == expected_end_date:
-                            context_ids.append(context_id)
-                            continue
-
-                    if context_tag.find(doc_root + "period").find(
-                    doc_root + "startdate"):
-                        found_start_date = \
-                            datetime.datetime.strptime(re.compile('[^\d]+')
-                                                       .sub('', context_tag
-                                                       .find(doc_root +
-                                                             "period")
-                                                       .find(doc_root +
-                                                             "startdate")
-                                                        .text)[:8], "%Y%m%d")
-                    if context_tag.find(doc_root + "period").find(doc_root +
-                    "enddate"):
-                        found_end_date = \
-                            datetime.datetime.strptime(re.compile('[^\d]+')
-                                                       .sub('', context_tag
-                                                       .find(doc_root +
-                                                             "period")
-                                                       .find(doc_root +
-                                                             "enddate")
-                                                       .text)[:8], "%Y%m%d")
-                    if found_end_date and found_start_date:
-                        for ce in context_extended:
-                            if found_end_date - found_start_date == \
-                            datetime.timedelta(days=ce):
-                                if found_end_date == expected_end_date:
-                                    context_ids.append(context_id)
-        except IndexError:
-            raise XBRLParserException('problem getting contexts')
-
-        gaap_obj.assets = self.get_tag(xbrl, "us-gaap:assets$", ignore_errors, context_ids)
-
-        current_assets = \
-            xbrl.find_all("us-gaap:assetscurrent")
-        gaap_obj.current_assets = self.data_processing(current_assets,
-            xbrl, ignore_errors, context_ids)
-
-        non_current_assets = \
-            xbrl.find_all(name=re.compile("(us-gaap:)[^s]*(assetsnoncurrent)",
-                          re.IGNORECASE | re.MULTILINE))
-        if non_current_assets == 0 or not non_current_assets:
-            # Assets  = AssetsCurrent  +  AssetsNoncurrent
-            gaap_obj.non_current_assets = gaap_obj.assets \
-                - gaap_obj.current_assets
+        :param concept: A field of the ConceptMap or a concept name regex
+        :param axis: The dimension, e.g. "us-gaap:StatementBusinessSegmentsAxis"
+        :param only: Leave out contexts with members on other axes too
+        """
+        stats = self.stats
+        if stats is not None:
+            start = stats.clock()
+
+        end_date, durations = self.period_filter(doc_date, context)
+        context_table = self.context_table(xbrl)
+        period_ids = set(context_table.select(end_date, durations,
+                                              segments=True))
+
+        fact_index = self.fact_index(xbrl)
+        if concept in self.concepts:
+            resolved = self.concepts.resolve(fact_index.elements)
+            names = resolved.get(concept, ())
         else:
-            gaap_obj.non_current_assets = \
-                self.data_processing(non_current_assets, xbrl,
-                    ignore_errors, context_ids)
-
-        gaap_obj.liabilities_and_equity = self.get_tag(xbrl, "(us-gaap:)[^s]*(liabilitiesand)", ignore_errors, context_ids)
-        gaap_obj.liabilities = self.get_tag(xbrl, "(us-gaap:)[^s]*(liabilities)", ignore_errors, context_ids)
-        gaap_obj.current_liabilities = self.get_tag(xbrl, "(us-gaap:)[^s]*(currentliabilities)", ignore_errors, context_ids)
-        gaap_obj.noncurrent_liabilities = self.get_tag(xbrl, "(us-gaap:)[^s]*(noncurrentliabilities)", ignore_errors, context_ids)
-
-        gaap_obj.commitments_and_contingencies = self.get_tag(xbrl, "(us-gaap:commitmentsandcontingencies)", ignore_errors, context_ids)
-
-        redeemable_noncontrolling_interest = \
-            xbrl.find_all(name=re.compile("(us-gaap:redeemablenoncontrolling\
-                          interestequity)", re.IGNORECASE | re.MULTILINE))
-        gaap_obj.redeemable_noncontrolling_interest = \
-            self.data_processing(redeemable_noncontrolling_interest,
-                xbrl, ignore_errors, context_ids)
-
-        gaap_obj.temporary_equity = self.get_tag(xbrl, "(us-gaap:)[^s]*(temporaryequity)", ignore_errors, context_ids)
-
-        gaap_obj.equity = self.get_tag(xbrl, "(us-gaap:)[^s]*(equity)", ignore_errors, context_ids)
-
-        gaap_obj.equity_attributable_interest = self.get_tag(xbrl, "(us-gaap:minorityinterest)", ignore_errors, context_ids)
-
-        gaap_obj.stockholders_equity = self.get_tag(xbrl, "(us-gaap:stockholdersequity)", ignore_errors, context_ids)
-        gaap_obj.equity_attributable_parent = self.get_tag(xbrl, "(us-gaap:liabilitiesandpartnerscapital)", ignore_errors, context_ids)
-
-        # Incomes #
-        gaap_obj.revenues = self.get_tag(xbrl, "(us-gaap:)[^s]*(revenue)", ignore_errors, context_ids)
-
-
-        gaap_obj.cost_of_revenue = self.get_tag(xbrl, [
-            "(us-gaap:costofrevenue)",
-            "(us-gaap:costofservices)",
-            "(us-gaap:costofgoodssold)",
-            "(us-gaap:costofgoodsandservicessold)"
-        ], ignore_errors, context_ids)
-
-        gaap_obj.gross_profit = self.get_tag(xbrl, "(us-gaap:)[^s]*(grossprofit)", ignore_errors, context_ids)
-        gaap_obj.operating_expenses = self.get_tag(xbrl, "(us-gaap:operating)[^s]*(expenses)", ignore_errors, context_ids)
-        gaap_obj.costs_and_expenses = self.get_tag(xbrl, "(us-gaap:)[^s]*(costsandexpenses)", ignore_errors, context_ids)
-        gaap_obj.other_operating_income = self.get_tag(xbrl, "(us-gaap:otheroperatingincome)", ignore_errors, context_ids)
-        gaap_obj.operating_income_loss = self.get_tag(xbrl, "(us-gaap:otheroperatingincome)", ignore_errors, context_ids)
-        gaap_obj.nonoperating_income_loss = self.get_tag(xbrl, "(us-gaap:nonoperatingincomeloss)", ignore_errors, context_ids)
-        gaap_obj.interest_and_debt_expense = self.get_tag(xbrl, "(us-gaap:interestanddebtexpense)", ignore_errors, context_ids)
-
-
-        gaap_obj.income_before_equity_investments = self.get_tag(xbrl, "(us-gaap:incomelossfromcontinuing"
-                                          "operationsbeforeincometaxes"
-                                          "minorityinterest)", ignore_errors, context_ids)
-
-        gaap_obj.income_from_equity_investments = self.get_tag(xbrl, "(us-gaap:incomelossfromequity"
-                          "methodinvestments)", ignore_errors, context_ids)
-
-        gaap_obj.income_tax_expense_benefit = self.get_tag(xbrl, "(us-gaap:incometaxexpensebenefit)", ignore_errors, context_ids)
-
-        gaap_obj.income_continuing_operations_tax = self.get_tag(xbrl, "(us-gaap:IncomeLossBeforeExtraordinaryItemsAndCumulativeEffectOfChangeInAccountingPrinciple)", ignore_errors, context_ids)
-
-        gaap_obj.income_discontinued_operations = self.get_tag(xbrl, "(us-gaap:)[^s]*(discontinuedoperation)", ignore_errors, context_ids)
-
-        gaap_obj.extraordary_items_gain_loss = self.get_tag(xbrl, "(us-gaap:extraordinaryitemnetoftax)", ignore_errors, context_ids)
-
-        income_loss = \
-            xbrl.find_all(name=re.compile("(us-gaap:)[^s]*(incomeloss)",
-                          re.IGNORECASE | re.MULTILINE))
-        gaap_obj.income_loss = \
-            self.data_processing(income_loss, xbrl, ignore_errors,
-                context_ids)
-        income_loss += xbrl.find_all(name=re.compile("(us-gaap:profitloss)",
-                                     re.IGNORECASE | re.MULTILINE))
-        gaap_obj.income_loss = \
-            self.data_processing(income_loss, xbrl, ignore_errors,
-                                 context_ids)
-
-        gaap_obj.net_income_shareholders = self.get_tag(xbrl, "(us-gaap:netincomeavailabletocommonstockholdersbasic)", ignore_errors, context_ids)
-
-        gaap_obj.preferred_stock_dividends = self.get_tag(xbrl, "(us-gaap:preferredstockdividendsandotheradjustments)", ignore_errors, context_ids)
-
-        gaap_obj.net_income_loss_noncontrolling = self.get_tag(xbrl, "(us-gaap:netincomelossattributabletononcontrollinginterest)", ignore_errors, context_ids)
-        gaap_obj.net_income_loss = self.get_tag(xbrl, "^us-gaap:netincomeloss$", ignore_errors, context_ids)
-
-        # Comprehensive income
-        gaap_obj.comprehensive_income = self.get_tag(xbrl, "(us-gaap:comprehensiveincome)", ignore_errors, context_ids)
-        gaap_obj.comprehensive_income_parent = self.get_tag(xbrl, "(us-gaap:comprehensiveincomenetoftax)", ignore_errors, context_ids)
-        gaap_obj.comprehensive_income_interest = self.get_tag(xbrl, "(us-gaap:comprehensiveincomenetoftaxattributabletononcontrollinginterest)", ignore_errors, context_ids)
-        gaap_obj.other_comprehensive_income = self.get_tag(xbrl, "(us-gaap:othercomprehensiveincomelossnetoftax)", ignore_errors, context_ids)
-
-        # Net cash flow statements
-        gaap_obj.net_cash_flows_operating = self.get_tag(xbrl, "(us-gaap:netcashprovidedbyusedinoperatingactivities)", ignore_errors, context_ids)
-        gaap_obj.net_cash_flows_investing = self.get_tag(xbrl, "(us-gaap:netcashprovidedbyusedininvestingactivities)", ignore_errors, context_ids)
-        gaap_obj.net_cash_flows_financing = self.get_tag(xbrl, "(us-gaap:netcashprovidedbyusedinfinancingactivities)", ignore_errors, context_ids)
-
-        gaap_obj.net_cash_flows_operating_continuing = self.get_tag(xbrl, "(us-gaap:netcashprovidedbyusedinoperatingactivitiescontinuingoperations)", ignore_errors, context_ids)
-        gaap_obj.net_cash_flows_investing_continuing = self.get_tag(xbrl, "(us-gaap:netcashprovidedbyusedininvestingactivitiescontinuingoperations)", ignore_errors, context_ids)
-        gaap_obj.net_cash_flows_financing_continuing = self.get_tag(xbrl, "(us-gaap:netcashprovidedbyusedinfinancingactivitiescontinuingoperations)", ignore_errors, context_ids)
-
-        gaap_obj.net_cash_flows_operating_discontinued = self.get_tag(xbrl, "(us-gaap:cashprovidedbyusedinoperatingactivitiesdiscontinuedoperations)", ignore_errors, context_ids)
-        gaap_obj.net_cash_flows_investing_discontinued = self.get_tag(xbrl, "(us-gaap:cashprovidedbyusedininvestingactivitiesdiscontinuedoperations)", ignore_errors, context_ids)
-
-        gaap_obj.net_cash_flows_discontinued = self.get_tag(xbrl, "(us-gaap:netcashprovidedbyusedindiscontinuedoperations)", ignore_errors, context_ids)
-        gaap_obj.common_shares_outstanding = self.get_tag(xbrl, "(us-gaap:commonstocksharesoutstanding)", ignore_errors, context_ids)
-        gaap_obj.common_shares_issued = self.get_tag(xbrl, "(us-gaap:commonstocksharesissued)", ignore_errors, context_ids)
-        gaap_obj.common_shares_authorized = self.get_tag(xbrl, "(us-gaap:commonstocksharesauthorized)", ignore_errors, context_ids)
+            names = [fact_index.names(concept)]
+
+        members = OrderedDict()
+        for member, context_ids in context_table.members(axis, only).items():
+            context_ids = [context_id for context_id in context_ids
+                           if context_id in period_ids]
+            if not context_ids:
+                continue
+            elements = []
+            for group in names:
+                elements += fact_index.select(group, context_ids)
+            if elements:
+                members[member] = self.data_processing(elements, xbrl,
+                                                       ignore_errors,
+                                                       context_ids)
+
+        if stats is not None:
+            stats.lap("dimensions", start, len(members))
+        return members
+
+    def parseGAAPPeriods(self,
+                         xbrl,
+                         ignore_errors=0):
+        """
+        Parse GAAP for every period in our XBRL soup in one pass over the
+        facts and return an OrderedDict of Period to GAAP objects.
 
-        return gaap_obj
+        Like parseGAAP, a duration period also takes the instant values
+        on its end date. Contexts with segments are left out.
+        """
+        stats = self.stats
+        if stats is not None:
+            begin = stats.clock()
+
+        fact_index = self.fact_index(xbrl)
+
+        # work out which periods every context contributes to
+        context_periods = {}
+        instants = []
+        durations = {}
+        for context in self.context_table(xbrl):
+            if context.entity is None or context.segment:
+                continue
+            period = Period.from_context(context)
+            if period is None:
+                continue
+            context_periods[context.id] = [period]
+            if period.instant:
+                instants.append(context)
+            else:
+                durations.setdefault(period.end, set()).add(period)
+        for context in instants:
+            end = datetime.date.fromordinal(context.instant)
+            context_periods[context.id].extend(
+                sorted(durations.get(end, ())))
+
+        periods = OrderedDict()
+        for period in sorted(set(period for found in context_periods.values()
+                                 for period in found),
+                             key=lambda period: (period.end,
+                                                 period.start or
+                                                 period.end)):
+            gaap_obj = GAAP()
+            for field in self.concepts:
+                setattr(gaap_obj, field, 0)
+            periods[period] = gaap_obj
+
+        found = dict((period, set()) for period in periods)
+        resolved = self.concepts.resolve(fact_index.elements)
+        for field in self.concepts:
+            if stats is not None:
+                start = stats.clock()
+            elements = []
+            for names in resolved.get(field, ()):
+                elements += fact_index.select(names)
+
+            # the first element for a period is the one parseGAAP uses
+            first = OrderedDict()
+            for element in elements:
+                context_id = element.attrs.get('contextref')
+                for period in context_periods.get(context_id, ()):
+                    if period not in first:
+                        first[period] = element
+
+            for period, element in first.items():
+                setattr(periods[period], field,
+                        self.data_processing([element], xbrl, ignore_errors,
+                                             [element.attrs['contextref']]))
+                found[period].add(field)
+            if stats is not None:
+                stats.lookup(field, start, len(elements))
+
+        # every rule runs once over all the periods
+        self.rules.derive(list(periods.values()),
+                          [found[period] for period in periods],
+                          set(resolved))
+
+        if stats is not None:
+            stats.lap("gaap_periods", begin, len(periods))
+        return periods
 
     def parseDEI(self,
                  xbrl,
@@ -294,6 +890,10 @@ class XBRLParser(object):
         """
         Parse DEI from our XBRL soup and return a DEI object.
         """
+        stats = self.stats
+        if stats is not None:
+            start = stats.clock()
+
         dei_obj = DEI()
 
         dei_obj.trading_symbol = self.get_tag(xbrl, "(dei:tradingsymbol)", tag_type="String", no_context=True)
@@ -302,6 +902,8 @@ class XBRLParser(object):
         dei_obj.public_float = self.get_tag(xbrl, "(dei:entitycommonstocksharesoutstanding)", no_context=True)
         dei_obj.public_float = self.get_tag(xbrl, "(dei:entitypublicfloat)", no_context=True)
 
+        if stats is not None:
+            stats.lap("dei", start)
         return dei_obj
 
     def parseCustom(self,
@@ -310,18 +912,96 @@ class XBRLParser(object):
         """
         Parse company custom entities from XBRL and return an Custom object.
         """
+        stats = self.stats
+        if stats is not None:
+            start = stats.clock()
+
         custom_obj = Custom()
 
-        custom_data = xbrl.find_all(re.compile('^((?!(us-gaap|dei|xbrll|xbrldi)).)*:\s*',
-            re.IGNORECASE | re.MULTILINE))
+        fact_index = self.fact_index(xbrl)
+        custom_data = fact_index.find(
+            '^((?!(us-gaap|dei|xbrll|xbrldi)).)*:\s*')
 
-        elements = {}
         for data in custom_data:
-            if XBRLParser().is_number(data.text):
+            if fact_index.value(data).number is not None:
                 setattr(custom_obj, data.name.split(':')[1], data.text)
 
+        if stats is not None:
+            stats.lap("custom", start, len(custom_data))
         return custom_obj
 
+    def parseFacts(self, xbrl):
+        """
+        Parse every numeric fact, one with a context, a unit and a value
+        that is a number, from our XBRL soup into a FactTable.
+        """
+        stats = self.stats
+        if stats is not None:
+            start = stats.clock()
+
+        table = FactTable()
+        columns = table.columns
+        concept_column = columns["concept"]
+        context_column = columns["context"]
+        start_column = columns["start"]
+        end_column = columns["end"]
+        unit_column = columns["unit"]
+        decimals_column = columns["decimals"]
+        value_column = columns["value"]
+        dimensional_column = columns["dimensional"]
+
+        # id, start, end and dimensional flag of every context, worked out
+        # once rather than per fact
+        contexts = {}
+        for context in self.context_table(xbrl):
+            if context.instant is not None:
+                period = (0, date_number(context.instant))
+            else:
+                period = (date_number(context.start),
+                          date_number(context.end))
+            contexts[context.id] = (len(table.contexts),) + period + \
+                (1 if context.segment else 0,)
+            table.contexts.append(context.id)
+        units = {}
+        nan = float("nan")
+
+        fact_index = self.fact_index(xbrl)
+        for name, entries in fact_index.elements.items():
+            concept_id = None
+            for _, element in entries:
+                attrs = element.attrs
+                context = contexts.get(attrs.get('contextref'))
+                unit = attrs.get('unitref')
+                if context is None or unit is None:
+                    continue
+                fact_value = fact_index.value(element)
+                value = fact_value.number
+                if value is None:
+                    continue
+
+                if concept_id is None:
+                    concept_id = len(table.concepts)
+                    table.concepts.append(name)
+                unit_id = units.get(unit)
+                if unit_id is None:
+                    unit_id = units[unit] = len(table.units)
+                    table.units.append(unit)
+                decimals = fact_value.decimals
+
+                concept_column.append(concept_id)
+                context_column.append(context[0])
+                start_column.append(context[1])
+                end_column.append(context[2])
+                unit_column.append(unit_id)
+                decimals_column.append(nan if decimals is None
+                                       else float(decimals))
+                value_column.append(value)
+                dimensional_column.append(context[3])
+
+        if stats is not None:
+            stats.lap("facts_table", start, len(table))
+        return table
+
     @staticmethod
     def trim_decimals(s, precision=-3):
         """
@@ -354,6 +1034,42 @@ class XBRLParser(object):
         except ValueError:
             return False
 
+    @staticmethod
+    def fact_index(xbrl):
+        """
+        Returns the FactIndex for an XBRL object or soup, building it if
+        the soup was not created by parse().
+        """
+        if isinstance(xbrl, XBRL):
+            return xbrl.fact_index
+        fact_index = vars(xbrl).get('fact_index')
+        if fact_index is None:
+            fact_index = FactIndex(xbrl.find_all())
+            xbrl.fact_index = fact_index
+        return fact_index
+
+    def context_table(self, xbrl):
+        """
+        Returns the ContextTable for an XBRL object or soup, building it if
+        the soup was not created by parse().
+        """
+        if isinstance(xbrl, XBRL):
+            return xbrl.context_table
+        context_table = vars(xbrl).get('context_table')
+        if context_table is None:
+            doc_root = ""
+
+            # we might need to attach the document root
+            if len(self.xbrl_base) > 1:
+                doc_root = self.xbrl_base
+
+            context_tags = self.fact_index(xbrl).find(doc_root + "context")
+            context_table = ContextTable(context_from_tag(context_tag,
+                                                          doc_root)
+                                         for context_tag in context_tags)
+            xbrl.context_table = context_table
+        return context_table
+
     def get_tag(self,
                 xbrl,
                 tag,
@@ -372,18 +1088,33 @@ class XBRLParser(object):
         :returns: The tag's value in the XBRL soup or 0.
         """
 
+        stats = self.stats
+        if stats is not None:
+            start = stats.clock()
+
+        fact_index = self.fact_index(xbrl)
+
+        # only facts in the requested contexts can be used for numbers
+        if tag_type == "String" or no_context:
+            tag_contexts = None
+        else:
+            tag_contexts = context_ids
+
         if isinstance(tag, list):
             tags = []
             for _tag in tag:
-                tags += xbrl.find_all(name=re.compile(_tag, re.IGNORECASE | re.MULTILINE))
+                tags += fact_index.find(_tag, tag_contexts)
         else:
-            tags = xbrl.find_all(name=re.compile(tag, re.IGNORECASE | re.MULTILINE))
-        return self.data_processing(tags,
-                                    xbrl,
-                                    ignore_errors,
-                                    context_ids,
-                                    options={'type': tag_type,
-                                            'no_context': no_context})
+            tags = fact_index.find(tag, tag_contexts)
+        value = self.data_processing(tags,
+                                     xbrl,
+                                     ignore_errors,
+                                     context_ids,
+                                     options={'type': tag_type,
+                                              'no_context': no_context})
+        if stats is not None:
+            stats.lookup(tag, start, len(tags))
+        return value
 
     def data_processing(self,
                         elements,
@@ -402,12 +1133,18 @@ class XBRLParser(object):
             if len(elements) > 0:
                     return elements[0].text
 
+        # values are decoded once per fact and kept on the index
+        fact_index = self.fact_index(xbrl)
+
         if options['no_context'] is True:
-            if len(elements) > 0 and XBRLParser().is_number(elements[0].text):
+            if len(elements) > 0 and \
+                    fact_index.value(elements[0]).number is not None:
                     return elements[0].text
 
         try:
             # Extract the correct values by context
+            if len(elements) > 1:
+                context_ids = set(context_ids)
             correct_elements = []
             for element in elements:
                 std = element.attrs['contextref']
@@ -415,29 +1152,26 @@ class XBRLParser(object):
                     correct_elements.append(element)
             elements = correct_elements
 
-            if len(elements) > 0 and XBRLParser().is_number(elements[0].text):
-                attr_precision = elements[0].attrs['decimals']
-                if attr_precision is not None:
-                    if attr_precision == "INF":
-                        # INF precision implies 0.
-                        attr_precision = 0
-
-                if elements:
-                    return XBRLParser().trim_decimals(elements[0].text, int(attr_precision))
-                else:
-                    return 0
-            else:
-                return 0
-        except Exception as e:
-            print(str(e) + " error at " +
-                ''.join(elements[0].text))
-            if ignore_errors == 0:
-                raise XBRLParserException('value extraction error')
-            elif ignore_errors == 1:
+            if len(elements) == 0:
                 return 0
-            elif ignore_errors == 2:
-                self.logger.error(str(e) + " error at " +
-                    ''.join(elements[0].text))
+            value = fact_index.value(elements[0], self.decimal)
+            if value.error is None:
+                return value.value
+            e = value.error
+        except Exception as error:
+            e = error
+
+        if self.stats is not None:
+            self.stats.error(e)
+        print(str(e) + " error at " +
+              ''.join(elements[0].text))
+        if ignore_errors == 0:
+            raise XBRLParserException('value extraction error')
+        elif ignore_errors == 1:
+            return 0
+        elif ignore_errors == 2:
+            self.logger.error(str(e) + " error at " +
+                              ''.join(elements[0].text))
 
 
 class XBRLParserException(Exception):
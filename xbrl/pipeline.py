@@ -0,0 +1,211 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import os
+import json
+import hashlib
+
+from xbrl.batch import EXTENSIONS, find_filings, parse_batch
+from xbrl.parser import XBRLParserException
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+# bump whenever a change to the parser changes its results, so a pipeline
+# run reprocesses every filing
+PARSER_VERSION = "1.1.1"
+
+MANIFEST_SUFFIX = ".manifest"
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """ Returns the sha256 of a file's contents """
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Pipeline(object):
+    """
+    Resumable bulk parsing of filings into a newline-delimited JSON file.
+
+    Next to the output a manifest records every filing written, with its
+    content hash, the parser version and the offset and length of its
+    result in the output. A run skips the filings recorded with the same
+    hash and version, so a run that was interrupted picks up where it
+    stopped, and a later run only reprocesses new or changed filings, or
+    every filing once the parser version changes.
+
+    Results are appended a chunk at a time: the output is written and
+    synced before the manifest, and output past the last recorded result
+    is cut off when the pipeline starts, so the two never disagree. An
+    output without a manifest is not the pipeline's and is left alone
+    unless overwrite is given.
+
+    :param output: The output file
+    :param manifest: The manifest file, output + '.manifest' by default
+    :param version: The parser version to record, from PARSER_VERSION and
+        the parse options by default
+    :param retry_errors: Also reprocess filings that failed before
+    :param overwrite: Discard an existing output and manifest and start over
+    :param flush_size: Results appended to the output at a time
+    :param options: workers, chunk_size and the options of parse_filing,
+        as taken by parse_batch
+    """
+
+    def __init__(self,
+                 output,
+                 manifest=None,
+                 version=None,
+                 retry_errors=False,
+                 overwrite=False,
+                 flush_size=100,
+                 **options):
+        self.output = output
+        self.manifest = manifest if manifest is not None \
+            else output + MANIFEST_SUFFIX
+        self.workers = options.pop("workers", None)
+        self.chunk_size = options.pop("chunk_size", 1)
+        self.options = options
+        if version is None:
+            version = "%s %s" % (PARSER_VERSION,
+                                 json.dumps(options, sort_keys=True))
+        self.version = version
+        self.retry_errors = retry_errors
+        self.flush_size = max(1, int(flush_size))
+        self.entries = self.load(overwrite)
+
+    def load(self, overwrite=False):
+        """
+        Reads the manifest, cuts the output back to the last recorded
+        result and returns the latest entry for every path.
+        """
+        entries = OrderedDict()
+        end = 0
+        if overwrite:
+            for path in (self.output, self.manifest):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        if not os.path.exists(self.manifest):
+            if os.path.exists(self.output) and os.path.getsize(self.output):
+                raise XBRLParserException(
+                    "%s exists without a manifest, pass overwrite to "
+                    "replace it" % self.output)
+            # an empty manifest, so output written before the first
+            # record is known to be the pipeline's
+            open(self.manifest, "ab").close()
+        else:
+            with open(self.manifest, "r+b") as fh:
+                recorded = 0
+                for line in iter(fh.readline, b""):
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError(line)
+                        entry = json.loads(line.decode("utf-8"))
+                    except ValueError:
+                        # a record cut short by a crash
+                        fh.truncate(recorded)
+                        break
+                    recorded += len(line)
+                    entries[entry["path"]] = entry
+                    end = max(end, entry["offset"] + entry["length"])
+
+            if os.path.exists(self.output) and \
+                    os.path.getsize(self.output) > end:
+                with open(self.output, "r+b") as fh:
+                    fh.truncate(end)
+        return entries
+
+    def done(self, path, digest):
+        entry = self.entries.get(path)
+        return entry is not None and entry["sha256"] == digest and \
+            entry["version"] == self.version and \
+            not (self.retry_errors and entry.get("error"))
+
+    def pending(self, paths):
+        """
+        Returns the filings in paths that still need to be processed, and
+        the hash of every filing.
+        """
+        hashes = {}
+        pending = []
+        extensions = EXTENSIONS[self.options.get("engine", "soup")]
+        for path in find_filings(paths, extensions):
+            hashes[path] = file_hash(path)
+            if not self.done(path, hashes[path]):
+                pending.append(path)
+        return pending, hashes
+
+    def run(self, paths):
+        """
+        Parse every filing in paths that needs it.
+
+        :returns: A dict of the number of filings processed, skipped and
+            failed.
+        """
+        pending, hashes = self.pending(paths)
+        stats = OrderedDict([("processed", 0),
+                             ("skipped", len(hashes) - len(pending)),
+                             ("failed", 0)])
+
+        buffered = []
+        for result in parse_batch(pending,
+                                  workers=self.workers,
+                                  chunk_size=self.chunk_size,
+                                  **self.options):
+            stats["processed"] += 1
+            if "error" in result:
+                stats["failed"] += 1
+            buffered.append(result)
+            if len(buffered) >= self.flush_size:
+                self.append(buffered, hashes)
+                buffered = []
+        if buffered:
+            self.append(buffered, hashes)
+        return stats
+
+    def append(self, results, hashes):
+        """
+        Appends results to the output, then records them in the manifest.
+        """
+        entries = []
+        with open(self.output, "ab") as fh:
+            fh.seek(0, os.SEEK_END)
+            offset = fh.tell()
+            for result in results:
+                line = (json.dumps(result, sort_keys=True) + "\n") \
+                    .encode("utf-8")
+                fh.write(line)
+                entry = OrderedDict([("path", result["path"]),
+                                     ("sha256", hashes[result["path"]]),
+                                     ("version", self.version),
+                                     ("offset", offset),
+                                     ("length", len(line))])
+                if "error" in result:
+                    entry["error"] = result["error"]
+                entries.append(entry)
+                offset += len(line)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+        with open(self.manifest, "ab") as fh:
+            for entry in entries:
+                fh.write((json.dumps(entry) + "\n").encode("utf-8"))
+                self.entries[entry["path"]] = entry
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def results(self):
+        """
+        Yields the latest result of every filing in the manifest, read
+        from the output.
+        """
+        with open(self.output, "rb") as fh:
+            for entry in self.entries.values():
+                fh.seek(entry["offset"])
+                yield json.loads(fh.read(entry["length"]).decode("utf-8"))
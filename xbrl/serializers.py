@@ -1,4 +1,8 @@
-from marshmallow import Schema, fields
+import csv
+import json
+from operator import attrgetter
+
+from marshmallow import Schema, fields, utils
 
 class GAAPSerializer(Schema):
     assets = fields.Number()
@@ -57,3 +61,98 @@ class DEISerializer(Schema):
     company_name = fields.String()
     shares_outstanding = fields.Number()
     public_float = fields.Number()
+
+
+class BulkSerializer(object):
+    """
+    Dumps many model objects with a schema's Number and String fields, as
+    dict rows, CSV or newline-delimited JSON.
+
+    The field list and value conversions are worked out once, up front, so
+    dumping an object is one attribute fetch and a float() or text
+    conversion per field. The rows are identical to schema.dump(obj).data,
+    an object the fast path can't handle (a missing attribute, a value that
+    is not a number, a dict) is dumped by the schema itself.
+    """
+
+    def __init__(self, schema=GAAPSerializer):
+        if isinstance(schema, type):
+            schema = schema()
+        self.schema = schema
+
+        self.names = []
+        converters = []
+        attributes = []
+        for name, field in schema.fields.items():
+            if field.load_only:
+                continue
+            if type(field) in (fields.Number, fields.Float) and \
+                    not field.as_string:
+                converters.append(field.num_type)
+            elif type(field) is fields.String:
+                converters.append(utils.ensure_text_type)
+            else:
+                # no fast path for other fields
+                converters = None
+                break
+            self.names.append(name)
+            attributes.append(field.attribute or name)
+
+        self.converters = converters
+        self.getter = attrgetter(*attributes) if attributes else None
+        # the schema's own key order depends on the process, CSV columns
+        # follow the order the fields are declared in
+        self.columns = sorted(self.names, key=lambda name:
+                              schema.fields[name]._creation_index)
+
+    def dump(self, obj):
+        """
+        Returns the same dict as schema.dump(obj).data.
+        """
+        if self.converters is None or self.getter is None or \
+                hasattr(obj, '__getitem__'):
+            return self.schema.dump(obj).data
+        try:
+            values = self.getter(obj)
+            if len(self.names) == 1:
+                values = (values,)
+            row = {}
+            for name, converter, value in zip(self.names, self.converters,
+                                              values):
+                if value is None:
+                    row[name] = None
+                elif callable(value):
+                    return self.schema.dump(obj).data
+                else:
+                    row[name] = converter(value)
+            return row
+        except (AttributeError, TypeError, ValueError, OverflowError):
+            return self.schema.dump(obj).data
+
+    def rows(self, objs):
+        """ Returns a generator of dict rows, one per object """
+        dump = self.dump
+        for obj in objs:
+            yield dump(obj)
+
+    def to_csv(self, objs, fh, header=True):
+        """
+        Writes the objects as CSV rows to a text file, None and missing
+        values as empty cells.
+        """
+        writer = csv.writer(fh)
+        if header:
+            writer.writerow(self.columns)
+        columns = self.columns
+        for row in self.rows(objs):
+            writer.writerow([row.get(name) for name in columns])
+
+    def to_ndjson(self, objs, fh, **kwargs):
+        """
+        Writes the objects as one JSON object per line to a text file,
+        kwargs are passed to json.dumps.
+        """
+        dumps = json.dumps
+        for row in self.rows(objs):
+            fh.write(dumps(row, **kwargs))
+            fh.write("\n")
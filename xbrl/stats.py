@@ -0,0 +1,107 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+import timeit
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+
+class Timing(object):
+    """ Calls, seconds and items handled by one stage or lookup """
+    __slots__ = ("calls", "seconds", "items")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.items = 0
+
+    def as_dict(self):
+        return OrderedDict([("calls", self.calls),
+                            ("seconds", self.seconds),
+                            ("items", self.items)])
+
+
+class ParseStats(object):
+    """
+    Timings and counters collected by an XBRLParser given stats=ParseStats().
+
+    stages: preprocess, tree, facts, contexts, context_filter, gaap,
+        gaap_periods, dei and custom, with the elements, contexts or
+        context ids they handled as items.
+    lookups: every get_tag concept pattern, with the facts it matched.
+    errors: value extraction errors in data_processing by exception type.
+    counters: repaired documents, cache hits and misses.
+
+    :param callback: Called as callback(kind, name, seconds, items) on
+        every record, kind being 'stage', 'lookup', 'error' or 'counter',
+        to push them to a metrics system as they happen.
+    """
+
+    clock = staticmethod(timeit.default_timer)
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        self.stages = OrderedDict()
+        self.lookups = OrderedDict()
+        self.errors = OrderedDict()
+        self.counters = OrderedDict()
+
+    def lap(self, stage, start, items=0):
+        """
+        Record the time of a stage started at start and return the clock,
+        which is the start of the next stage.
+        """
+        now = self.clock()
+        self.add(self.stages, "stage", stage, now - start, items)
+        return now
+
+    def lookup(self, tag, start, items=0):
+        """ Record a concept lookup started at start """
+        if isinstance(tag, list):
+            tag = "|".join(tag)
+        self.add(self.lookups, "lookup", tag, self.clock() - start, items)
+
+    def error(self, error):
+        """ Record a value extraction error """
+        name = type(error).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+        if self.callback is not None:
+            self.callback("error", name, 0.0, 1)
+
+    def count(self, name, items=1):
+        self.counters[name] = self.counters.get(name, 0) + items
+        if self.callback is not None:
+            self.callback("counter", name, 0.0, items)
+
+    def add(self, timings, kind, name, seconds, items):
+        timing = timings.get(name)
+        if timing is None:
+            timing = timings[name] = Timing()
+        timing.calls += 1
+        timing.seconds += seconds
+        timing.items += items
+        if self.callback is not None:
+            self.callback(kind, name, seconds, items)
+
+    def slowest(self, n=10):
+        """ Returns the n (tag, Timing) lookups that took longest """
+        return sorted(self.lookups.items(),
+                      key=lambda item: item[1].seconds, reverse=True)[:n]
+
+    def as_dict(self):
+        """ Returns the stats as plain dicts, e.g. to dump as JSON """
+        return OrderedDict([
+            ("stages", OrderedDict((name, timing.as_dict())
+                                   for name, timing in self.stages.items())),
+            ("lookups", OrderedDict((name, timing.as_dict())
+                                    for name, timing in
+                                    self.lookups.items())),
+            ("errors", OrderedDict(self.errors)),
+            ("counters", OrderedDict(self.counters)),
+        ])
@@ -0,0 +1,341 @@
+#! /usr/bin/env python
+# encoding: utf-8
+"""
+Concept definitions, calculation and presentation relationships and
+labels, read from a locally stored taxonomy and a filing's own schema and
+linkbases, and kept in a ParseCache so they are only read once.
+
+    taxonomy = load_taxonomy(["taxonomies/us-gaap-2013-01-31/",
+                              "abc-20131231.xsd", "abc-20131231_cal.xml"],
+                             cache="~/.cache/python-xbrl")
+    taxonomy.concepts["us-gaap:assets"].balance
+"""
+
+import os
+import hashlib
+
+import six
+
+from xbrl.cache import ParseCache
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+# bump whenever what is read from a taxonomy changes
+TAXONOMY_VERSION = 1
+
+XSD_NS = "http://www.w3.org/2001/XMLSchema"
+XBRLI_NS = "http://www.xbrl.org/2003/instance"
+LINK_NS = "http://www.xbrl.org/2003/linkbase"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+LABEL_ROLE = "http://www.xbrl.org/2003/role/label"
+
+XLINK = dict((name, "{%s}%s" % (XLINK_NS, name))
+             for name in ("type", "label", "href", "from", "to", "role",
+                          "arcrole"))
+
+# the extended links read, and the arcs kept from them
+LINKS = dict(("{%s}%s" % (LINK_NS, link), kind) for link, kind in
+             (("calculationLink", "calculations"),
+              ("presentationLink", "presentation"),
+              ("labelLink", "labels")))
+
+TAXONOMY_EXTENSIONS = (".xsd", ".xml")
+
+
+class Concept(object):
+    """
+    A concept of the taxonomy. name is prefixed as written, e.g.
+    us-gaap:Assets, balance is 'debit', 'credit' or None and period_type
+    'instant' or 'duration'.
+    """
+    __slots__ = ('name', 'type', 'balance', 'period_type', 'abstract',
+                 'substitution_group')
+
+    def __init__(self, name, type=None, balance=None, period_type=None,
+                 abstract=False, substitution_group=None):
+        self.name = name
+        self.type = type
+        self.balance = balance
+        self.period_type = period_type
+        self.abstract = abstract
+        self.substitution_group = substitution_group
+
+    def __reduce__(self):
+        return (Concept, (self.name, self.type, self.balance,
+                          self.period_type, self.abstract,
+                          self.substitution_group))
+
+    def __repr__(self):
+        return "<Concept %s>" % self.name
+
+
+def concept_key(name):
+    """ Concepts are keyed by their lowercased name, like facts """
+    return name.lower()
+
+
+class Taxonomy(object):
+    """
+    Compact indexes of a taxonomy, keyed by lowercased concept names like
+    the facts of a FactIndex.
+
+    concepts: name -> Concept
+    calculations: role -> {parent: [(child, weight)]} in arc order
+    presentation: role -> {parent: [child]} in arc order
+    labels: name -> {label role: text} in the language given to load()
+
+    Prohibited arcs, as an extension uses to drop a standard relationship,
+    remove the arc they match.
+    """
+
+    def __init__(self, lang="en"):
+        self.lang = lang
+        self.concepts = {}
+        self.calculations = OrderedDict()
+        self.presentation = OrderedDict()
+        self.labels = {}
+        # element id -> concept name, for resolving linkbase locators
+        self.ids = {}
+        self._intern = {}.setdefault
+
+    def __reduce__(self):
+        state = dict(lang=self.lang, concepts=self.concepts,
+                     calculations=self.calculations,
+                     presentation=self.presentation, labels=self.labels,
+                     ids=self.ids)
+        return (Taxonomy, (self.lang,), state)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._intern = {}.setdefault
+
+    def __len__(self):
+        return len(self.concepts)
+
+    def __contains__(self, name):
+        return concept_key(name) in self.concepts
+
+    def concept(self, name):
+        return self.concepts.get(concept_key(name))
+
+    def balance(self, name):
+        concept = self.concept(name)
+        return concept.balance if concept is not None else None
+
+    def period_type(self, name):
+        concept = self.concept(name)
+        return concept.period_type if concept is not None else None
+
+    def label(self, name, role=LABEL_ROLE):
+        """ Returns the label of a concept, or None """
+        return self.labels.get(concept_key(name), {}).get(role)
+
+    def summations(self, parent, role=None):
+        """
+        Returns the (child, weight) pairs a parent concept sums up to, from
+        the calculation role given or the first one that has it.
+        """
+        parent = concept_key(parent)
+        roles = [role] if role is not None else self.calculations
+        for role in roles:
+            children = self.calculations.get(role, {}).get(parent)
+            if children:
+                return list(children)
+        return []
+
+    def load(self, path):
+        """ Reads a schema or a linkbase into the taxonomy """
+        from lxml import etree
+
+        with open(path, "rb") as fh:
+            events = etree.iterparse(fh, events=("start", "end"),
+                                     huge_tree=True)
+            event, root = next(events)
+            if root.tag == "{%s}schema" % XSD_NS:
+                self.load_schema(root, events)
+            elif root.tag == "{%s}linkbase" % LINK_NS:
+                self.load_linkbase(events)
+            else:
+                # linkbases can also be embedded in a schema's appinfo
+                self.load_linkbase(events)
+
+    def load_schema(self, root, events):
+        target = root.get("targetNamespace")
+        prefix = None
+        for key, uri in root.nsmap.items():
+            if key and uri == target:
+                prefix = key
+                break
+
+        element_tag = "{%s}element" % XSD_NS
+        for event, element in events:
+            if event != "end":
+                continue
+            if element.tag == element_tag and \
+                    element.getparent() is root and element.get("name"):
+                self.add_element(element, prefix)
+                element.clear()
+            elif element.tag in LINKS:
+                self.add_link(element)
+                element.clear()
+
+    def add_element(self, element, prefix):
+        intern = self._intern
+        local = element.get("name")
+        name = prefix + ":" + local if prefix else local
+        key = concept_key(name)
+        self.concepts[key] = Concept(
+            name,
+            type=intern(element.get("type"), element.get("type")),
+            balance=intern(element.get("{%s}balance" % XBRLI_NS),
+                           element.get("{%s}balance" % XBRLI_NS)),
+            period_type=intern(element.get("{%s}periodType" % XBRLI_NS),
+                               element.get("{%s}periodType" % XBRLI_NS)),
+            abstract=element.get("abstract") == "true",
+            substitution_group=intern(element.get("substitutionGroup"),
+                                      element.get("substitutionGroup")))
+        if element.get("id"):
+            self.ids[element.get("id")] = key
+
+    def load_linkbase(self, events):
+        for event, element in events:
+            if event == "end" and element.tag in LINKS:
+                self.add_link(element)
+                element.clear()
+
+    def locator(self, href):
+        """ Returns the concept name a locator's href points at """
+        fragment = href.rpartition("#")[2]
+        key = self.ids.get(fragment)
+        if key is None:
+            # ids are prefix_Name by convention
+            key = concept_key(fragment.replace("_", ":", 1))
+        return key
+
+    def add_link(self, link):
+        kind = LINKS[link.tag]
+        role = link.get(XLINK["role"])
+        locators = {}
+        resources = {}
+        arcs = []
+        for child in link:
+            child_type = child.get(XLINK["type"])
+            if child_type == "locator":
+                locators.setdefault(child.get(XLINK["label"]), []).append(
+                    self.locator(child.get(XLINK["href"], "")))
+            elif child_type == "resource":
+                lang = child.get(XML_LANG) or ""
+                if lang.lower().startswith(self.lang):
+                    resources.setdefault(child.get(XLINK["label"]), []) \
+                        .append((child.get(XLINK["role"]) or LABEL_ROLE,
+                                 "".join(child.itertext()).strip()))
+            elif child_type == "arc":
+                arcs.append(child)
+
+        if kind == "labels":
+            for arc in arcs:
+                for name in locators.get(arc.get(XLINK["from"]), ()):
+                    labels = self.labels.setdefault(name, {})
+                    for label_role, text in resources.get(
+                            arc.get(XLINK["to"]), ()):
+                        labels.setdefault(label_role, text)
+            return
+
+        relationships = getattr(self, kind).setdefault(role, OrderedDict())
+        ordered = sorted(arcs, key=lambda arc: float(arc.get("order", 1)))
+        for arc in ordered:
+            prohibited = arc.get("use") == "prohibited"
+            weight = float(arc.get("weight", 1))
+            for parent in locators.get(arc.get(XLINK["from"]), ()):
+                children = relationships.setdefault(parent, [])
+                for child in locators.get(arc.get(XLINK["to"]), ()):
+                    if kind == "calculations":
+                        children[:] = [entry for entry in children
+                                       if entry[0] != child]
+                        entry = (child, weight)
+                    else:
+                        if child in children:
+                            children.remove(child)
+                        entry = child
+                    if not prohibited:
+                        children.append(entry)
+                if not children:
+                    del relationships[parent]
+
+
+def taxonomy_files(paths):
+    """
+    Yields the schema and linkbase files in paths, walking directories.
+    """
+    from xbrl.batch import find_filings
+
+    if isinstance(paths, six.string_types):
+        paths = [paths]
+    return find_filings(paths, TAXONOMY_EXTENSIONS, instances=False)
+
+
+def filing_taxonomy_files(path):
+    """
+    Returns the schema and linkbases next to a filing that are named like
+    it, e.g. goog-20131231.xsd and goog-20131231_cal.xml for
+    goog-20131231.xml.
+    """
+    base = os.path.splitext(path)[0]
+    files = [base + suffix for suffix in
+             (".xsd", "_cal.xml", "_pre.xml", "_lab.xml")]
+    return [name for name in files if os.path.exists(name)]
+
+
+def taxonomy_version(files):
+    """
+    Returns a version key for a set of taxonomy files from their paths,
+    sizes and modification times.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        stat = os.stat(path)
+        digest.update(("%s %s %s\n" % (os.path.abspath(path), stat.st_size,
+                                       stat.st_mtime)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_taxonomy(paths, cache=None, version=None, lang="en"):
+    """
+    Read schemas and linkbases, or directories of them, into a Taxonomy.
+
+    :param cache: A ParseCache or a directory for one. The Taxonomy is
+        stored there and later calls with the same version load it in one
+        unpickle instead of reading the files.
+    :param version: The key of this set of files in the cache, e.g.
+        'us-gaap-2013-01-31'. Worked out from the files' paths, sizes and
+        modification times when not given.
+    :param lang: The language of the labels to keep.
+    """
+    files = None
+    key = None
+    if isinstance(cache, six.string_types):
+        cache = ParseCache(cache)
+    if cache is not None:
+        if version is None:
+            files = list(taxonomy_files(paths))
+            version = taxonomy_version(files)
+        key = cache.key("%s %s %s" % (TAXONOMY_VERSION, version, lang),
+                        "taxonomy")
+        taxonomy = cache.get(key)
+        if taxonomy is not None:
+            return taxonomy
+
+    taxonomy = Taxonomy(lang)
+    # schemas first so linkbase locators resolve to their concept names
+    files = files if files is not None else list(taxonomy_files(paths))
+    for path in sorted(files, key=lambda path: not path.endswith(".xsd")):
+        taxonomy.load(path)
+
+    if cache is not None:
+        cache.set(key, taxonomy)
+    return taxonomy